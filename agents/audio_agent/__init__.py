@@ -0,0 +1,31 @@
+from agents.audio_agent.prompts import (
+    AUDIO_ROLE,
+    ADMIN_TASK,
+    ADMIN_INSTRUCTIONS,
+    AUDION_USER
+)
+from providers.audio_provider import AudioProvider
+from providers.manager import get_provider
+import os
+
+def create_audio_agent(provider: str = "openai", selected_model: str = None):
+    """
+    Create an instance of the Audio Agent, which turns a document and its references into a spoken lesson.
+
+    The selected model must support audio output, so it defaults to AUDIO_MODEL rather than SELECTED_MODEL.
+    """
+    model, async_model, _ = get_provider(provider=provider, selected_model=selected_model)
+
+    return AudioProvider(
+        model=model,
+        async_model=async_model,
+        model_name=selected_model or os.getenv("AUDIO_MODEL", "gpt-4o-audio-preview"),
+        agent_name="Audio Agent",
+        role=AUDIO_ROLE,
+        task=ADMIN_TASK,
+        instructions=ADMIN_INSTRUCTIONS,
+        user_input=AUDION_USER,
+        voice=os.getenv("AUDIO_VOICE", "alloy")
+    )
+
+all = ["create_audio_agent"]
@@ -9,16 +9,17 @@ from agents.reference_agent.prompts import (
 from agents.reference_agent.model import ReferenceScoutingAgent
 from providers.manager import get_provider
 
-def create_research_agent(provider: str = "openai", selected_model: str = "gpt-4o-mini"):
+def create_reference_agent(provider: str = "openai", selected_model: str = "gpt-4o-mini"):
     """
-    Create an instance of the Research Agent class.
+    Create an instance of the Reference Scouting Agent class.
     """
-    model, Agent = get_provider(provider=provider, selected_model=selected_model)
+    model, async_model, Agent = get_provider(provider=provider, selected_model=selected_model)
 
     return Agent(
         model=model,
+        async_model=async_model,
         model_name=selected_model,
-        agent_name="Research Agent",
+        agent_name="Reference Agent",
         role=REFERENCE_ROLE,
         task=REFERENCE_TASK,
         instructions=REFERENCE_INSTRUCTIONS + REFERENCE_OUTPUT_FORMAT,
@@ -8,13 +8,10 @@ everything in given context.
 """
 
 REFERENCE_INSTRUCTIONS = """
-The context given are references to the main paper who'se information is summarized as follows.
-Main Source - {main_source}
+The context given are references to the main paper who'se information is provided by the user alongside them.
 
 You will formulate the summaries which contain information from the given data which can be used to understand the main source information. If no sucj information
 that could be considered valuable for the main source, then ignore it.
-
-References' Data: {reference_data}
 """
 
 REFERENCE_OUTPUT_FORMAT = """
@@ -28,4 +25,8 @@ Follow this JSON Format:-->
 REFERENCE_USER = """
 Perform the Task as described above on the references' data, while ensuring the Main Sources' understanding and readability and usefulness are of major intrest, stick to the
 formation of the required Response//Output Format. 
+
+Main Source - {main_source}
+
+References' Data: {reference_data}
 """
\ No newline at end of file
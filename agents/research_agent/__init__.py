@@ -13,10 +13,11 @@ def create_research_agent(provider: str = "openai", selected_model: str = "gpt-4
     """
     Create an instance of the Research Agent class.
     """
-    model, Agent = get_provider(provider=provider, selected_model=selected_model)
+    model, async_model, Agent = get_provider(provider=provider, selected_model=selected_model)
 
     return Agent(
         model=model,
+        async_model=async_model,
         model_name=selected_model,
         agent_name="Research Agent",
         role=RESEARCH_ROLE,
@@ -3,7 +3,8 @@ from agents.resource_agent.prompts import (
     RESOURCE_TASK, 
     RESOURCE_INSTRUCTIONS, 
     RESOURCE_OUTPUT_FORMAT, 
-    RESOURCE_USER_INPUT
+    RESOURCE_USER_INPUT,
+    RESOURCE_MERGE_USER_INPUT
 )
 from agents.resource_agent.model import ResourceAgentResponse
 from providers.manager import get_provider
@@ -12,10 +13,11 @@ def understand_resource_agent(provider: str = "openai", selected_model: str = "g
     """
     Create an instance of the Resource Agent class.
     """
-    model, Agent = get_provider(provider=provider, selected_model=selected_model)
+    model, async_model, Agent = get_provider(provider=provider, selected_model=selected_model)
 
     return Agent(
         model=model,
+        async_model=async_model,
         model_name=selected_model,
         agent_name="Resource Agent",
         role=RESOURCE_ROLE,
@@ -27,4 +29,24 @@ def understand_resource_agent(provider: str = "openai", selected_model: str = "g
         user_input=RESOURCE_USER_INPUT
     )
 
-all = ["understand_resource_agent"]
\ No newline at end of file
+def merge_resource_agent(provider: str = "openai", selected_model: str = "gpt-4o-mini"):
+    """
+    Create an instance of the Resource Agent that merges partial analyses of a chunked document.
+    """
+    model, async_model, Agent = get_provider(provider=provider, selected_model=selected_model)
+
+    return Agent(
+        model=model,
+        async_model=async_model,
+        model_name=selected_model,
+        agent_name="Resource Merge Agent",
+        role=RESOURCE_ROLE,
+        task=RESOURCE_TASK,
+        instructions=RESOURCE_INSTRUCTIONS + RESOURCE_OUTPUT_FORMAT,
+        response_structure=ResourceAgentResponse,
+        structured_outputs=True,
+        examples=None,
+        user_input=RESOURCE_MERGE_USER_INPUT
+    )
+
+all = ["understand_resource_agent", "merge_resource_agent"]
\ No newline at end of file
@@ -38,3 +38,10 @@ RESOURCE_USER_INPUT = """Analyze the following content to provide a comprehensiv
 Data: {data}
 
 """
+RESOURCE_MERGE_USER_INPUT = """The document was too large to analyze in one pass, so it was split into consecutive parts and each part was analyzed separately.
+Merge the partial analyses below into a single analysis of the whole document: one title, one summary that tells the complete story in order,
+and one set of atomic summaries where overlapping topics are combined and ordered by hierarchical importance and consumption order.
+
+Partial analyses: {data}
+
+"""
@@ -0,0 +1,160 @@
+"""
+Load-test /api/research and /api/resource against the mock provider and report throughput and
+p50/p95/p99 latency per concurrency level.
+
+By default the app runs in-process behind httpx's ASGI transport, so no server or API key is
+needed; the load generator then shares the event loop with the app, which keeps the numbers
+comparable between runs but not with production. Pass --url to load a running server instead
+(start it with PROVIDER=mock and the same MOCK_LLM_CONFIG).
+
+Usage:
+    python -m benchmarks.bench_load --output bench.json
+    python -m benchmarks.bench_load --quick --latency-mean 0.05
+    PROVIDER=mock python main.py & python -m benchmarks.bench_load --url http://localhost:8000
+"""
+import os
+
+os.environ.setdefault("LOG_MODE", "prod")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+os.environ.setdefault("PROVIDER", "mock")
+
+import argparse
+import asyncio
+import contextlib
+import json
+import tempfile
+import time
+from collections import Counter
+from typing import Callable, Dict, List
+import httpx
+from benchmarks.common import summarize, write_report
+from benchmarks.synthetic_pdfs import make_pdf
+
+
+async def run_load(client: httpx.AsyncClient, make_request: Callable[[int], Dict], requests: int, concurrency: int) -> Dict[str, object]:
+    """
+    Send `requests` requests from `concurrency` closed-loop workers.
+
+    Args:
+        client (httpx.AsyncClient): Client pointed at the app.
+        make_request (Callable[[int], Dict]): Builds the `client.request` arguments of request i.
+        requests (int): Total requests.
+        concurrency (int): Requests in flight at any time.
+
+    Returns:
+        dict: The latency summary plus throughput and status counts.
+    """
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+    counter = iter(range(requests))
+
+    async def worker():
+        for index in counter:
+            start = time.perf_counter()
+            try:
+                response = await client.request(**make_request(index))
+                statuses[str(response.status_code)] += 1
+            except httpx.HTTPError as e:
+                statuses[type(e).__name__] += 1
+                continue
+            latencies.append(time.perf_counter() - start)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall = time.perf_counter() - started
+    return summarize(
+        latencies,
+        concurrency=concurrency,
+        requests=requests,
+        wall_s=round(wall, 3),
+        throughput_rps=round(len(latencies) / wall, 2),
+        statuses=dict(statuses),
+        error_rate=round(1 - statuses.get("200", 0) / requests, 4),
+    )
+
+
+def research_request(index: int) -> Dict:
+    # Distinct queries, so the response cache and request coalescing don't flatter the numbers
+    return {
+        "method": "POST",
+        "url": "/api/research",
+        "json": {
+            "user_query": f"Summarize the findings of experiment {index}",
+            "data": "The model was evaluated on three benchmarks and improved accuracy by four points. " * 20,
+            "instructions": None,
+            "provider": None,
+            "selected_model": "mock-model",
+        },
+    }
+
+
+def resource_request(pdf_paths: List[str]) -> Callable[[int], Dict]:
+    def build(index: int) -> Dict:
+        return {
+            "method": "POST",
+            "url": "/api/resource",
+            "json": {
+                "pdf_path": pdf_paths[index % len(pdf_paths)],
+                "summarization_instructions": None,
+                "provider": None,
+                "selected_model": "mock-model",
+                "cache_mode": "bypass",
+            },
+        }
+    return build
+
+
+@contextlib.asynccontextmanager
+async def app_client(url: str | None):
+    if url:
+        async with httpx.AsyncClient(base_url=url, timeout=600) as client:
+            yield client
+        return
+    from main import app
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=600) as client:
+        yield client
+
+
+async def bench(args) -> Dict[str, Dict[str, object]]:
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf_paths = [make_pdf(os.path.join(tmp, f"doc{seed}.pdf"), pages=args.pdf_pages, images_per_page=1, seed=seed) for seed in range(args.documents)]
+        async with app_client(args.url) as client:
+            for concurrency in args.research_concurrency:
+                results[f"load.research.c{concurrency}"] = await run_load(client, research_request, args.requests, concurrency)
+            for concurrency in args.resource_concurrency:
+                results[f"load.resource.c{concurrency}"] = await run_load(client, resource_request(pdf_paths), max(concurrency, args.requests // 4), concurrency)
+    for result in results.values():
+        result["mock_config"] = os.environ.get("MOCK_LLM_CONFIG")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", help="Merge the results into this JSON report")
+    parser.add_argument("--url", help="Load a running server instead of the in-process app")
+    parser.add_argument("--quick", action="store_true", help="Fewer requests and concurrency levels, for a smoke run")
+    parser.add_argument("--requests", type=int, default=None, help="Requests per research concurrency level")
+    parser.add_argument("--research-concurrency", type=int, nargs="+", default=None)
+    parser.add_argument("--resource-concurrency", type=int, nargs="+", default=None)
+    parser.add_argument("--documents", type=int, default=4, help="Distinct PDFs cycled through by the resource test")
+    parser.add_argument("--pdf-pages", type=int, default=20)
+    parser.add_argument("--latency-mean", type=float, default=0.2, help="Mean mock LLM latency in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Injected 429 probability per LLM call")
+    args = parser.parse_args()
+
+    args.requests = args.requests or (40 if args.quick else 400)
+    args.research_concurrency = args.research_concurrency or ([1, 8] if args.quick else [1, 16, 64])
+    args.resource_concurrency = args.resource_concurrency or ([1, 4] if args.quick else [1, 8])
+    os.environ.setdefault("MOCK_LLM_CONFIG", json.dumps({
+        "seed": 0,
+        "latency": {"distribution": "lognormal", "mean": args.latency_mean, "sigma": 0.4, "min": 0.0},
+        "errors": {"rate_limit": args.error_rate},
+        "retry_after": 0.05,
+    }))
+
+    write_report(asyncio.run(bench(args)), args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Microbenchmarks of the hot helpers: PDF extraction across document sizes and image densities,
+prompt normalization on multi-MB inputs, and logger throughput.
+
+Usage:
+    python -m benchmarks.bench_micro --output bench.json
+    python -m benchmarks.bench_micro --quick
+"""
+import os
+
+# Compact logging, and nothing cached between repeats, before the app modules read their settings
+os.environ.setdefault("LOG_MODE", "prod")
+os.environ.setdefault("LOG_LEVEL", "INFO")
+os.environ.setdefault("PDF_CACHE_ENABLED", "false")
+
+import argparse
+import contextlib
+import tempfile
+import time
+from typing import Callable, Dict, List
+from benchmarks.common import summarize, write_report
+from benchmarks.synthetic_pdfs import make_pdf
+
+# (pages, distinct images per page)
+PDF_MATRIX = [(10, 0), (10, 4), (100, 0), (100, 2), (400, 0)]
+QUICK_PDF_MATRIX = [(10, 0), (10, 4), (50, 0)]
+
+
+def repeat(func: Callable[[], object], times: int, warmup: int = 1) -> List[float]:
+    for _ in range(warmup):
+        func()
+    timings = []
+    for _ in range(times):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def bench_pdf_extraction(tmp: str, matrix, times: int) -> Dict[str, Dict[str, object]]:
+    from helpers.helpers import PDFProcessor, shutdown_extraction_pool
+
+    results = {}
+    for pages, images in matrix:
+        path = make_pdf(os.path.join(tmp, f"p{pages}_i{images}.pdf"), pages=pages, images_per_page=images)
+        size = os.path.getsize(path)
+        # Serial, so numbers don't depend on the machine's core count; bench_pdf_extraction covers the pool
+        timings = repeat(lambda: PDFProcessor(path, workers=1, use_cache=False).extract_text_and_images(), times)
+        results[f"micro.pdf_extract.p{pages}_i{images}"] = summarize(timings, pages=pages, images_per_page=images, file_bytes=size)
+
+        handles = PDFProcessor(path, workers=1, use_cache=False).extract_images()
+        if handles:
+            processor = PDFProcessor(path, use_cache=False)
+            timings = repeat(lambda: processor.load_images(handles), times)
+            results[f"micro.pdf_load_images.p{pages}_i{images}"] = summarize(timings, images=len(handles))
+    shutdown_extraction_pool()
+    return results
+
+
+def bench_generate_user_input(sizes_mb: List[int], times: int) -> Dict[str, Dict[str, object]]:
+    from agents.research_agent.prompts import RESEARCH_USER_INPUT
+    from providers.base_provider import BaseProvider
+
+    # Only the prompt helpers are exercised, so no client or concrete provider is needed
+    class PromptOnly(BaseProvider):
+        def generate_response(self, *args, **kwargs):
+            raise NotImplementedError
+
+        async def agenerate_response(self, *args, **kwargs):
+            raise NotImplementedError
+
+    provider = PromptOnly(
+        model=None, model_name="bench", agent_name="Bench", role="", task="", instructions="",
+        structured_outputs=False, response_structure=None, user_input=RESEARCH_USER_INPUT,
+    )
+    paragraph = "Self-attention relates every token to every other token — naïvely O(n²). "
+    results = {}
+    for size in sizes_mb:
+        data = (paragraph * (size * 1024 * 1024 // len(paragraph) + 1))[:size * 1024 * 1024]
+        timings = repeat(lambda: provider.generate_user_input(query="What is attention?", data=data), times)
+        results[f"micro.generate_user_input.{size}mb"] = summarize(timings, input_bytes=len(data.encode()))
+    return results
+
+
+def bench_logger(records: int) -> Dict[str, Dict[str, object]]:
+    from helpers.loggers import get_logger
+
+    logger = get_logger()
+    results = {}
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stderr(devnull):
+        for name, level in (("filtered_debug", logger.debug), ("info", logger.info)):
+            start = time.perf_counter()
+            for index in range(records):
+                level("benchmark record", index=index)
+            elapsed = time.perf_counter() - start
+            results[f"micro.logger.{name}"] = summarize(
+                [elapsed / records], unit="s/record", records=records, throughput_per_s=round(records / elapsed, 1)
+            )
+        logger.sink.flush(timeout=30)
+    results["micro.logger.info"]["dropped"] = logger.sink.dropped
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", help="Merge the results into this JSON report")
+    parser.add_argument("--quick", action="store_true", help="Smaller inputs and fewer repeats, for a smoke run")
+    parser.add_argument("--repeat", type=int, default=None)
+    args = parser.parse_args()
+
+    times = args.repeat or (2 if args.quick else 5)
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        results.update(bench_pdf_extraction(tmp, QUICK_PDF_MATRIX if args.quick else PDF_MATRIX, times))
+    results.update(bench_generate_user_input([1] if args.quick else [1, 4], times))
+    results.update(bench_logger(5000 if args.quick else 50000))
+    write_report(results, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Compare serial and process-pool PDF text extraction.
+
+Usage:
+    python -m benchmarks.bench_pdf_extraction --pages 400 --workers 4 --repeat 3
+"""
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+from benchmarks.synthetic_pdfs import make_pdf
+from helpers.helpers import PDFProcessor, shutdown_extraction_pool
+
+
+def time_extraction(pdf_path: str, workers: int, repeat: int) -> list[float]:
+    timings = []
+    for _ in range(repeat):
+        processor = PDFProcessor(pdf_path, workers=workers, parallel_threshold=1)
+        start = time.perf_counter()
+        processor.extract_text()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=400)
+    parser.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1))
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf_path = make_pdf(os.path.join(tmp, "bench.pdf"), pages=args.pages)
+
+        # Warm the pool so worker start-up isn't billed to the first parallel run
+        time_extraction(pdf_path, args.workers, 1)
+
+        serial = time_extraction(pdf_path, 1, args.repeat)
+        parallel = time_extraction(pdf_path, args.workers, args.repeat)
+        shutdown_extraction_pool()
+
+    result = {
+        "pages": args.pages,
+        "workers": args.workers,
+        "serial_median_s": round(statistics.median(serial), 4),
+        "parallel_median_s": round(statistics.median(parallel), 4),
+        "speedup": round(statistics.median(serial) / statistics.median(parallel), 2),
+    }
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Shared helpers for the benchmark suites: percentile summaries and the JSON report format.
+
+A report looks like:
+
+    {
+      "meta": {"python": "3.11.7", "platform": "...", "cpus": 8, "commit": "abc123", "created": "..."},
+      "results": {
+        "micro.generate_user_input.4mb": {"unit": "s", "better": "lower", "n": 5, "p50": 0.41, ...},
+        "load.research.c16": {"unit": "s", "better": "lower", "n": 400, "p50": 0.21, "throughput_rps": 71.3, ...}
+      }
+    }
+
+so two reports can be diffed key by key with `python -m benchmarks.compare`.
+"""
+import json
+import os
+import platform
+import statistics
+import subprocess
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional
+
+
+def percentile(samples: List[float], percent: float) -> float:
+    """
+    Nearest-rank percentile.
+
+    Args:
+        samples (List[float]): The measurements.
+        percent (float): 0-100.
+
+    Returns:
+        float: The smallest sample that at least `percent`% of the samples are less than or equal to.
+    """
+    ordered = sorted(samples)
+    rank = max(1, -(-len(ordered) * percent // 100))
+    return ordered[min(len(ordered), int(rank)) - 1]
+
+
+def summarize(samples: Iterable[float], unit: str = "s", better: str = "lower", **extra) -> Dict[str, object]:
+    """
+    Summarize measurements into the report's result format.
+
+    Args:
+        samples (Iterable[float]): The measurements.
+        unit (str, optional): Unit of the samples. Defaults to "s".
+        better (str, optional): "lower" or "higher", which direction is an improvement. Defaults to "lower".
+        **extra: Additional fields stored with the result (e.g. throughput).
+
+    Returns:
+        dict: unit, better, n, mean, min, p50, p95, p99, max and the extra fields.
+    """
+    samples = list(samples)
+    if not samples:
+        return {"unit": unit, "better": better, "n": 0, **extra}
+    return {
+        "unit": unit,
+        "better": better,
+        "n": len(samples),
+        "mean": round(statistics.fmean(samples), 6),
+        "min": round(min(samples), 6),
+        "p50": round(percentile(samples, 50), 6),
+        "p95": round(percentile(samples, 95), 6),
+        "p99": round(percentile(samples, 99), 6),
+        "max": round(max(samples), 6),
+        **extra,
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def environment() -> Dict[str, object]:
+    """
+    Returns:
+        dict: What the numbers were measured on, so reports from different machines aren't compared blindly.
+    """
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "commit": _git_commit(),
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    }
+
+
+def write_report(results: Dict[str, Dict[str, object]], output: Optional[str] = None) -> Dict[str, object]:
+    """
+    Print the report and optionally merge it into a JSON file.
+
+    Args:
+        results (Dict[str, Dict[str, object]]): Results keyed by benchmark name.
+        output (str, optional): Report file; existing results in it are kept unless overwritten. Defaults to None.
+
+    Returns:
+        dict: The full report.
+    """
+    report = {"meta": environment(), "results": {}}
+    if output and os.path.exists(output):
+        with open(output) as f:
+            report["results"] = json.load(f).get("results", {})
+    report["results"].update(results)
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if output:
+        with open(output, "w") as f:
+            f.write(text + "\n")
+    print(text)
+    return report
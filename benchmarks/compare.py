@@ -0,0 +1,71 @@
+"""
+Diff two benchmark reports and flag regressions.
+
+Every result present in both reports is compared on one statistic (p50 by default) in the
+direction its "better" field says; the exit status is 1 when any result regressed by more
+than the threshold, so the comparison can gate a release.
+
+Usage:
+    python -m benchmarks.compare baseline.json candidate.json
+    python -m benchmarks.compare baseline.json candidate.json --stat p95 --threshold 0.10 --json
+"""
+import argparse
+import json
+import sys
+from typing import Dict, List
+
+
+def compare(baseline: Dict, candidate: Dict, stat: str = "p50", threshold: float = 0.05) -> List[Dict[str, object]]:
+    """
+    Args:
+        baseline (Dict): The reference report.
+        candidate (Dict): The report under test.
+        stat (str, optional): Statistic compared. Defaults to "p50".
+        threshold (float, optional): Relative change tolerated before flagging. Defaults to 0.05.
+
+    Returns:
+        List[Dict[str, object]]: One row per shared result: name, baseline, candidate, relative change and verdict.
+    """
+    rows = []
+    for name in sorted(set(baseline["results"]) & set(candidate["results"])):
+        before, after = baseline["results"][name], candidate["results"][name]
+        if stat not in before or stat not in after:
+            continue
+        old, new = before[stat], after[stat]
+        change = (new - old) / old if old else 0.0
+        # Positive when the candidate is worse
+        worse = change if before.get("better", "lower") == "lower" else -change
+        verdict = "regressed" if worse > threshold else "improved" if worse < -threshold else "unchanged"
+        rows.append({"name": name, "unit": before.get("unit"), "baseline": old, "candidate": new, "change": round(change, 4), "verdict": verdict})
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--stat", default="p50")
+    parser.add_argument("--threshold", type=float, default=0.05)
+    parser.add_argument("--json", action="store_true", help="Print the rows as JSON")
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+    rows = compare(baseline, candidate, args.stat, args.threshold)
+
+    if args.json:
+        print(json.dumps({"baseline": baseline.get("meta"), "candidate": candidate.get("meta"), "rows": rows}, indent=2))
+    else:
+        if baseline.get("meta", {}).get("platform") != candidate.get("meta", {}).get("platform"):
+            print("warning: the reports were measured on different platforms", file=sys.stderr)
+        width = max([len(row["name"]) for row in rows] + [4])
+        print(f"{'name':<{width}}  {'baseline':>12}  {'candidate':>12}  {'change':>8}  verdict")
+        for row in rows:
+            print(f"{row['name']:<{width}}  {row['baseline']:>12.6g}  {row['candidate']:>12.6g}  {row['change']:>+8.1%}  {row['verdict']}")
+    sys.exit(1 if any(row["verdict"] == "regressed" for row in rows) else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+import fitz
+import random
+from pathlib import Path
+
+PARAGRAPH = (
+    "Transformer architectures rely on self-attention to model long range dependencies between tokens. "
+    "We evaluate the proposed method on standard benchmarks and report accuracy, latency and memory usage. "
+    "See https://arxiv.org/abs/1706.03762 for the original formulation and https://example.org/appendix for details. "
+)
+
+
+def make_pdf(path: str, pages: int, images_per_page: int = 0, paragraphs_per_page: int = 12, shared_logo: bool = False, seed: int = 0) -> str:
+    """
+    Write a synthetic research-paper-like PDF.
+
+    Args:
+        path (str): Where to write the PDF.
+        pages (int): Number of pages.
+        images_per_page (int, optional): Distinct embedded images per page. Defaults to 0.
+        paragraphs_per_page (int, optional): Paragraphs of text per page. Defaults to 12.
+        shared_logo (bool, optional): Also place one image (same xref) on every page, like a header logo. Defaults to False.
+        seed (int, optional): Seed for the generated image content. Defaults to 0.
+
+    Returns:
+        str: The path that was written.
+    """
+    rng = random.Random(seed)
+    doc = fitz.open()
+    logo_xref = 0
+    for page_number in range(pages):
+        page = doc.new_page()
+        text = f"Section {page_number + 1}\n\n" + "\n\n".join(PARAGRAPH for _ in range(paragraphs_per_page))
+        page.insert_textbox(fitz.Rect(36, 36, 576, 600), text, fontsize=8)
+        page.insert_link({"kind": fitz.LINK_URI, "from": fitz.Rect(36, 20, 200, 32), "uri": f"https://example.org/ref/{page_number}"})
+
+        for image_number in range(images_per_page):
+            pixmap = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, 256, 256), False)
+            pixmap.set_rect(pixmap.irect, (rng.randrange(256), rng.randrange(256), rng.randrange(256)))
+            top = 610 + (image_number % 3) * 60
+            page.insert_image(fitz.Rect(36 + image_number * 60, top, 90 + image_number * 60, top + 54), pixmap=pixmap)
+
+        if shared_logo:
+            if logo_xref:
+                page.insert_image(fitz.Rect(520, 10, 570, 30), xref=logo_xref)
+            else:
+                logo = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, 64, 32), False)
+                logo.set_rect(logo.irect, (10, 60, 200))
+                logo_xref = page.insert_image(fitz.Rect(520, 10, 570, 30), pixmap=logo)
+
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    doc.save(path)
+    doc.close()
+    return path
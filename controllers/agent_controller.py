@@ -1,37 +1,146 @@
 from helpers.loggers import get_logger
-from models.requests import ResearchRequest, ResourceRequest, ReferenceScouterRequest
-from fastapi.responses import JSONResponse
-from services.research_service import research_service
+from models.requests import ResearchRequest, ResourceRequest, ReferenceScouterRequest, PipelineRequest
+from fastapi import Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.background import BackgroundTask
+from helpers.uploads import stream_pdf_upload, UploadTooLargeError, InvalidUploadError
+from enums.cache_mode import CacheMode
+from helpers.tracing import span
+from providers.errors import CircuitOpenError, RateLimitTimeoutError
+from helpers.admission import admit, AdmissionRejectedError
+from services.research_service import research_service, research_stream_service
+from services.document_service import resolve_document_data
+from helpers.documents import DocumentNotFoundError
+from helpers.sse import format_sse
 from services.resource_service import process_document
-from services.reference_service import source_reference_content, encapsulate_references
+from services.reference_service import collect_references, scout_references
+from helpers.helpers import PDFProcessor
+from services.pipeline_service import run_pipeline, resolve_stages
+import asyncio
+import os
 import traceback
 
 logger = get_logger()
 
+def upload_max_bytes() -> int:
+    return int(os.getenv("UPLOAD_MAX_BYTES", 50 * 1024 * 1024))
+
+# Failures that mean "not now" rather than "broken", answered with Retry-After
+UNAVAILABLE_ERRORS = (CircuitOpenError, RateLimitTimeoutError, AdmissionRejectedError)
+
+def provider_unavailable_response(error: CircuitOpenError | RateLimitTimeoutError | AdmissionRejectedError) -> JSONResponse:
+    """
+    Tell the client the provider can't take the request right now and when to come back:
+    503 while its circuit is open, 429 when our rate limit had no capacity in time or the
+    request was shed by admission control.
+    """
+    logger.warning(f"Provider unavailable: {error}")
+    return JSONResponse(
+        content={"error": str(error)},
+        status_code=503 if isinstance(error, CircuitOpenError) else 429,
+        headers={"Retry-After": str(max(1, round(error.retry_after)))}
+    )
+
 async def research_agent(request: ResearchRequest):
     """
     Handle incoming research queries and return the generated response.
 
     Args:
-        request (ResearchRequest): Request object containing user query, optional data, provider, and model selection.
+        request (ResearchRequest): Request object containing user query, the data or the `doc_id` of a stored
+            document, provider, and model selection.
 
     Returns:
         JSONResponse: A JSON response containing either the research result or an error message.
     """
     query = request.user_query
-    data = request.data
     provider = request.provider
     selected_model = request.selected_model
 
     logger.info(f"Agent Controller processing query: {query}")
     try:
-        result = research_service(query, data, provider, selected_model)
-        return JSONResponse(content={"result": result}, status_code=200)
+        data = await resolve_document_data(request.data, request.doc_id)
+    except DocumentNotFoundError as e:
+        return JSONResponse(content={"error": str(e)}, status_code=404)
+    except ValueError as e:
+        return JSONResponse(content={"error": str(e)}, status_code=400)
+    try:
+        admission = await admit("research", provider)
+        try:
+            result = await research_service(query, data, provider, selected_model, request.cache_mode)
+        finally:
+            admission.release()
+        with span("serialize"):
+            return JSONResponse(content={"result": result}, status_code=200)
+    except UNAVAILABLE_ERRORS as e:
+        return provider_unavailable_response(e)
     except Exception as e:
         logger.error(f"Error in research agent: {e} at: {traceback.format_exc()}")
         return JSONResponse(content={"error": str(e)}, status_code=500)
     
 
+async def research_stream_agent(request: ResearchRequest):
+    """
+    Stream a research answer as Server-Sent Events.
+
+    Events: `delta` ({field, delta}) while `reasoning` or `answer` is being written, `field`
+    ({field, value}) when one is complete, `result` with the validated response, and `error`
+    if generation fails after the stream has started.
+
+    Args:
+        request (ResearchRequest): Request object containing user query, the data or the `doc_id` of a stored
+            document, provider, and model selection.
+
+    Returns:
+        StreamingResponse | JSONResponse: The `text/event-stream`, or a JSON error if nothing could be generated.
+    """
+    logger.info(f"Agent Controller streaming query: {request.user_query}")
+    try:
+        data = await resolve_document_data(request.data, request.doc_id)
+    except DocumentNotFoundError as e:
+        return JSONResponse(content={"error": str(e)}, status_code=404)
+    except ValueError as e:
+        return JSONResponse(content={"error": str(e)}, status_code=400)
+    try:
+        # Held until the stream ends, not just until the response starts
+        admission = await admit("research", request.provider)
+    except AdmissionRejectedError as e:
+        return provider_unavailable_response(e)
+    events = research_stream_service(request.user_query, data, request.provider, request.selected_model, request.cache_mode)
+    try:
+        # Fail with a proper status code while nothing has been sent yet
+        first = await anext(events)
+    except StopAsyncIteration:
+        admission.release()
+        return JSONResponse(content={"error": "The agent returned no response"}, status_code=500)
+    except UNAVAILABLE_ERRORS as e:
+        admission.release()
+        return provider_unavailable_response(e)
+    except Exception as e:
+        admission.release()
+        logger.error(f"Error in research agent: {e} at: {traceback.format_exc()}")
+        return JSONResponse(content={"error": str(e)}, status_code=500)
+
+    async def stream():
+        yield format_sse(first["event"], first["data"])
+        try:
+            async for event in events:
+                yield format_sse(event["event"], event["data"])
+        except Exception as e:
+            logger.error(f"Error in research stream: {e} at: {traceback.format_exc()}")
+            yield format_sse("error", {"error": str(e)})
+        finally:
+            # Closes the provider stream right away when the client disconnects
+            await events.aclose()
+            admission.release()
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        # Also frees the slot if the client disconnects before the stream is iterated
+        background=BackgroundTask(admission.release)
+    )
+
 async def resource_agent(request: ResourceRequest):
     """
     Handle incoming research queries and return the generated response.
@@ -48,32 +157,156 @@ async def resource_agent(request: ResourceRequest):
 
     logger.info(f"Resource Controller processing resource data from {pdf_path}")
     try:
-        result = process_document(pdf_path, provider, selected_model)
-        return JSONResponse(content={"result": result}, status_code=200)
+        admission = await admit("resource", provider)
+        try:
+            result = await process_document(pdf_path, provider, selected_model, request.cache_mode)
+        finally:
+            admission.release()
+        with span("serialize"):
+            return JSONResponse(content={"result": result}, status_code=200)
+    except UNAVAILABLE_ERRORS as e:
+        return provider_unavailable_response(e)
+    except Exception as e:
+        logger.error(f"Error in resource agent: {e} at: {traceback.format_exc()}")
+        return JSONResponse(content={"error": str(e)}, status_code=500)
+
+async def upload_resource_agent(request: Request):
+    """
+    Handle a multipart PDF upload and return the generated document summary.
+
+    The PDF is streamed to a temporary file (field `file`) while it is hashed and size-checked,
+    then fed to the same pipeline as `resource_agent`. Optional form fields: `provider`,
+    `selected_model` and `cache_mode`.
+
+    Args:
+        request (Request): The raw multipart/form-data request.
+
+    Returns:
+        JSONResponse: A JSON response containing either the document summary or an error message.
+    """
+    try:
+        upload = await stream_pdf_upload(request, max_bytes=upload_max_bytes())
+    except UploadTooLargeError as e:
+        return JSONResponse(content={"error": str(e)}, status_code=413)
+    except InvalidUploadError as e:
+        return JSONResponse(content={"error": str(e)}, status_code=400)
+
+    logger.info(f"Resource Controller processing uploaded resource {upload.filename} ({upload.size} bytes, sha256 {upload.sha256})")
+    handed_off = False
+    try:
+        cache_mode = CacheMode(upload.fields.get("cache_mode", CacheMode.USE.value))
+        # Admitted once the upload is spooled, so slow clients don't hold a slot
+        admission = await admit("resource", upload.fields.get("provider"))
+        try:
+            # The spooled file may back an extraction shared with identical uploads, so
+            # process_document owns it from here and removes it once nobody reads it
+            handed_off = True
+            result = await process_document(
+                upload.path,
+                upload.fields.get("provider"),
+                upload.fields.get("selected_model"),
+                cache_mode,
+                content_hash=upload.sha256,
+                cleanup=upload.cleanup
+            )
+        finally:
+            admission.release()
+        with span("serialize"):
+            return JSONResponse(content={"result": result}, status_code=200)
+    except UNAVAILABLE_ERRORS as e:
+        return provider_unavailable_response(e)
     except Exception as e:
         logger.error(f"Error in resource agent: {e} at: {traceback.format_exc()}")
         return JSONResponse(content={"error": str(e)}, status_code=500)
+    finally:
+        if not handed_off:
+            upload.cleanup()
+
+async def pipeline_agent(request: PipelineRequest):
+    """
+    Run the resource, reference and audio agents over one PDF as a DAG, extracting it only once.
+
+    Args:
+        request (PipelineRequest): Request object with the PDF path, the stages to run, provider, and model selection.
+
+    Returns:
+        JSONResponse: The result of every stage that succeeded and the status and timings of every stage,
+        or an error if no agent stage succeeded.
+    """
+    logger.info(f"Pipeline Controller processing {request.pdf_path}")
+    try:
+        resolve_stages(request.stages)
+    except ValueError as e:
+        return JSONResponse(content={"error": str(e)}, status_code=400)
+
+    try:
+        admission = await admit("pipeline", request.provider)
+        try:
+            outcomes = await run_pipeline(
+                request.pdf_path,
+                request.provider,
+                request.selected_model,
+                request.cache_mode,
+                stages=request.stages,
+                audio_model=request.audio_model
+            )
+        finally:
+            admission.release()
+    except UNAVAILABLE_ERRORS as e:
+        return provider_unavailable_response(e)
+    except Exception as e:
+        logger.error(f"Error in pipeline: {e} at: {traceback.format_exc()}")
+        return JSONResponse(content={"error": str(e)}, status_code=500)
+
+    stages = {name: outcome.to_dict() for name, outcome in outcomes.items()}
+    results = {name: outcome.result for name, outcome in outcomes.items() if name != "extract" and outcome.succeeded}
+    if not results:
+        error = next((outcome.error for outcome in outcomes.values() if outcome.error is not None), None)
+        if isinstance(error, UNAVAILABLE_ERRORS):
+            return provider_unavailable_response(error)
+        return JSONResponse(content={"error": str(error), "stages": stages}, status_code=500)
+
+    with span("serialize"):
+        return JSONResponse(content={"result": results, "stages": stages}, status_code=200)
 
 async def reference_agent(request: ReferenceScouterRequest):
     """
-    Extract and encapsulate reference hyperlinks from a provided PDF document.
+    Collect the references of a PDF document (and/or the given links), fetch them and summarize them for the document.
 
     Args:
-        request (ReferenceScouterRequest): Request object with PDF path, provider, and model selection.
+        request (ReferenceScouterRequest): Request object with the PDF path and/or reference links, provider, and model selection.
 
     Returns:
-        JSONResponse: A JSON response with the extracted reference data or an error message.
+        JSONResponse: The links, the fetch outcome of each and the encapsulated references, or an error message.
     """
-    pdf_path = request.pdf_path
-    provider = request.provider #noqa
-    selected_model = request.selected_model #noqa
+    if not request.pdf_path and not request.references:
+        return JSONResponse(content={"error": "Provide a pdf_path, references, or both"}, status_code=400)
 
-    logger.info(f"Reference Controller processing resource references from {pdf_path}")
+    logger.info(f"Reference Controller processing resource references from {request.pdf_path or 'the request'}")
     try:
-        reference_content = source_reference_content(path = pdf_path)
-        reference_metadata = encapsulate_references(hyperlink_content = reference_content) #noqa
+        admission = await admit("reference", request.provider)
+        try:
+            hyperlinks, pdf_content = {}, ""
+            if request.pdf_path:
+                # PyMuPDF is synchronous, keep it off the event loop
+                extracted = await asyncio.to_thread(PDFProcessor(pdf_path = request.pdf_path).extract_text_and_images)
+                hyperlinks, pdf_content = collect_references(extracted["pages"]), extracted["text"]
+            for link in request.references or []:
+                hyperlinks.setdefault(link, "Provided with the request")
 
-        return JSONResponse(content={"result": ""}, status_code=200)
+            result = await scout_references(
+                hyperlinks,
+                pdf_content,
+                os.getenv("PROVIDER", "openai") if request.provider is None else request.provider,
+                os.getenv("SELECTED_MODEL", "gpt-4o-mini") if request.selected_model is None else request.selected_model,
+                request.cache_mode
+            )
+        finally:
+            admission.release()
+        with span("serialize"):
+            return JSONResponse(content={"result": result}, status_code=200)
+    except UNAVAILABLE_ERRORS as e:
+        return provider_unavailable_response(e)
     except Exception as e:
-        logger.error(f"Error in resource agent: {e} at: {traceback.format_exc()}")
-        return JSONResponse(content={"error": str(e)}, status_code=500)
\ No newline at end of file
+        logger.error(f"Error in reference agent: {e} at: {traceback.format_exc()}")
+        return JSONResponse(content={"error": str(e)}, status_code=500)
@@ -0,0 +1,104 @@
+from typing import Optional
+from fastapi.responses import JSONResponse
+from helpers.tracing import trace_buffer
+from providers.retry import circuit_breakers, get_retry_budget
+from providers.rate_limit import get_rate_limiter
+from helpers.jobs import get_job_queue
+from helpers.admission import get_admission_controller
+from helpers.documents import get_document_store
+
+async def recent_traces(limit: int = 50, path: Optional[str] = None, min_ms: float = 0):
+    """
+    Return the most recent request traces from the in-memory ring buffer.
+
+    Args:
+        limit (int, optional): Maximum number of traces. Defaults to 50.
+        path (str, optional): Only traces of this request path, e.g. `/api/research`. Defaults to None.
+        min_ms (float, optional): Only requests that took at least this many milliseconds. Defaults to 0.
+
+    Returns:
+        JSONResponse: The matching traces, newest first, each with its per-stage spans.
+    """
+    return JSONResponse(content={"traces": trace_buffer.recent(limit, path, min_ms)}, status_code=200)
+
+async def trace_summary(path: Optional[str] = None):
+    """
+    Summarize the buffered traces as p50/p95/p99 latency per path and stage.
+
+    Args:
+        path (str, optional): Only summarize this request path. Defaults to None.
+
+    Returns:
+        JSONResponse: {path: {stage: {count, p50, p95, p99}}} in milliseconds.
+    """
+    return JSONResponse(content={"summary": trace_buffer.summary(path)}, status_code=200)
+
+async def circuit_states():
+    """
+    Report the state of every provider circuit breaker and the retry budget of this worker.
+
+    Returns:
+        JSONResponse: {"circuits": [...], "retry_budget": {...}}
+    """
+    return JSONResponse(content={
+        "circuits": [breaker.snapshot() for breaker in circuit_breakers()],
+        "retry_budget": get_retry_budget().stats(),
+    }, status_code=200)
+
+async def reset_circuit(name: str):
+    """
+    Close a circuit breaker by hand, e.g. once a provider incident is resolved.
+
+    Args:
+        name (str): The breaker name as reported by `circuit_states`, e.g. `OpenAIProvider:gpt-4o-mini`.
+
+    Returns:
+        JSONResponse: The breaker's new state, or 404 if no such breaker exists.
+    """
+    for breaker in circuit_breakers():
+        if breaker.name == name:
+            breaker.reset()
+            return JSONResponse(content=breaker.snapshot(), status_code=200)
+    return JSONResponse(content={"error": f"No circuit breaker named {name}"}, status_code=404)
+
+async def rate_limit_stats():
+    """
+    Report the configured provider rate limits and how often this worker queued for them.
+
+    Returns:
+        JSONResponse: The limiter's backend, limits and wait counters, or `{"enabled": false}`.
+    """
+    limiter = get_rate_limiter()
+    if limiter is None:
+        return JSONResponse(content={"enabled": False}, status_code=200)
+    return JSONResponse(content={"enabled": True, **limiter.stats()}, status_code=200)
+
+async def job_queue_stats():
+    """
+    Report the background job queue of this worker.
+
+    Returns:
+        JSONResponse: Worker count, queue depth and capacity, running jobs and the job store backend.
+    """
+    return JSONResponse(content=get_job_queue().stats(), status_code=200)
+
+async def admission_stats():
+    """
+    Report the admission gates of this worker: limits, slots in use, queue depth, wait times and rejections.
+
+    Returns:
+        JSONResponse: {"gates": [...]}, or `{"enabled": false}`.
+    """
+    controller = get_admission_controller()
+    if controller is None:
+        return JSONResponse(content={"enabled": False}, status_code=200)
+    return JSONResponse(content={"gates": controller.stats()}, status_code=200)
+
+async def document_store_stats():
+    """
+    Report the document store of this worker: hot set size and memory/disk hit, miss and ingest counts.
+
+    Returns:
+        JSONResponse: The store's counters.
+    """
+    return JSONResponse(content=get_document_store().stats(), status_code=200)
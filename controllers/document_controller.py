@@ -0,0 +1,95 @@
+from helpers.loggers import get_logger
+from models.requests import DocumentRequest
+from fastapi import Request
+from fastapi.responses import JSONResponse, Response
+from helpers.uploads import stream_pdf_upload, UploadTooLargeError, InvalidUploadError
+from helpers.documents import get_document_store
+from services.document_service import ingest_text_document, ingest_pdf_document
+from controllers.agent_controller import upload_max_bytes
+import asyncio
+import traceback
+
+logger = get_logger()
+
+async def create_document(request: DocumentRequest):
+    """
+    Store a document once, so research requests can send its `doc_id` instead of the text.
+
+    Args:
+        request (DocumentRequest): Either the `text` or the `pdf_path` of the document, and an optional `title`.
+
+    Returns:
+        JSONResponse: 201 with the document id and metadata, or an error.
+    """
+    if (request.text is None) == (request.pdf_path is None):
+        return JSONResponse(content={"error": "Provide exactly one of 'text' or 'pdf_path'"}, status_code=400)
+    try:
+        if request.text is not None:
+            document = await ingest_text_document(request.text, request.title)
+        else:
+            document = await ingest_pdf_document(request.pdf_path, request.title)
+        logger.info(f"Document Controller stored document {document.id} ({document.chars} chars)")
+        return JSONResponse(content=document.metadata(), status_code=201)
+    except ValueError as e:
+        return JSONResponse(content={"error": str(e)}, status_code=400)
+    except Exception as e:
+        logger.error(f"Error storing document: {e} at: {traceback.format_exc()}")
+        return JSONResponse(content={"error": str(e)}, status_code=500)
+
+async def upload_document(request: Request):
+    """
+    Store the text of a multipart PDF upload (field `file`, optional field `title`).
+
+    Args:
+        request (Request): The raw multipart/form-data request.
+
+    Returns:
+        JSONResponse: 201 with the document id and metadata, or an error.
+    """
+    try:
+        upload = await stream_pdf_upload(request, max_bytes=upload_max_bytes())
+    except UploadTooLargeError as e:
+        return JSONResponse(content={"error": str(e)}, status_code=413)
+    except InvalidUploadError as e:
+        return JSONResponse(content={"error": str(e)}, status_code=400)
+
+    try:
+        document = await ingest_pdf_document(upload.path, upload.fields.get("title") or upload.filename, content_hash=upload.sha256)
+        logger.info(f"Document Controller stored uploaded document {document.id} ({document.chars} chars)")
+        return JSONResponse(content=document.metadata(), status_code=201)
+    except ValueError as e:
+        return JSONResponse(content={"error": str(e)}, status_code=400)
+    except Exception as e:
+        logger.error(f"Error storing uploaded document: {e} at: {traceback.format_exc()}")
+        return JSONResponse(content={"error": str(e)}, status_code=500)
+    finally:
+        upload.cleanup()
+
+async def document_metadata(doc_id: str):
+    """
+    Return the metadata of a stored document, without its text.
+
+    Args:
+        doc_id (str): The document id.
+
+    Returns:
+        JSONResponse: The metadata, or 404 if the document is unknown or was evicted.
+    """
+    document = await asyncio.to_thread(get_document_store().metadata, doc_id)
+    if document is None:
+        return JSONResponse(content={"error": f"Unknown document id: {doc_id}"}, status_code=404)
+    return JSONResponse(content=document.metadata(), status_code=200)
+
+async def delete_document(doc_id: str):
+    """
+    Remove a stored document.
+
+    Args:
+        doc_id (str): The document id.
+
+    Returns:
+        Response: 204, or 404 if the document is unknown.
+    """
+    if not await asyncio.to_thread(get_document_store().delete, doc_id):
+        return JSONResponse(content={"error": f"Unknown document id: {doc_id}"}, status_code=404)
+    return Response(status_code=204)
@@ -0,0 +1,127 @@
+from helpers.loggers import get_logger
+from models.requests import ResourceRequest
+from fastapi import Request
+from fastapi.responses import JSONResponse
+from helpers.uploads import stream_pdf_upload, UploadTooLargeError, InvalidUploadError
+from helpers.jobs import get_job_queue, Job, JobQueueFullError
+from enums.cache_mode import CacheMode
+from enums.job_status import JobStatus
+from services.job_service import submit_resource_job
+from controllers.agent_controller import upload_max_bytes
+import traceback
+
+logger = get_logger()
+
+# Failures caused by the provider being unavailable keep the status the synchronous endpoint would have used
+_FAILURE_STATUS = {
+    "CircuitOpenError": 503,
+    "RateLimitTimeoutError": 429,
+    "TimeoutError": 504,
+}
+
+def accepted_response(job: Job) -> JSONResponse:
+    status_url = f"/api/jobs/{job.id}"
+    return JSONResponse(
+        content={**job.to_dict(), "status_url": status_url, "result_url": f"{status_url}/result"},
+        status_code=202,
+        headers={"Location": status_url}
+    )
+
+def queue_full_response(error: JobQueueFullError) -> JSONResponse:
+    logger.warning(f"Job rejected: {error}")
+    return JSONResponse(
+        content={"error": f"The job queue is full: {error}"},
+        status_code=429,
+        headers={"Retry-After": str(max(1, round(error.retry_after)))}
+    )
+
+async def submit_resource_job_agent(request: ResourceRequest):
+    """
+    Queue a PDF for summarization and return immediately with the job id.
+
+    Args:
+        request (ResourceRequest): Request object with the PDF path, provider, and model selection.
+
+    Returns:
+        JSONResponse: 202 with the job id and its status and result URLs, 429 if the queue is full.
+    """
+    try:
+        job = await submit_resource_job(request.pdf_path, request.provider, request.selected_model, request.cache_mode)
+        return accepted_response(job)
+    except JobQueueFullError as e:
+        return queue_full_response(e)
+    except Exception as e:
+        logger.error(f"Error submitting resource job: {e} at: {traceback.format_exc()}")
+        return JSONResponse(content={"error": str(e)}, status_code=500)
+
+async def submit_upload_resource_job_agent(request: Request):
+    """
+    Spool a multipart PDF upload (field `file`) and queue it for summarization. The spooled file is
+    removed once the job finishes. Optional form fields: `provider`, `selected_model` and `cache_mode`.
+
+    Args:
+        request (Request): The raw multipart/form-data request.
+
+    Returns:
+        JSONResponse: 202 with the job id and its status and result URLs, or an error.
+    """
+    try:
+        upload = await stream_pdf_upload(request, max_bytes=upload_max_bytes())
+    except UploadTooLargeError as e:
+        return JSONResponse(content={"error": str(e)}, status_code=413)
+    except InvalidUploadError as e:
+        return JSONResponse(content={"error": str(e)}, status_code=400)
+
+    try:
+        job = await submit_resource_job(
+            upload.path,
+            upload.fields.get("provider"),
+            upload.fields.get("selected_model"),
+            CacheMode(upload.fields.get("cache_mode", CacheMode.USE.value)),
+            content_hash=upload.sha256,
+            cleanup=True
+        )
+        return accepted_response(job)
+    except JobQueueFullError as e:
+        upload.cleanup()
+        return queue_full_response(e)
+    except Exception as e:
+        upload.cleanup()
+        logger.error(f"Error submitting resource job: {e} at: {traceback.format_exc()}")
+        return JSONResponse(content={"error": str(e)}, status_code=500)
+
+async def job_status(job_id: str):
+    """
+    Report a job's status without its result.
+
+    Args:
+        job_id (str): The id returned on submission.
+
+    Returns:
+        JSONResponse: The job's status and timestamps (and error once failed), or 404.
+    """
+    job = await get_job_queue().get(job_id)
+    if job is None:
+        return JSONResponse(content={"error": f"No job {job_id}"}, status_code=404)
+    return JSONResponse(content=job.to_dict(), status_code=200)
+
+async def job_result(job_id: str):
+    """
+    Fetch a job's result.
+
+    Args:
+        job_id (str): The id returned on submission.
+
+    Returns:
+        JSONResponse: 200 with the result once succeeded, 202 with Retry-After while queued or running,
+        the failure's status (500, or 429/503/504 when the provider was unavailable) once failed, or 404.
+    """
+    job = await get_job_queue().get(job_id)
+    if job is None:
+        return JSONResponse(content={"error": f"No job {job_id}"}, status_code=404)
+    if job.status == JobStatus.SUCCEEDED:
+        return JSONResponse(content={"result": job.result}, status_code=200)
+    if job.status == JobStatus.FAILED:
+        headers = {"Retry-After": str(max(1, round(job.retry_after)))} if job.retry_after else None
+        return JSONResponse(content={"error": job.error, "error_type": job.error_type}, status_code=_FAILURE_STATUS.get(job.error_type, 500), headers=headers)
+    return JSONResponse(content=job.to_dict(), status_code=202, headers={"Retry-After": "2"})
@@ -0,0 +1,19 @@
+import asyncio
+from fastapi.responses import PlainTextResponse
+from helpers.metrics import get_registry
+from providers.metrics import get_llm_metrics
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+async def metrics():
+    """
+    Serve the metrics of all workers in the Prometheus text exposition format.
+
+    Returns:
+        PlainTextResponse: Token usage, latency histograms, retries, context-length failures,
+        in-flight calls and response cache stats, merged across uvicorn workers.
+    """
+    # Register the provider families so they are exported even before the first call
+    get_llm_metrics()
+    body = await asyncio.to_thread(get_registry().render)
+    return PlainTextResponse(content=body, media_type=PROMETHEUS_CONTENT_TYPE)
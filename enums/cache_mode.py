@@ -0,0 +1,13 @@
+from enum import Enum
+
+class CacheMode(str, Enum):
+    """
+    Per-request control over the LLM response cache.
+
+    - USE: serve from the cache when possible and store fresh responses.
+    - BYPASS: skip the cache entirely, neither reading nor writing.
+    - REFRESH: skip the lookup but overwrite the cached entry with the fresh response.
+    """
+    USE = "use"
+    BYPASS = "bypass"
+    REFRESH = "refresh"
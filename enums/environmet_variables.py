@@ -7,7 +7,6 @@ load_dotenv(override=True)
 class EnvironmentVariables(Enum):
     OPENAI_API_KEY = "OPENAI_API_KEY"
     WORKERS = "WORKERS"
-    LLM_RETRY_DELAY = "LLM_RETRY_DELAY"
     SELECTED_MODEL = "SELECTED_MODEL"
     PROVIDER = "PROVIDER"
     REFERENCE_PATTERN = "REFERENCE_PATTERN"
@@ -0,0 +1,19 @@
+from enum import Enum
+
+class JobStatus(str, Enum):
+    """
+    Lifecycle of a background job.
+
+    - QUEUED: accepted and waiting for a worker.
+    - RUNNING: a worker is processing it.
+    - SUCCEEDED: finished, the result can be fetched.
+    - FAILED: finished with an error (including timeouts and server shutdown).
+    """
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+    @property
+    def finished(self) -> bool:
+        return self in (JobStatus.SUCCEEDED, JobStatus.FAILED)
@@ -0,0 +1,288 @@
+import asyncio
+import json
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Dict, List, Optional
+from helpers.loggers import get_logger
+from helpers.metrics import get_registry
+from helpers.tracing import span
+
+logger = get_logger()
+
+
+class AdmissionRejectedError(Exception):
+    """Raised when a request can't be admitted: its gate's wait queue is full or its queue-time deadline passed."""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+@dataclass(frozen=True)
+class GateLimit:
+    """
+    Attributes:
+        concurrency (int): Requests admitted at once.
+        queue (int): Requests allowed to wait for a slot; beyond that they are rejected immediately.
+        max_wait (float): Seconds a request may wait for a slot before it is rejected.
+    """
+    concurrency: int = 64
+    queue: int = 128
+    max_wait: float = 10.0
+
+
+class AdmissionGate:
+    """
+    A concurrency limit with a short, bounded FIFO wait queue.
+
+    A released slot is handed straight to the oldest waiter, so newcomers can't overtake the queue.
+    Gates are per process and only used from the event loop, so no locking is needed.
+    """
+
+    def __init__(self, name: str, limit: GateLimit):
+        self.name = name
+        self.limit = limit
+        self._active = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._waits: Deque[float] = deque(maxlen=512)
+        self._holds: Deque[float] = deque(maxlen=512)
+        self._admitted = 0
+        self._rejected = {"queue_full": 0, "deadline": 0}
+
+    @property
+    def active(self) -> int:
+        return self._active
+
+    @property
+    def queued(self) -> int:
+        return sum(1 for waiter in self._waiters if not waiter.done())
+
+    def retry_after_hint(self) -> float:
+        """Rough seconds until a slot frees up for a new request, from recent hold times."""
+        hold = sum(self._holds) / len(self._holds) if self._holds else 1.0
+        return min(60.0, max(1.0, hold * (self.queued + 1) / self.limit.concurrency))
+
+    def _reject(self, reason: str, detail: str) -> AdmissionRejectedError:
+        self._rejected[reason] += 1
+        return AdmissionRejectedError(f"{self.name} is at capacity: {detail}", retry_after=self.retry_after_hint())
+
+    async def acquire(self) -> float:
+        """
+        Take a slot, waiting up to `max_wait` in the queue.
+
+        Returns:
+            float: Seconds spent waiting.
+
+        Raises:
+            AdmissionRejectedError: If the queue is full or the wait exceeded `max_wait`.
+        """
+        if self._active < self.limit.concurrency and not self.queued:
+            self._active += 1
+            self._admitted += 1
+            self._waits.append(0.0)
+            return 0.0
+        if self.queued >= self.limit.queue:
+            raise self._reject("queue_full", f"{self.queued} requests already waiting")
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append(future)
+        start = time.monotonic()
+        try:
+            await asyncio.wait_for(future, self.limit.max_wait)
+        except BaseException as e:
+            if future.done() and not future.cancelled():
+                # The slot was handed over just as we gave up, pass it on
+                self.release()
+            else:
+                try:
+                    self._waiters.remove(future)
+                except ValueError:
+                    pass
+            if isinstance(e, asyncio.TimeoutError):
+                raise self._reject("deadline", f"no slot within {self.limit.max_wait:g}s") from None
+            raise
+        waited = time.monotonic() - start
+        self._admitted += 1
+        self._waits.append(waited)
+        return waited
+
+    def release(self, held: Optional[float] = None) -> None:
+        """
+        Give a slot back, handing it to the oldest waiter if there is one.
+
+        Args:
+            held (float, optional): Seconds the slot was held, used for Retry-After hints. Defaults to None.
+        """
+        if held is not None:
+            self._holds.append(held)
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self._active -= 1
+
+    def stats(self) -> Dict[str, object]:
+        waits = sorted(self._waits)
+
+        def percentile(percent: float) -> float:
+            return round(waits[min(len(waits) - 1, int(len(waits) * percent / 100))] * 1000, 1) if waits else 0.0
+
+        return {
+            "name": self.name,
+            "concurrency": self.limit.concurrency,
+            "max_queue": self.limit.queue,
+            "max_wait": self.limit.max_wait,
+            "active": self._active,
+            "queued": self.queued,
+            "admitted": self._admitted,
+            "rejected": dict(self._rejected),
+            "wait_ms": {"p50": percentile(50), "p95": percentile(95), "p99": percentile(99)},
+        }
+
+
+class Admission:
+    """The slots one request holds; `release` returns them (safe to call more than once)."""
+
+    def __init__(self, gates: List[AdmissionGate]):
+        self.gates = gates
+        self.admitted_at = time.monotonic()
+
+    def release(self) -> None:
+        held = time.monotonic() - self.admitted_at
+        gates, self.gates = self.gates, []
+        for gate in reversed(gates):
+            gate.release(held)
+
+
+class AdmissionController:
+    """
+    The gates of this worker, keyed "endpoint:<name>" and "provider:<name>", created on first use.
+
+    Limits are looked up by exact key, then "endpoint:*" / "provider:*", then the default.
+    """
+
+    def __init__(self, limits: Dict[str, GateLimit], default: GateLimit = GateLimit()):
+        self.limits = limits
+        self.default = default
+        self._gates: Dict[str, AdmissionGate] = {}
+
+        registry = get_registry()
+        self._active = registry.gauge("admission_active", "Requests holding a slot of an admission gate.", ("gate",))
+        self._queued = registry.gauge("admission_queued", "Requests waiting for a slot of an admission gate.", ("gate",))
+        self._admitted = registry.counter("admission_admitted_total", "Requests admitted by an admission gate.", ("gate",))
+        self._rejections = registry.counter("admission_rejections_total", "Requests shed by an admission gate, by reason.", ("gate", "reason"))
+        self._wait = registry.histogram("admission_wait_seconds", "Time requests waited for an admission slot.", ("gate",))
+        registry.register_collector(self._collect)
+
+    def _collect(self) -> None:
+        for gate in list(self._gates.values()):
+            stats = gate.stats()
+            self._active.set(stats["active"], gate=gate.name)
+            self._queued.set(stats["queued"], gate=gate.name)
+            self._admitted.set_total(stats["admitted"], gate=gate.name)
+            for reason, count in stats["rejected"].items():
+                self._rejections.set_total(count, gate=gate.name, reason=reason)
+
+    def limit_for(self, key: str) -> GateLimit:
+        kind = key.split(":", 1)[0]
+        return self.limits.get(key) or self.limits.get(f"{kind}:*") or self.default
+
+    def gate(self, key: str) -> AdmissionGate:
+        if key not in self._gates:
+            self._gates[key] = AdmissionGate(key, self.limit_for(key))
+        return self._gates[key]
+
+    async def admit(self, endpoint: str, provider: str) -> Admission:
+        """
+        Take a slot of the endpoint's gate, then of the provider's.
+
+        Args:
+            endpoint (str): The endpoint name, e.g. "research".
+            provider (str): The provider the request will call, e.g. "openai".
+
+        Returns:
+            Admission: The held slots, to be released once the request is done.
+
+        Raises:
+            AdmissionRejectedError: If either gate sheds the request.
+        """
+        admission = Admission([])
+        try:
+            with span("admission_wait"):
+                for key in (f"endpoint:{endpoint}", f"provider:{provider}"):
+                    gate = self.gate(key)
+                    waited = await gate.acquire()
+                    admission.gates.append(gate)
+                    self._wait.observe(waited, gate=key)
+        except BaseException:
+            admission.release()
+            raise
+        admission.admitted_at = time.monotonic()
+        return admission
+
+    def stats(self) -> List[Dict[str, object]]:
+        return [gate.stats() for gate in self._gates.values()]
+
+
+def parse_gate_limits(raw: str) -> Dict[str, GateLimit]:
+    """
+    Parse `ADMISSION_LIMITS`, e.g. `{"endpoint:resource": {"concurrency": 8, "queue": 16, "max_wait": 5}, "provider:*": {"concurrency": 32}}`.
+    """
+    return {key: GateLimit(**value) for key, value in json.loads(raw).items()}
+
+
+_admission_controller: Optional[AdmissionController] = None
+_admission_controller_lock = threading.Lock()
+
+
+def get_admission_controller() -> Optional[AdmissionController]:
+    """
+    Get the process-wide admission controller, configured from the environment on first use.
+
+    Environment:
+        ADMISSION_ENABLED: "false" admits every request without limits. Defaults to "true".
+        ADMISSION_LIMITS: JSON gate limits by key (see `parse_gate_limits`).
+        ADMISSION_CONCURRENCY, ADMISSION_QUEUE, ADMISSION_MAX_WAIT: Limits of gates without an entry
+            in ADMISSION_LIMITS. Default to 64, 128 and 10 seconds.
+
+    Returns:
+        AdmissionController | None: The controller, or None when admission control is disabled.
+    """
+    global _admission_controller
+    if os.getenv("ADMISSION_ENABLED", "true").lower() == "false":
+        return None
+    if _admission_controller is None:
+        with _admission_controller_lock:
+            if _admission_controller is None:
+                default = GateLimit(
+                    concurrency=int(os.getenv("ADMISSION_CONCURRENCY", 64)),
+                    queue=int(os.getenv("ADMISSION_QUEUE", 128)),
+                    max_wait=float(os.getenv("ADMISSION_MAX_WAIT", 10)),
+                )
+                _admission_controller = AdmissionController(parse_gate_limits(os.getenv("ADMISSION_LIMITS") or "{}"), default)
+    return _admission_controller
+
+
+async def admit(endpoint: str, provider: Optional[str] = None) -> Admission:
+    """
+    Admit a request to an LLM-bound endpoint, or shed it when the endpoint or provider is saturated.
+
+    Args:
+        endpoint (str): The endpoint name, e.g. "research".
+        provider (str, optional): The requested provider. Defaults to the `PROVIDER` environment variable or 'openai'.
+
+    Returns:
+        Admission: The held slots; call `release()` when the request is done.
+
+    Raises:
+        AdmissionRejectedError: If the request was shed, with a Retry-After hint.
+    """
+    controller = get_admission_controller()
+    if controller is None:
+        return Admission([])
+    provider = os.getenv("PROVIDER", "openai") if provider is None else provider
+    return await controller.admit(endpoint, provider)
@@ -0,0 +1,85 @@
+import math
+import re
+from typing import List
+
+try:
+    import tiktoken
+    _encoding = tiktoken.get_encoding("o200k_base")
+except Exception:  # tiktoken is optional, fall back to a character heuristic
+    _encoding = None
+
+# Rough characters-per-token ratio for English prose, used when tiktoken isn't installed.
+# Deliberately on the low side so the estimate errs towards smaller chunks.
+CHARS_PER_TOKEN = 3.5
+
+_SECTION_BREAK = re.compile(r"\n\s*\n")
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate how many tokens `text` will use in a prompt.
+
+    Args:
+        text (str): The text to measure.
+
+    Returns:
+        int: The exact count when tiktoken is available, otherwise a conservative estimate.
+    """
+    if not text:
+        return 0
+    if _encoding is not None:
+        return len(_encoding.encode(text, disallowed_special=()))
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def _split_oversized(text: str, token_budget: int) -> List[str]:
+    """
+    Split a single block that exceeds the budget, preferring section (blank line) boundaries,
+    then line boundaries, and only cutting mid-line as a last resort.
+    """
+    for separator in (_SECTION_BREAK, re.compile(r"\n")):
+        pieces = [piece for piece in separator.split(text) if piece.strip()]
+        if len(pieces) > 1:
+            return pack_blocks(pieces, token_budget, joiner="\n\n" if separator is _SECTION_BREAK else "\n")
+
+    max_chars = max(1, int(token_budget * CHARS_PER_TOKEN))
+    return [text[i:i + max_chars] for i in range(0, len(text), max_chars)]
+
+
+def pack_blocks(blocks: List[str], token_budget: int, joiner: str = "\n") -> List[str]:
+    """
+    Greedily pack consecutive blocks (e.g. pages) into chunks that each fit the token budget.
+
+    Block boundaries are kept intact whenever possible; a block that is larger than the
+    budget by itself is split on its own section and line boundaries.
+
+    Args:
+        blocks (List[str]): The ordered blocks of text.
+        token_budget (int): Maximum estimated tokens per chunk.
+        joiner (str, optional): Separator placed between blocks in a chunk. Defaults to "\\n".
+
+    Returns:
+        List[str]: The chunks, in document order.
+    """
+    chunks: List[str] = []
+    current: List[str] = []
+    current_tokens = 0
+    joiner_tokens = estimate_tokens(joiner)
+
+    for block in blocks:
+        block_tokens = estimate_tokens(block)
+        if block_tokens > token_budget:
+            if current:
+                chunks.append(joiner.join(current))
+                current, current_tokens = [], 0
+            chunks.extend(_split_oversized(block, token_budget))
+            continue
+        if current and current_tokens + joiner_tokens + block_tokens > token_budget:
+            chunks.append(joiner.join(current))
+            current, current_tokens = [], 0
+        current.append(block)
+        current_tokens += block_tokens + (joiner_tokens if len(current) > 1 else 0)
+
+    if current:
+        chunks.append(joiner.join(current))
+    return chunks
@@ -0,0 +1,320 @@
+import hashlib
+import json
+import os
+import re
+import struct
+import tempfile
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+from unicodedata import normalize
+
+# Bump whenever normalize_text or the entry layout changes; entries written by another version are discarded
+DOCUMENT_FORMAT_VERSION = 1
+
+_MAGIC = b"RBDS"
+_PREAMBLE = struct.Struct("<4sII")  # magic, format version, header length
+_DOC_ID = re.compile(r"^[0-9a-f]{64}$")
+
+
+class DocumentNotFoundError(Exception):
+    """Raised when a request references a document id the store doesn't have (never ingested or evicted)."""
+    pass
+
+
+class NormalizedText(str):
+    """
+    Text that already went through `normalize_text`, so prompt building can use it as is.
+
+    Attributes:
+        digest (str | None): SHA-256 of the text when known (the document id), a cheap identity for keys.
+    """
+
+    def __new__(cls, value: str, digest: Optional[str] = None):
+        text = super().__new__(cls, value)
+        text.digest = digest
+        return text
+
+
+def normalize_text(value) -> NormalizedText:
+    """
+    Normalize a prompt value to NFKC and drop what can't be encoded as ASCII, so no
+    Unicode/encoding errors reach the provider. Already normalized text is returned untouched.
+
+    Args:
+        value: The value, converted with `str()` first.
+
+    Returns:
+        NormalizedText: The normalized text.
+    """
+    if isinstance(value, NormalizedText):
+        return value
+    return NormalizedText(normalize('NFKC', str(value)).encode('ascii', 'ignore').decode('ascii'))
+
+
+def is_document_id(doc_id: str) -> bool:
+    return bool(_DOC_ID.match(doc_id or ""))
+
+
+@dataclass
+class StoredDocument:
+    """
+    A document of the store.
+
+    Attributes:
+        id (str): SHA-256 of the normalized text.
+        source (str): How it was ingested, "text" or "pdf".
+        title (str | None): Client supplied title or file name.
+        chars (int): Length of the normalized text.
+        pages (int | None): Page count for PDFs.
+        created_at (float): When it was first ingested (epoch seconds).
+        text (NormalizedText | None): The normalized text, None when only the metadata was read.
+    """
+    id: str
+    source: str
+    title: Optional[str]
+    chars: int
+    pages: Optional[int]
+    created_at: float
+    text: Optional[NormalizedText] = None
+
+    def metadata(self) -> Dict[str, object]:
+        return {
+            "doc_id": self.id,
+            "source": self.source,
+            "title": self.title,
+            "chars": self.chars,
+            "pages": self.pages,
+            "created_at": self.created_at,
+        }
+
+
+class DocumentStore:
+    """
+    Content-addressed store of normalized document text.
+
+    Each document is one file named after its id, laid out as a small fixed preamble (magic,
+    format version, header length), a JSON header with the metadata, and the zlib-compressed
+    ASCII text. Recently used texts are kept decompressed in a hot set bounded by
+    `memory_bytes`; the files are bounded by `max_bytes`, least recently used first.
+    """
+
+    def __init__(self, directory: str, max_bytes: int, memory_bytes: int, compression_level: int = 6):
+        """
+        Args:
+            directory (str): Where documents are stored.
+            max_bytes (int): Total size the files may use before the least recently used are evicted.
+            memory_bytes (int): Size of the in-memory hot set of decompressed texts.
+            compression_level (int, optional): zlib level, 1 (fastest) to 9 (smallest). Defaults to 6.
+        """
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.memory_bytes = memory_bytes
+        self.compression_level = compression_level
+        self._hot: "OrderedDict[str, StoredDocument]" = OrderedDict()
+        self._hot_bytes = 0
+        self._lock = threading.Lock()
+        self._counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "ingested": 0, "deduplicated": 0}
+
+    def _entry_path(self, doc_id: str) -> Path:
+        return self.directory / f"{doc_id}.rbd"
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._counters[name] += 1
+
+    def _remember(self, document: StoredDocument) -> None:
+        # Normalized text is ASCII, so its length is its size
+        if document.chars > self.memory_bytes:
+            return
+        with self._lock:
+            if document.id in self._hot:
+                self._hot.move_to_end(document.id)
+                return
+            self._hot[document.id] = document
+            self._hot_bytes += document.chars
+            while self._hot_bytes > self.memory_bytes:
+                _, evicted = self._hot.popitem(last=False)
+                self._hot_bytes -= evicted.chars
+
+    def _forget(self, doc_id: str) -> Optional[StoredDocument]:
+        with self._lock:
+            document = self._hot.pop(doc_id, None)
+            if document is not None:
+                self._hot_bytes -= document.chars
+        return document
+
+    def _read(self, doc_id: str, with_text: bool) -> Optional[StoredDocument]:
+        path = self._entry_path(doc_id)
+        try:
+            with open(path, "rb") as f:
+                magic, version, header_length = _PREAMBLE.unpack(f.read(_PREAMBLE.size))
+                if magic != _MAGIC or version != DOCUMENT_FORMAT_VERSION:
+                    raise ValueError(f"stale document entry (version {version})")
+                header = json.loads(f.read(header_length))
+                text = NormalizedText(zlib.decompress(f.read()).decode("ascii"), digest=doc_id) if with_text else None
+            # Refresh the mtime, which doubles as the LRU clock for eviction
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        except Exception:
+            path.unlink(missing_ok=True)
+            return None
+        return StoredDocument(id=doc_id, text=text, **header)
+
+    def _lookup(self, doc_id: str) -> Tuple[Optional[StoredDocument], Optional[str]]:
+        with self._lock:
+            document = self._hot.get(doc_id)
+            if document is not None:
+                self._hot.move_to_end(doc_id)
+                return document, "memory_hits"
+        document = self._read(doc_id, with_text=True)
+        if document is None:
+            return None, None
+        self._remember(document)
+        return document, "disk_hits"
+
+    def ingest(self, text: str, source: str = "text", title: Optional[str] = None, pages: Optional[int] = None) -> StoredDocument:
+        """
+        Normalize and store a document; ingesting the same content again returns the existing entry.
+
+        Args:
+            text (str): The document text.
+            source (str, optional): "text" or "pdf". Defaults to "text".
+            title (str, optional): A title or file name. Defaults to None.
+            pages (int, optional): Page count for PDFs. Defaults to None.
+
+        Returns:
+            StoredDocument: The stored document, with its content-hash id.
+        """
+        normalized = normalize_text(text)
+        doc_id = hashlib.sha256(normalized.encode("ascii")).hexdigest()
+        existing, _ = self._lookup(doc_id)
+        if existing is not None:
+            self._count("deduplicated")
+            return existing
+
+        document = StoredDocument(
+            id=doc_id, source=source, title=title, chars=len(normalized), pages=pages, created_at=time.time(),
+            text=NormalizedText(normalized, digest=doc_id),
+        )
+        header = json.dumps({key: value for key, value in document.metadata().items() if key != "doc_id"}, separators=(",", ":")).encode("utf-8")
+        compressed = zlib.compress(normalized.encode("ascii"), self.compression_level)
+
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(_PREAMBLE.pack(_MAGIC, DOCUMENT_FORMAT_VERSION, len(header)))
+                f.write(header)
+                f.write(compressed)
+            os.replace(tmp_path, self._entry_path(doc_id))
+        except Exception:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+        self._count("ingested")
+        self._remember(document)
+        self.evict()
+        return document
+
+    def get(self, doc_id: str) -> Optional[StoredDocument]:
+        """
+        Args:
+            doc_id (str): The document id.
+
+        Returns:
+            StoredDocument | None: The document with its text, from the hot set when possible, or None if unknown.
+        """
+        if not is_document_id(doc_id):
+            return None
+        document, source = self._lookup(doc_id)
+        self._count(source or "misses")
+        return document
+
+    def metadata(self, doc_id: str) -> Optional[StoredDocument]:
+        """
+        Like `get`, but only reads the header, without decompressing the text.
+        """
+        if not is_document_id(doc_id):
+            return None
+        with self._lock:
+            document = self._hot.get(doc_id)
+        if document is not None:
+            return StoredDocument(**{**document.__dict__, "text": None})
+        return self._read(doc_id, with_text=False)
+
+    def delete(self, doc_id: str) -> bool:
+        """
+        Returns:
+            bool: Whether the document existed.
+        """
+        if not is_document_id(doc_id):
+            return False
+        document = self._forget(doc_id)
+        path = self._entry_path(doc_id)
+        existed = path.exists()
+        path.unlink(missing_ok=True)
+        return existed or document is not None
+
+    def evict(self) -> None:
+        """
+        Delete least recently used files until the store fits in `max_bytes`.
+        """
+        entries = []
+        total = 0
+        for path in self.directory.glob("*.rbd"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            self._forget(path.stem)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Returns:
+            dict: Hit/miss/ingest counters for this process plus the hot set's size.
+        """
+        with self._lock:
+            return {**self._counters, "memory_entries": len(self._hot), "memory_bytes": self._hot_bytes}
+
+
+_document_store: Optional[DocumentStore] = None
+_document_store_lock = threading.Lock()
+
+
+def get_document_store() -> DocumentStore:
+    """
+    Get the process-wide document store, configured from the environment on first use.
+
+    Environment:
+        DOC_STORE_DIR: Where documents are stored. Defaults to ".cache/documents".
+        DOC_STORE_MAX_BYTES: Size budget of the files before eviction. Defaults to 1 GiB.
+        DOC_STORE_MEMORY_BYTES: Size of the in-memory hot set. Defaults to 256 MiB.
+        DOC_STORE_COMPRESSION_LEVEL: zlib level. Defaults to 6.
+
+    Returns:
+        DocumentStore: The shared store.
+    """
+    global _document_store
+    if _document_store is None:
+        with _document_store_lock:
+            if _document_store is None:
+                _document_store = DocumentStore(
+                    directory=os.getenv("DOC_STORE_DIR", ".cache/documents"),
+                    max_bytes=int(os.getenv("DOC_STORE_MAX_BYTES", 1024 * 1024 * 1024)),
+                    memory_bytes=int(os.getenv("DOC_STORE_MEMORY_BYTES", 256 * 1024 * 1024)),
+                    compression_level=int(os.getenv("DOC_STORE_COMPRESSION_LEVEL", 6)),
+                )
+    return _document_store
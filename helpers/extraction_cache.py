@@ -0,0 +1,225 @@
+import hashlib
+import json
+import mmap
+import os
+import struct
+import tempfile
+import threading
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Bump whenever PDFProcessor's extraction output changes; entries written by another version are discarded
+EXTRACTOR_VERSION = 2
+
+_MAGIC = b"RBXC"
+_PREAMBLE = struct.Struct("<4sII")  # magic, extractor version, header length
+
+_hash_memo: Dict[Tuple[str, int, int], str] = {}
+_hash_memo_lock = threading.Lock()
+_HASH_MEMO_SIZE = 1024
+
+
+def file_sha256(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """
+    Compute the SHA-256 of a file's bytes, streaming it in chunks.
+
+    Digests are memoized per (realpath, size, mtime) so an unchanged file is only hashed once per process.
+
+    Args:
+        path (str): The file to hash.
+        chunk_size (int, optional): Bytes read per chunk. Defaults to 1 MiB.
+
+    Returns:
+        str: The hex digest.
+    """
+    stat = os.stat(path)
+    memo_key = (os.path.realpath(path), stat.st_size, stat.st_mtime_ns)
+    digest = _hash_memo.get(memo_key)
+    if digest is not None:
+        return digest
+
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            sha.update(chunk)
+    digest = sha.hexdigest()
+
+    with _hash_memo_lock:
+        if len(_hash_memo) >= _HASH_MEMO_SIZE:
+            _hash_memo.clear()
+        _hash_memo[memo_key] = digest
+    return digest
+
+
+class CachedDocument:
+    """
+    A cache entry opened for reading. Page texts stay on disk and are sliced out of a
+    memory map only when the page is actually read.
+    """
+
+    def __init__(self, path: Path, fd: int, header: dict, blob_offset: int):
+        self.path = path
+        self._fd = fd
+        self._pages = header["pages"]
+        self._blob_offset = blob_offset
+
+    def __len__(self) -> int:
+        return len(self._pages)
+
+    def iter_pages(self, start: int = 0, stop: Optional[int] = None) -> Iterator[dict]:
+        """
+        Yield the cached fields of each page in [start, stop).
+
+        Yields:
+            dict: The page's `number`, `text`, `images` (as [xref, width, height, bpc, colorspace, filter]) and `links`.
+        """
+        stop = len(self._pages) if stop is None else min(stop, len(self._pages))
+        try:
+            with mmap.mmap(self._fd, 0, access=mmap.ACCESS_READ) as mapped:
+                for number in range(max(start, 0), stop):
+                    text_offset, text_length, images, links = self._pages[number]
+                    begin = self._blob_offset + text_offset
+                    yield {
+                        "number": number,
+                        "text": mapped[begin:begin + text_length].decode("utf-8"),
+                        "images": images,
+                        "links": links,
+                    }
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+    def __del__(self):
+        self.close()
+
+
+class ExtractionCache:
+    """
+    Content-addressed on-disk cache of PDF extraction results.
+
+    Each entry is a single file named after the SHA-256 of the PDF bytes, laid out as a small
+    fixed preamble (magic, extractor version, header length), a JSON header with per-page
+    offsets, image metadata and links, and one UTF-8 blob of all page texts.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        """
+        Args:
+            directory (str): Where entries are stored.
+            max_bytes (int): Total size the entries may use before the least recently used are evicted.
+        """
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+
+    def _entry_path(self, key: str) -> Path:
+        return self.directory / f"{key}.rbx"
+
+    def load(self, key: str) -> Optional[CachedDocument]:
+        """
+        Open the entry for `key`.
+
+        Args:
+            key (str): The PDF's SHA-256.
+
+        Returns:
+            CachedDocument | None: The entry, or None if it is missing, corrupt or from another extractor version.
+        """
+        path = self._entry_path(key)
+        try:
+            fd = os.open(path, os.O_RDONLY)
+        except FileNotFoundError:
+            return None
+        try:
+            magic, version, header_length = _PREAMBLE.unpack(os.pread(fd, _PREAMBLE.size, 0))
+            if magic != _MAGIC or version != EXTRACTOR_VERSION:
+                raise ValueError(f"stale extraction cache entry (version {version})")
+            header = json.loads(os.pread(fd, header_length, _PREAMBLE.size))
+            # Refresh the mtime, which doubles as the LRU clock for eviction
+            os.utime(path)
+        except Exception:
+            os.close(fd)
+            path.unlink(missing_ok=True)
+            return None
+        return CachedDocument(path, fd, header, _PREAMBLE.size + header_length)
+
+    def store(self, key: str, pages: List[dict]) -> None:
+        """
+        Write the extraction result for `key` atomically, then evict old entries if over budget.
+
+        Args:
+            key (str): The PDF's SHA-256.
+            pages (List[dict]): Every page's `text`, `images` and `links`, in page order.
+        """
+        blobs, index, offset = [], [], 0
+        for page in pages:
+            encoded = page["text"].encode("utf-8")
+            index.append([offset, len(encoded), page["images"], page["links"]])
+            blobs.append(encoded)
+            offset += len(encoded)
+        header = json.dumps({"pages": index}, separators=(",", ":")).encode("utf-8")
+
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(_PREAMBLE.pack(_MAGIC, EXTRACTOR_VERSION, len(header)))
+                f.write(header)
+                f.writelines(blobs)
+            os.replace(tmp_path, self._entry_path(key))
+        except Exception:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+        self.evict()
+
+    def evict(self) -> None:
+        """
+        Delete least recently used entries until the cache fits in `max_bytes`.
+        """
+        entries = []
+        total = 0
+        for path in self.directory.glob("*.rbx"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+
+
+_extraction_cache: Optional[ExtractionCache] = None
+_extraction_cache_lock = threading.Lock()
+
+
+def get_extraction_cache() -> Optional[ExtractionCache]:
+    """
+    Get the process-wide extraction cache, configured from the environment on first use.
+
+    Environment:
+        PDF_CACHE_ENABLED: "false" disables the cache. Defaults to "true".
+        PDF_CACHE_DIR: Where entries are stored. Defaults to ".cache/pdf_extraction".
+        PDF_CACHE_MAX_BYTES: Size budget before eviction. Defaults to 512 MiB.
+
+    Returns:
+        ExtractionCache | None: The cache, or None when disabled.
+    """
+    global _extraction_cache
+    if os.getenv("PDF_CACHE_ENABLED", "true").lower() == "false":
+        return None
+    if _extraction_cache is None:
+        with _extraction_cache_lock:
+            if _extraction_cache is None:
+                _extraction_cache = ExtractionCache(
+                    directory=os.getenv("PDF_CACHE_DIR", ".cache/pdf_extraction"),
+                    max_bytes=int(os.getenv("PDF_CACHE_MAX_BYTES", 512 * 1024 * 1024)),
+                )
+    return _extraction_cache
@@ -1,91 +1,510 @@
 import fitz
+import functools
 import io
+import multiprocessing
+import os
 import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import closing
+from dataclasses import dataclass, field
 from PIL import Image
-from typing import List, Dict
+from typing import List, Dict, Iterator, Optional
 from enums.environmet_variables import EnvironmentVariables
+from helpers.extraction_cache import file_sha256, get_extraction_cache
+from helpers.tracing import span
+
+# Bare http(s) URLs in running text; REFERENCE_PATTERN overrides it
+DEFAULT_REFERENCE_PATTERN = r"https?://[^\s<>\"'`{}|\\^\[\]]+"
+# Sentence punctuation and closing brackets that end up glued to URLs in prose
+_URL_TRAILING = ".,;:!?)]}>'\""
+
+@functools.lru_cache(maxsize=8)
+def _compile_reference_pattern(pattern: str) -> re.Pattern:
+    return re.compile(pattern)
+
+def reference_pattern() -> re.Pattern:
+    """
+    The compiled URL pattern, compiled once per distinct REFERENCE_PATTERN value.
+    """
+    return _compile_reference_pattern(EnvironmentVariables.REFERENCE_PATTERN.value_from_env or DEFAULT_REFERENCE_PATTERN)
+
+# PDF stream filters and the format the image bytes come out in
+_IMAGE_FORMATS = {
+    "DCTDecode": "jpeg",
+    "JPXDecode": "jpx",
+    "JBIG2Decode": "jb2",
+    "CCITTFaxDecode": "tiff",
+}
+
+@dataclass(frozen=True)
+class ImageInfo:
+    """
+    Metadata of an embedded image, read from the PDF's image dictionary without decoding it.
+
+    Attributes:
+        xref (int): Cross-reference id of the image object.
+        width (int): Width in pixels.
+        height (int): Height in pixels.
+        bpc (int): Bits per component.
+        colorspace (str): Name of the image's colorspace.
+        filter (str): The PDF stream filter, e.g. "DCTDecode" for JPEG.
+    """
+    xref: int
+    width: int
+    height: int
+    bpc: int
+    colorspace: str
+    filter: str
+
+    @property
+    def format(self) -> str:
+        return _IMAGE_FORMATS.get(self.filter, "png")
+
+@dataclass
+class PageRecord:
+    """
+    Everything a single extraction pass collects from one PDF page.
+
+    Attributes:
+        number (int): Zero-based page index.
+        text (str): The page's text content.
+        images (List[ImageInfo]): Metadata of the images placed on the page.
+        links (List[str]): URIs of the page's link annotations.
+    """
+    number: int
+    text: str
+    images: List[ImageInfo] = field(default_factory=list)
+    links: List[str] = field(default_factory=list)
+
+    @property
+    def image_xrefs(self) -> List[int]:
+        return [image.xref for image in self.images]
+
+class ImageHandle:
+    """
+    A lazy reference to an image embedded in a PDF.
+
+    Size and format are available without touching the image data; the pixels are only
+    decoded by `load`, optionally downscaled so that large scans can't blow up memory.
+    """
+
+    def __init__(self, pdf_path: str, info: ImageInfo, pages: List[int]):
+        """
+        Args:
+            pdf_path (str): The PDF the image lives in.
+            info (ImageInfo): The image's metadata.
+            pages (List[int]): Zero-based indexes of every page the image appears on.
+        """
+        self.pdf_path = pdf_path
+        self.info = info
+        self.pages = pages
+
+    @property
+    def xref(self) -> int:
+        return self.info.xref
+
+    @property
+    def pixels(self) -> int:
+        return self.info.width * self.info.height
+
+    def metadata(self) -> Dict[str, object]:
+        """
+        Returns:
+            dict: JSON serializable xref, size, format and page occurrences of the image.
+        """
+        return {
+            "xref": self.info.xref,
+            "width": self.info.width,
+            "height": self.info.height,
+            "format": self.info.format,
+            "colorspace": self.info.colorspace,
+            "pages": self.pages,
+        }
+
+    def load(self, max_pixels: Optional[int] = None, doc: Optional[fitz.Document] = None) -> Image.Image:
+        """
+        Decode the image.
+
+        Args:
+            max_pixels (int, optional): Downscale (keeping the aspect ratio) so width * height stays
+                under this. Defaults to PDF_IMAGE_MAX_PIXELS, or no limit when that isn't set.
+            doc (fitz.Document, optional): An already opened copy of the PDF, to avoid reopening it
+                when loading several images. Defaults to None.
+
+        Returns:
+            Image.Image: The decoded image.
+        """
+        if max_pixels is None and os.getenv("PDF_IMAGE_MAX_PIXELS"):
+            max_pixels = int(os.getenv("PDF_IMAGE_MAX_PIXELS"))
+
+        owns_doc = doc is None
+        if owns_doc:
+            doc = fitz.open(self.pdf_path)
+        try:
+            image_bytes = doc.extract_image(self.info.xref)["image"]
+        finally:
+            if owns_doc:
+                doc.close()
+
+        image = Image.open(io.BytesIO(image_bytes))
+        if max_pixels and self.pixels > max_pixels:
+            scale = (max_pixels / self.pixels) ** 0.5
+            size = (max(1, int(self.info.width * scale)), max(1, int(self.info.height * scale)))
+            # Lets the JPEG decoder skip straight to a reduced resolution instead of decoding full size first
+            image.draft(image.mode, size)
+            image.thumbnail(size)
+        else:
+            image.load()
+        return image
+
+_extraction_pool: Optional[ProcessPoolExecutor] = None
+_extraction_pool_lock = threading.Lock()
+
+def get_extraction_pool(workers: int) -> ProcessPoolExecutor:
+    """
+    Get the process-wide pool used for parallel page extraction, creating it on first use.
+
+    Workers are spawned rather than forked, since the API process runs extraction from threads.
+
+    Args:
+        workers (int): Number of worker processes for a newly created pool.
+
+    Returns:
+        ProcessPoolExecutor: The shared extraction pool.
+    """
+    global _extraction_pool
+    if _extraction_pool is None:
+        with _extraction_pool_lock:
+            if _extraction_pool is None:
+                _extraction_pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+    return _extraction_pool
+
+def shutdown_extraction_pool() -> None:
+    """
+    Shut down the parallel extraction pool, if one was started.
+    """
+    global _extraction_pool
+    with _extraction_pool_lock:
+        if _extraction_pool is not None:
+            _extraction_pool.shutdown(cancel_futures=True)
+            _extraction_pool = None
+
+def _extract_page_range(pdf_path: str, start: int, stop: int) -> List[PageRecord]:
+    """
+    Extract one shard of pages in a worker process, which opens the file independently.
+    """
+    doc = fitz.open(pdf_path)
+    try:
+        return list(PDFProcessor._read_pages(doc, start, stop))
+    finally:
+        doc.close()
 
 class PDFProcessor:
     """
     A class for processing PDF files, including extracting text, images, and hyperlinks.
+
+    All extraction goes through `iter_pages`, a single pass that opens the document once and
+    yields one `PageRecord` per page, so callers can stop early or only read the pages they need.
+    Page ranges of at least `parallel_threshold` pages are sharded across a process pool and
+    merged back in page order. Complete passes are stored in the content-addressed extraction
+    cache, so the same bytes are never extracted twice, whatever path they arrive under.
     """
 
-    def __init__(self, pdf_path: str):
+    def __init__(self, pdf_path: str, workers: Optional[int] = None, parallel_threshold: Optional[int] = None,
+                 content_hash: Optional[str] = None, use_cache: bool = True):
         """
         Initialize the PDFProcessor with the path to a PDF file.
 
         Args:
             pdf_path (str): The file path to the PDF to be processed.
+            workers (int, optional): Worker processes for parallel extraction; 1 disables it.
+                Defaults to PDF_EXTRACTION_WORKERS or min(4, cpu count).
+            parallel_threshold (int, optional): Minimum number of pages before extraction goes parallel.
+                Defaults to PDF_PARALLEL_PAGE_THRESHOLD or 300.
+            content_hash (str, optional): SHA-256 of the file, when the caller already computed it. Defaults to None.
+            use_cache (bool, optional): Read and populate the extraction cache. Defaults to True.
         """
         self.pdf_path = pdf_path
+        self.workers = workers if workers is not None else int(os.getenv("PDF_EXTRACTION_WORKERS", min(4, os.cpu_count() or 1)))
+        self.parallel_threshold = parallel_threshold if parallel_threshold is not None else int(os.getenv("PDF_PARALLEL_PAGE_THRESHOLD", 300))
+        self.content_hash = content_hash
+        self.use_cache = use_cache
 
-    def extract_text(self) -> str:
+    @property
+    def sha256(self) -> str:
         """
-        Extract all text content from the PDF.
+        The SHA-256 of the PDF's bytes, computed on first access.
+        """
+        if self.content_hash is None:
+            self.content_hash = file_sha256(self.pdf_path)
+        return self.content_hash
 
-        Returns:
-            str: The concatenated text extracted from all PDF pages.
+    @staticmethod
+    def _read_pages(doc: fitz.Document, start: int = 0, stop: Optional[int] = None) -> Iterator[PageRecord]:
+        """
+        Yield a `PageRecord` for each page of an already opened document in [start, stop).
+        """
+        stop = len(doc) if stop is None else min(stop, len(doc))
+        for number in range(max(start, 0), stop):
+            page = doc[number]
+            yield PageRecord(
+                number=number,
+                text=page.get_text(),
+                images=[
+                    ImageInfo(xref=img[0], width=img[2], height=img[3], bpc=img[4], colorspace=img[5], filter=img[8])
+                    for img in page.get_images(full=True)
+                ],
+                links=[link["uri"] for link in page.get_links() if link.get("uri")],
+            )
+
+    def _collect_pages(self, doc: fitz.Document, start: int = 0, stop: Optional[int] = None) -> Iterator[PageRecord]:
         """
+        Yield the page records of [start, stop), reading serially from `doc` for small ranges and
+        fanning out to the extraction pool for large ones.
+        """
+        start = max(start, 0)
+        stop = len(doc) if stop is None else min(stop, len(doc))
+        page_count = stop - start
+        if self.workers <= 1 or page_count < self.parallel_threshold:
+            yield from self._read_pages(doc, start, stop)
+            return
+
+        # Use a few shards per worker so one slow range doesn't leave the others idle
+        shard_size = max(1, -(-page_count // (self.workers * 4)))
+        pool = get_extraction_pool(self.workers)
+        futures = [
+            pool.submit(_extract_page_range, self.pdf_path, shard_start, min(shard_start + shard_size, stop))
+            for shard_start in range(start, stop, shard_size)
+        ]
         try:
+            for future in futures:
+                yield from future.result()
+        finally:
+            for future in futures:
+                future.cancel()
+
+    def _pages(self, start: int = 0, stop: Optional[int] = None) -> Iterator[PageRecord]:
+        """
+        Yield page records from the extraction cache when the file was seen before, otherwise extract
+        them and cache the result once a full pass completes.
+        """
+        cache = get_extraction_cache() if self.use_cache else None
+        if cache is not None:
+            with span("pdf_cache_load"):
+                cached = cache.load(self.sha256)
+            if cached is not None:
+                with closing(cached.iter_pages(start, stop)) as cached_pages:
+                    for fields in cached_pages:
+                        yield PageRecord(
+                            number=fields["number"],
+                            text=fields["text"],
+                            images=[ImageInfo(*image) for image in fields["images"]],
+                            links=fields["links"],
+                        )
+                return
+
+        with span("pdf_open"):
             doc = fitz.open(self.pdf_path)
-            text_content = ""
-            for page in doc:
-                text_content += page.get_text()
+        try:
+            complete = cache is not None and start <= 0 and (stop is None or stop >= len(doc))
+            records = []
+            for record in self._collect_pages(doc, start, stop):
+                if complete:
+                    records.append(record)
+                yield record
+            if complete:
+                try:
+                    with span("pdf_cache_store"):
+                        cache.store(self.sha256, [
+                            {
+                                "text": record.text,
+                                "images": [[image.xref, image.width, image.height, image.bpc, image.colorspace, image.filter] for image in record.images],
+                                "links": record.links,
+                            }
+                            for record in records
+                        ])
+                except Exception as e:
+                    print(f"Error caching extraction: {str(e)}")
+        finally:
             doc.close()
-            return text_content
+
+    def iter_pages(self, start: int = 0, stop: Optional[int] = None) -> Iterator[PageRecord]:
+        """
+        Stream the PDF page by page in a single pass.
+
+        The document (or its cache entry) is opened once and closed as soon as the generator is
+        exhausted or discarded, so breaking out of the loop early stops all further extraction work
+        (including shards still queued for the process pool).
+
+        Args:
+            start (int, optional): First page index to read. Defaults to 0.
+            stop (int, optional): Page index to stop before. Defaults to the end of the document.
+
+        Yields:
+            PageRecord: The text, image xrefs and link URIs of each page, in page order.
+        """
+        yield from self._pages(start, stop)
+
+    def extract_text(self, start: int = 0, stop: Optional[int] = None) -> str:
+        """
+        Extract all text content from the PDF.
+
+        Args:
+            start (int, optional): First page index to read. Defaults to 0.
+            stop (int, optional): Page index to stop before. Defaults to the end of the document.
+
+        Returns:
+            str: The concatenated text extracted from the PDF pages.
+        """
+        try:
+            with span("text_extraction"):
+                return "".join(record.text for record in self.iter_pages(start, stop))
         except Exception as e:
             print(f"Error extracting text: {str(e)}")
             return ""
 
-    def extract_images(self) -> List[Image.Image]:
+    def extract_page_texts(self, start: int = 0, stop: Optional[int] = None) -> List[str]:
         """
-        Extract all images from the PDF.
+        Extract the text content of each PDF page separately.
+
+        Args:
+            start (int, optional): First page index to read. Defaults to 0.
+            stop (int, optional): Page index to stop before. Defaults to the end of the document.
 
         Returns:
-            list: A list of PIL Image objects extracted from the PDF.
+            list: The text of every page, in page order.
         """
-        images = []
         try:
-            doc = fitz.open(self.pdf_path)
-            for page_num in range(len(doc)):
-                page = doc[page_num]
-                image_list = page.get_images()
-                for img in image_list:
-                    xref = img[0]
-                    base_image = doc.extract_image(xref)
-                    image_bytes = base_image["image"]
-                    image = Image.open(io.BytesIO(image_bytes))
-                    images.append(image)
-            doc.close()
+            return [record.text for record in self.iter_pages(start, stop)]
+        except Exception as e:
+            print(f"Error extracting text: {str(e)}")
+            return []
+
+    def _image_handles(self, records: List[PageRecord]) -> List[ImageHandle]:
+        """
+        Build one handle per distinct image xref, in order of first appearance.
+        """
+        handles: Dict[int, ImageHandle] = {}
+        for record in records:
+            for image in record.images:
+                handle = handles.get(image.xref)
+                if handle is None:
+                    handles[image.xref] = ImageHandle(self.pdf_path, image, [record.number])
+                elif handle.pages[-1] != record.number:
+                    handle.pages.append(record.number)
+        return list(handles.values())
+
+    def extract_images(self, start: int = 0, stop: Optional[int] = None) -> List[ImageHandle]:
+        """
+        Collect the images of the PDF as lazy handles, one per distinct image.
+
+        Images repeated across pages (logos, headers) share a single handle, and nothing is
+        decoded until `ImageHandle.load` is called.
+
+        Args:
+            start (int, optional): First page index to read. Defaults to 0.
+            stop (int, optional): Page index to stop before. Defaults to the end of the document.
+
+        Returns:
+            list: A list of ImageHandle objects for the images in the PDF.
+        """
+        try:
+            return self._image_handles(list(self._pages(start, stop)))
         except Exception as e:
             print(f"Error extracting images: {str(e)}")
-        return images
+            return []
 
-    def extract_text_and_images(self) -> Dict[str, object]:
+    def load_images(self, handles: List[ImageHandle], max_pixels: Optional[int] = None) -> List[Image.Image]:
         """
-        Extract both text and images from the PDF.
+        Decode several image handles while opening the PDF only once.
+
+        Args:
+            handles (List[ImageHandle]): Handles from `extract_images`.
+            max_pixels (int, optional): Per-image downscale limit, see `ImageHandle.load`. Defaults to None.
+
+        Returns:
+            list: The decoded PIL Image objects, in the order of `handles`.
+        """
+        doc = fitz.open(self.pdf_path)
+        try:
+            return [handle.load(max_pixels=max_pixels, doc=doc) for handle in handles]
+        finally:
+            doc.close()
+
+    def extract_text_and_images(self, start: int = 0, stop: Optional[int] = None) -> Dict[str, object]:
+        """
+        Extract both text and images from the PDF in a single pass over the document.
+
+        Args:
+            start (int, optional): First page index to read. Defaults to 0.
+            stop (int, optional): Page index to stop before. Defaults to the end of the document.
 
         Returns:
             dict: A dictionary containing:
                 - 'text': The extracted text from the PDF.
-                - 'images': A list of extracted images as PIL Image objects.
+                - 'images': A list of lazy ImageHandle objects, one per distinct image.
+                - 'pages': The `PageRecord` of every page read.
         """
-        return {
-            "text": self.extract_text(),
-            "images": self.extract_images()
-        }
+        try:
+            with span("text_extraction"):
+                records = list(self._pages(start, stop))
+            return {
+                "text": "".join(record.text for record in records),
+                "images": self._image_handles(records),
+                "pages": records
+            }
+        except Exception as e:
+            print(f"Error extracting text and images: {str(e)}")
+            return {"text": "", "images": [], "pages": []}
 
-    def extract_hyperlinks(self) -> List[str]:
+    @staticmethod
+    def find_hyperlinks(text: str) -> List[str]:
         """
-        Extract HTTPS hyperlinks from the text content of the PDF using a regex pattern from environment variables.
+        Find hyperlinks in already extracted text with the precompiled reference pattern.
+
+        Args:
+            text (str): The text to search.
+
+        Returns:
+            list: The URLs found in the text, in order, without trailing punctuation.
+        """
+        links = []
+        for match in reference_pattern().finditer(text):
+            link = match.group(0).rstrip(_URL_TRAILING)
+            if link:
+                links.append(link)
+        return links
+
+    @classmethod
+    def page_hyperlinks(cls, record: PageRecord) -> List[str]:
+        """
+        The distinct links of a page: its link annotations first, then URLs written in its text.
+
+        Args:
+            record (PageRecord): The page.
+
+        Returns:
+            list: The page's links, deduplicated in order.
+        """
+        return list(dict.fromkeys(record.links + cls.find_hyperlinks(record.text)))
+
+    def extract_hyperlinks(self, start: int = 0, stop: Optional[int] = None) -> List[str]:
+        """
+        Extract the hyperlinks of the PDF, from both its link annotations and the URLs in its text.
+
+        Args:
+            start (int, optional): First page index to read. Defaults to 0.
+            stop (int, optional): Page index to stop before. Defaults to the end of the document.
 
         Returns:
-            list: A list of HTTPS URLs found in the PDF text.
+            list: The distinct links of the PDF, in order of first appearance.
         """
         try:
-            text = self.extract_text()
-            pattern = EnvironmentVariables.REFERENCE_PATTER.value_from_env
-            return re.findall(pattern, text)
+            links: Dict[str, None] = {}
+            for record in self.iter_pages(start, stop):
+                links.update(dict.fromkeys(self.page_hyperlinks(record)))
+            return list(links)
         except Exception as e:
             print(f"Error extracting hyperlinks: {str(e)}")
-            return []
\ No newline at end of file
+            return []
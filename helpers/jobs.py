@@ -0,0 +1,409 @@
+import asyncio
+import json
+import os
+import threading
+import time
+import traceback
+import uuid
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from enums.job_status import JobStatus
+from helpers.loggers import get_logger, request_id_var
+from helpers.metrics import get_registry
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:  # redis is optional, the in-memory store works on its own
+    aioredis = None
+
+logger = get_logger()
+
+JobHandler = Callable[[Dict[str, Any]], Awaitable[Any]]
+# Releases what a job's payload holds (e.g. a spooled upload) when the job is dropped without ever running
+JobAbandonHook = Callable[[Dict[str, Any]], None]
+
+
+class JobQueueFullError(Exception):
+    """Raised when a job is submitted while the queue already holds its maximum of pending jobs."""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+@dataclass
+class Job:
+    """
+    A unit of background work and its outcome.
+
+    Attributes:
+        id (str): Opaque job id handed to the client.
+        kind (str): Which registered handler runs it, e.g. "resource".
+        payload (dict): JSON serializable arguments for the handler.
+        status (JobStatus): Where the job is in its lifecycle.
+        created_at (float): Submission time (epoch seconds).
+        started_at (float | None): When a worker picked it up.
+        finished_at (float | None): When it succeeded or failed.
+        result (Any): The handler's return value once succeeded.
+        error (str | None): Why it failed.
+        error_type (str | None): The exception class that failed it.
+        retry_after (float | None): For failures caused by an unavailable provider, when resubmitting makes sense.
+    """
+    id: str
+    kind: str
+    payload: Dict[str, Any]
+    status: JobStatus = JobStatus.QUEUED
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result: Any = None
+    error: Optional[str] = None
+    error_type: Optional[str] = None
+    retry_after: Optional[float] = None
+
+    def to_dict(self, include_result: bool = False) -> Dict[str, Any]:
+        """
+        Args:
+            include_result (bool, optional): Include the (possibly large) result. Defaults to False.
+
+        Returns:
+            dict: The job's state as JSON serializable values, without its payload.
+        """
+        data = asdict(self)
+        data["status"] = self.status.value
+        data.pop("payload")
+        if not include_result:
+            data.pop("result")
+        return data
+
+    def dumps(self) -> str:
+        return json.dumps({**asdict(self), "status": self.status.value})
+
+    @classmethod
+    def loads(cls, raw: str | bytes) -> "Job":
+        data = json.loads(raw)
+        data["status"] = JobStatus(data["status"])
+        return cls(**data)
+
+
+class MemoryJobStore:
+    """
+    Keeps jobs in this process. Finished jobs are dropped after `ttl` seconds, or oldest first once
+    more than `max_entries` jobs are held. Only visible to the worker that accepted the job, so
+    deployments with several uvicorn workers should use `RedisJobStore`.
+    """
+
+    def __init__(self, max_entries: int = 1000, ttl: float = 3600):
+        """
+        Args:
+            max_entries (int, optional): Jobs kept before the oldest finished ones are evicted. Defaults to 1000.
+            ttl (float, optional): Seconds a finished job stays retrievable. Defaults to 3600.
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        # job id -> (finished_at, serialized job); finished jobs are moved to the end, so they sit in finishing order
+        self._jobs: "OrderedDict[str, tuple[Optional[float], str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _evict(self) -> None:
+        now = time.time()
+        excess = len(self._jobs) - self.max_entries
+        for job_id, (finished_at, _) in list(self._jobs.items()):
+            if finished_at is None:
+                continue
+            if excess <= 0 and finished_at + self.ttl >= now:
+                break
+            del self._jobs[job_id]
+            excess -= 1
+
+    async def save(self, job: Job) -> None:
+        # Stored serialized, so a caller mutating its Job never changes what others read
+        with self._lock:
+            self._jobs[job.id] = (job.finished_at, job.dumps())
+            if job.status.finished:
+                self._jobs.move_to_end(job.id)
+            self._evict()
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            finished_at, raw = self._jobs.get(job_id, (None, None))
+        if raw is None or (finished_at is not None and finished_at + self.ttl < time.time()):
+            return None
+        return Job.loads(raw)
+
+    def describe(self) -> Dict[str, Any]:
+        return {"backend": "memory", "entries": len(self._jobs)}
+
+
+class RedisJobStore:
+    """
+    Keeps jobs in Redis, so any uvicorn worker can report on a job another one accepted and
+    finished jobs survive a restart. The job still runs in the worker that accepted it.
+    """
+
+    def __init__(self, url: str, ttl: float = 3600, prefix: str = "job:"):
+        """
+        Args:
+            url (str): Redis connection URL.
+            ttl (float, optional): Seconds a finished job stays retrievable. Defaults to 3600.
+            prefix (str, optional): Key namespace. Defaults to "job:".
+        """
+        self.url = url
+        self.ttl = int(ttl)
+        self.prefix = prefix
+        self._client = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = aioredis.Redis.from_url(self.url, socket_timeout=2)
+        return self._client
+
+    async def save(self, job: Job) -> None:
+        # Unfinished jobs expire too, so a worker dying mid-job can't leave one "running" forever
+        await self.client.set(self.prefix + job.id, job.dumps(), ex=self.ttl)
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        raw = await self.client.get(self.prefix + job_id)
+        return Job.loads(raw) if raw is not None else None
+
+    def describe(self) -> Dict[str, Any]:
+        return {"backend": "redis"}
+
+
+class JobQueue:
+    """
+    Runs submitted jobs on a fixed pool of asyncio workers, recording their state in a job store.
+
+    At most `max_pending` jobs wait for a worker; beyond that `submit` fails fast with
+    `JobQueueFullError`, so a burst turns into 429s instead of an unbounded backlog.
+    """
+
+    def __init__(self, store: MemoryJobStore | RedisJobStore, workers: int = 4, max_pending: int = 100, timeout: float = 900):
+        """
+        Args:
+            store (MemoryJobStore | RedisJobStore): Where job state and results are kept.
+            workers (int, optional): Jobs processed concurrently. Defaults to 4.
+            max_pending (int, optional): Jobs allowed to wait for a worker. Defaults to 100.
+            timeout (float, optional): Seconds a job may run before it is failed. Defaults to 900.
+        """
+        self.store = store
+        self.workers = workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self._handlers: Dict[str, JobHandler] = {}
+        self._abandon_hooks: Dict[str, JobAbandonHook] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._running: Dict[str, Job] = {}
+        # Slots claimed by submits that are still saving their job, counted against max_pending
+        self._reserved = 0
+        self._durations: List[float] = []
+
+        registry = get_registry()
+        self._jobs_total = registry.counter("jobs_total", "Background jobs finished, by kind and outcome.", ("kind", "outcome"))
+        self._queue_wait = registry.histogram("job_queue_wait_seconds", "Time jobs waited for a worker.", ("kind",))
+        self._duration = registry.histogram("job_duration_seconds", "Time jobs took once picked up by a worker.", ("kind",))
+        self._depth = registry.gauge("jobs_queued", "Jobs waiting for a worker.")
+        self._active = registry.gauge("jobs_running", "Jobs being processed.")
+        registry.register_collector(self._collect)
+
+    def _collect(self) -> None:
+        self._depth.set(self._queue.qsize() if self._queue is not None else 0)
+        self._active.set(len(self._running))
+
+    @property
+    def started(self) -> bool:
+        return bool(self._tasks)
+
+    def register(self, kind: str, handler: JobHandler, on_abandon: Optional[JobAbandonHook] = None) -> None:
+        """
+        Args:
+            kind (str): Name jobs are submitted under.
+            handler (JobHandler): Coroutine function called with the job's payload; its return value is the result.
+            on_abandon (JobAbandonHook, optional): Called with the payload of a job that is failed without its
+                handler ever running (still queued at shutdown). Defaults to None.
+        """
+        self._handlers[kind] = handler
+        if on_abandon is not None:
+            self._abandon_hooks[kind] = on_abandon
+
+    async def start(self, handlers: Optional[Dict[str, JobHandler]] = None, abandon_hooks: Optional[Dict[str, JobAbandonHook]] = None) -> None:
+        """Register `handlers` (and their `abandon_hooks`) and start the workers on the running event loop."""
+        for kind, handler in (handlers or {}).items():
+            self.register(kind, handler, (abandon_hooks or {}).get(kind))
+        if self.started:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_pending)
+        self._tasks = [asyncio.create_task(self._work(), name=f"job-worker-{index}") for index in range(self.workers)]
+        logger.info(f"Job queue started with {self.workers} workers ({self.store.describe()['backend']} store)")
+
+    async def stop(self) -> None:
+        """Stop the workers. Jobs still queued or running are failed, so nobody polls them forever."""
+        abandoned = list(self._running.values())
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        while self._queue is not None and not self._queue.empty():
+            job = self._queue.get_nowait()
+            # Never started, so its handler can't release what the payload holds
+            self._abandon(job)
+            abandoned.append(job)
+        for job in abandoned:
+            await self._finish(job, error=RuntimeError("The server shut down before the job finished"))
+        self._running.clear()
+
+    async def submit(self, kind: str, payload: Dict[str, Any]) -> Job:
+        """
+        Accept a job for background processing.
+
+        Args:
+            kind (str): A registered handler name.
+            payload (Dict[str, Any]): JSON serializable arguments for the handler.
+
+        Returns:
+            Job: The queued job.
+
+        Raises:
+            JobQueueFullError: If `max_pending` jobs are already waiting.
+            ValueError: If no handler is registered for `kind`.
+            RuntimeError: If the queue hasn't been started.
+        """
+        if kind not in self._handlers:
+            raise ValueError(f"No job handler registered for '{kind}'")
+        if self._queue is None:
+            raise RuntimeError("The job queue is not running")
+        pending = self._queue.qsize() + self._reserved
+        if pending >= self.max_pending:
+            raise JobQueueFullError(f"{pending} jobs are already waiting", retry_after=self.retry_after_hint())
+        # Reserve the slot before saving: the save may yield to other submits (e.g. with Redis),
+        # and enqueueing first would let a worker record "running" before "queued" is saved
+        self._reserved += 1
+        try:
+            job = Job(id=uuid.uuid4().hex, kind=kind, payload=payload)
+            await self.store.save(job)
+            self._queue.put_nowait(job)
+        finally:
+            self._reserved -= 1
+        return job
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        return await self.store.get(job_id)
+
+    def retry_after_hint(self) -> float:
+        """Rough time until a queue slot frees up, from recent job durations."""
+        recent = self._durations[-20:]
+        average = sum(recent) / len(recent) if recent else 5.0
+        return max(1.0, average * (self._queue.qsize() if self._queue else 1) / self.workers)
+
+    async def _work(self) -> None:
+        while True:
+            job = await self._queue.get()
+            self._running[job.id] = job
+            token = request_id_var.set(f"job-{job.id}")
+            try:
+                await self._run(job)
+            finally:
+                request_id_var.reset(token)
+                self._running.pop(job.id, None)
+                self._queue.task_done()
+
+    def _abandon(self, job: Job) -> None:
+        hook = self._abandon_hooks.get(job.kind)
+        if hook is None:
+            return
+        try:
+            hook(job.payload)
+        except Exception as e:
+            logger.error(f"Could not release abandoned job {job.id} ({job.kind}): {e}")
+
+    async def _run(self, job: Job) -> None:
+        job.status = JobStatus.RUNNING
+        job.started_at = time.time()
+        self._queue_wait.observe(job.started_at - job.created_at, kind=job.kind)
+        try:
+            await self.store.save(job)
+            logger.info(f"Job {job.id} ({job.kind}) started after {job.started_at - job.created_at:.2f}s in the queue")
+            result = await asyncio.wait_for(self._handlers[job.kind](job.payload), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            await self._finish(job, error=TimeoutError(f"The job did not finish within {self.timeout:g} seconds"))
+        except Exception as e:
+            logger.error(f"Job {job.id} ({job.kind}) failed: {e} at: {traceback.format_exc()}")
+            await self._finish(job, error=e)
+        else:
+            await self._finish(job, result=result)
+
+    async def _finish(self, job: Job, result: Any = None, error: Optional[BaseException] = None) -> None:
+        job.finished_at = time.time()
+        if error is None:
+            job.status, job.result = JobStatus.SUCCEEDED, result
+        else:
+            job.status, job.error, job.error_type = JobStatus.FAILED, str(error), type(error).__name__
+            job.retry_after = getattr(error, "retry_after", None)
+        if job.started_at is not None:
+            elapsed = job.finished_at - job.started_at
+            self._duration.observe(elapsed, kind=job.kind)
+            self._durations = self._durations[-99:] + [elapsed]
+        self._jobs_total.inc(kind=job.kind, outcome=job.status.value)
+        try:
+            await self.store.save(job)
+        except Exception as e:
+            logger.error(f"Could not record the outcome of job {job.id}: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Returns:
+            dict: Worker count, queue depth and capacity, running jobs and the store backend of this process.
+        """
+        return {
+            "workers": self.workers,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "max_pending": self.max_pending,
+            "running": [{"id": job.id, "kind": job.kind, "started_at": job.started_at} for job in self._running.values()],
+            "timeout": self.timeout,
+            "store": self.store.describe(),
+        }
+
+
+_job_queue: Optional[JobQueue] = None
+_job_queue_lock = threading.Lock()
+
+
+def get_job_queue() -> JobQueue:
+    """
+    Get the process-wide job queue, configured from the environment on first use.
+
+    Environment:
+        JOB_WORKERS: Jobs processed concurrently per uvicorn worker. Defaults to 4.
+        JOB_MAX_PENDING: Jobs allowed to wait for a worker before submissions get 429. Defaults to 100.
+        JOB_TIMEOUT: Seconds a job may run. Defaults to 900.
+        JOB_RESULT_TTL: Seconds a finished job stays retrievable. Defaults to 3600.
+        JOB_STORE_MAX_ENTRIES: Jobs kept by the in-memory store. Defaults to 1000.
+        JOB_REDIS_URL: Keep jobs in Redis instead, shared by every uvicorn worker.
+
+    Returns:
+        JobQueue: The shared queue. Workers run once `start` is awaited (see the app lifespan).
+    """
+    global _job_queue
+    if _job_queue is None:
+        with _job_queue_lock:
+            if _job_queue is None:
+                ttl = float(os.getenv("JOB_RESULT_TTL", 3600))
+                redis_url = os.getenv("JOB_REDIS_URL")
+                store = None
+                if redis_url:
+                    if aioredis is None:
+                        logger.warning("JOB_REDIS_URL is set but the redis package is not installed, keeping jobs in memory")
+                    else:
+                        store = RedisJobStore(redis_url, ttl=ttl)
+                if store is None:
+                    store = MemoryJobStore(max_entries=int(os.getenv("JOB_STORE_MAX_ENTRIES", 1000)), ttl=ttl)
+                _job_queue = JobQueue(
+                    store,
+                    workers=int(os.getenv("JOB_WORKERS", 4)),
+                    max_pending=int(os.getenv("JOB_MAX_PENDING", 100)),
+                    timeout=float(os.getenv("JOB_TIMEOUT", 900)),
+                )
+    return _job_queue
@@ -0,0 +1,360 @@
+import asyncio
+import hashlib
+import ipaddress
+import json
+import os
+import re
+import threading
+import time
+from dataclasses import asdict, dataclass
+from html.parser import HTMLParser
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import urlsplit
+import fitz
+import httpx
+from helpers.loggers import get_logger
+from helpers.tracing import span
+
+logger = get_logger()
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+class BlockedURLError(Exception):
+    """Raised when a URL (or a redirect target) points at a scheme or address the fetcher may not access."""
+    pass
+
+
+@dataclass
+class FetchedPage:
+    """
+    The readable text of a fetched link, or why it couldn't be fetched.
+
+    Attributes:
+        url (str): The requested URL.
+        status (int | None): The HTTP status, None when no response was received.
+        content_type (str | None): The response's media type.
+        text (str): The extracted text, empty on failure.
+        bytes (int): Size of the body that was read.
+        cached (bool): Served from the on-disk cache.
+        error (str | None): Why the fetch failed.
+        elapsed_ms (float): Time spent, including waiting for a per-host slot.
+    """
+    url: str
+    status: Optional[int] = None
+    content_type: Optional[str] = None
+    text: str = ""
+    bytes: int = 0
+    cached: bool = False
+    error: Optional[str] = None
+    elapsed_ms: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    def summary(self) -> Dict[str, object]:
+        data = asdict(self)
+        data.pop("text")
+        data["chars"] = len(self.text)
+        return data
+
+
+class _TextExtractor(HTMLParser):
+    """Collects the visible text of an HTML document."""
+
+    _SKIPPED = {"script", "style", "noscript", "template", "svg", "head"}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts: List[str] = []
+        self.title: List[str] = []
+        self._skipping = 0
+        self._in_title = False
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "title":
+            self._in_title = True
+        elif tag in self._SKIPPED:
+            self._skipping += 1
+
+    def handle_endtag(self, tag):
+        if tag == "title":
+            self._in_title = False
+        elif tag in self._SKIPPED and self._skipping:
+            self._skipping -= 1
+
+    def handle_data(self, data):
+        if self._in_title:
+            self.title.append(data)
+        elif not self._skipping:
+            self.parts.append(data)
+
+
+def html_to_text(html: str) -> str:
+    """
+    Args:
+        html (str): An HTML document.
+
+    Returns:
+        str: Its title and visible text, with whitespace collapsed.
+    """
+    extractor = _TextExtractor()
+    extractor.feed(html)
+    extractor.close()
+    title = _WHITESPACE.sub(" ", "".join(extractor.title)).strip()
+    body = _WHITESPACE.sub(" ", " ".join(extractor.parts)).strip()
+    return f"{title}\n{body}" if title else body
+
+
+def body_to_text(body: bytes, content_type: str, encoding: Optional[str] = None) -> str:
+    """
+    Turn a response body into plain text according to its media type.
+
+    Args:
+        body (bytes): The response body.
+        content_type (str): The media type, e.g. "text/html".
+        encoding (str, optional): The declared charset; unknown charsets fall back to UTF-8. Defaults to None (UTF-8).
+
+    Returns:
+        str: The extracted text.
+
+    Raises:
+        ValueError: If the media type isn't HTML, plain text or PDF.
+        RuntimeError: If a PDF is corrupt (`fitz.FileDataError`).
+    """
+    if content_type == "application/pdf" or body[:5] == b"%PDF-":
+        with fitz.open(stream=body, filetype="pdf") as doc:
+            return _WHITESPACE.sub(" ", " ".join(page.get_text() for page in doc)).strip()
+    try:
+        text = body.decode(encoding or "utf-8", errors="replace")
+    except LookupError:
+        text = body.decode("utf-8", errors="replace")
+    if content_type in ("text/html", "application/xhtml+xml"):
+        return html_to_text(text)
+    if content_type.startswith("text/") or content_type in ("application/json", "application/xml"):
+        return _WHITESPACE.sub(" ", text).strip()
+    raise ValueError(f"Unsupported content type {content_type}")
+
+
+class LinkFetcher:
+    """
+    Fetches the pages a document references, concurrently, through one pooled async HTTP client.
+
+    Connections are reused across links and requests, at most `per_host` requests run against a
+    host at once, every request is bounded by `timeout`, bodies are cut off at `max_bytes`, and the
+    extracted text of successful fetches is kept in an on-disk cache for `cache_ttl` seconds.
+    Only http(s) URLs are fetched, and unless `allow_private` is set, URLs (including redirect
+    targets) resolving to loopback, private or link-local addresses are refused.
+    """
+
+    def __init__(self, timeout: float = 10.0, per_host: int = 4, max_connections: int = 32, max_bytes: int = 5 * 1024 * 1024,
+                 cache_dir: Optional[Path] = None, cache_ttl: float = 86400, allow_private: bool = False,
+                 transport: Optional[httpx.AsyncBaseTransport] = None, user_agent: str = "Research-Buddy reference scout"):
+        """
+        Args:
+            timeout (float, optional): Seconds allowed for each phase (connect, read, ...) of a request. Defaults to 10.
+            per_host (int, optional): Concurrent requests per host. Defaults to 4.
+            max_connections (int, optional): Size of the connection pool. Defaults to 32.
+            max_bytes (int, optional): Largest body read per link. Defaults to 5 MiB.
+            cache_dir (Path, optional): Directory of the response cache, or None to disable it. Defaults to None.
+            cache_ttl (float, optional): Seconds a cached page stays valid. Defaults to 86400.
+            allow_private (bool, optional): Allow loopback and private addresses, e.g. for a local stub server. Defaults to False.
+            transport (httpx.AsyncBaseTransport, optional): Custom transport, e.g. `httpx.MockTransport` in tests. Defaults to None.
+            user_agent (str, optional): The User-Agent header sent. Defaults to "Research-Buddy reference scout".
+        """
+        self.timeout = timeout
+        self.per_host = per_host
+        self.max_connections = max_connections
+        self.max_bytes = max_bytes
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else None
+        self.cache_ttl = cache_ttl
+        self.allow_private = allow_private
+        self.transport = transport
+        self.user_agent = user_agent
+        self._client: Optional[httpx.AsyncClient] = None
+        self._host_slots: Dict[str, asyncio.Semaphore] = {}
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                transport=self.transport,
+                limits=httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections),
+                timeout=httpx.Timeout(self.timeout, connect=min(self.timeout, 5.0)),
+                follow_redirects=True,
+                headers={"User-Agent": self.user_agent},
+                # Runs for every request, redirects included
+                event_hooks={"request": [self._check_request]},
+            )
+        return self._client
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _check_request(self, request: httpx.Request) -> None:
+        if request.url.scheme not in ("http", "https"):
+            raise BlockedURLError(f"Unsupported scheme {request.url.scheme}")
+        if self.allow_private:
+            return
+        host = request.url.host
+        try:
+            addresses = [ipaddress.ip_address(host)]
+        except ValueError:
+            infos = await asyncio.get_running_loop().getaddrinfo(host, request.url.port or 443)
+            addresses = [ipaddress.ip_address(info[4][0].split("%")[0]) for info in infos]
+        if any(not address.is_global for address in addresses):
+            raise BlockedURLError(f"{host} resolves to a non-public address")
+
+    def _slot(self, host: str) -> asyncio.Semaphore:
+        if host not in self._host_slots:
+            self._host_slots[host] = asyncio.Semaphore(self.per_host)
+        return self._host_slots[host]
+
+    def _cache_path(self, url: str) -> Path:
+        return self.cache_dir / f"{hashlib.sha256(url.encode('utf-8')).hexdigest()}.json"
+
+    def _cache_load(self, url: str) -> Optional[FetchedPage]:
+        if self.cache_dir is None:
+            return None
+        path = self._cache_path(url)
+        try:
+            if path.stat().st_mtime + self.cache_ttl < time.time():
+                return None
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        return FetchedPage(**{**data, "cached": True, "elapsed_ms": 0.0})
+
+    def _cache_store(self, page: FetchedPage) -> None:
+        if self.cache_dir is None:
+            return
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            path = self._cache_path(page.url)
+            temporary = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            temporary.write_text(json.dumps(asdict(page)), encoding="utf-8")
+            os.replace(temporary, path)
+        except OSError as e:
+            logger.warning(f"Could not cache the fetched page {page.url}: {e}")
+
+    async def _download(self, url: str, page: FetchedPage) -> None:
+        async with self.client.stream("GET", url) as response:
+            page.status = response.status_code
+            page.content_type = response.headers.get("content-type", "").split(";")[0].strip().lower() or None
+            if response.status_code >= 400:
+                page.error = f"HTTP {response.status_code}"
+                return
+            chunks, size = [], 0
+            async for chunk in response.aiter_bytes():
+                chunks.append(chunk)
+                size += len(chunk)
+                if size >= self.max_bytes:
+                    # Keep what fits, the start of a page carries most of its substance
+                    break
+            body = b"".join(chunks)[:self.max_bytes]
+            page.bytes = len(body)
+            encoding = response.charset_encoding
+        # Parsing (especially PDFs) is CPU bound, keep it off the event loop
+        page.text = await asyncio.to_thread(body_to_text, body, page.content_type or "", encoding)
+
+    async def fetch(self, url: str) -> FetchedPage:
+        """
+        Fetch one link, from the cache when possible. Never raises: failures are reported in `error`.
+
+        Args:
+            url (str): The link.
+
+        Returns:
+            FetchedPage: The page's text, or the reason it couldn't be fetched.
+        """
+        cached = await asyncio.to_thread(self._cache_load, url)
+        if cached is not None:
+            return cached
+
+        start = time.perf_counter()
+        page = FetchedPage(url=url)
+        try:
+            host = urlsplit(url).hostname or ""
+            async with self._slot(host):
+                await self._download(url, page)
+        except BlockedURLError as e:
+            page.error = f"Blocked: {e}"
+        except httpx.TimeoutException:
+            page.error = f"Timed out after {self.timeout:g}s"
+        except Exception as e:
+            # Network failures, but also bodies that can't be parsed, such as corrupt PDFs or
+            # PDFs cut off at max_bytes; one bad link must not fail the whole batch
+            page.error = f"{type(e).__name__}: {e}" if str(e) else type(e).__name__
+        page.elapsed_ms = round((time.perf_counter() - start) * 1000, 1)
+
+        if page.ok:
+            await asyncio.to_thread(self._cache_store, page)
+        else:
+            logger.info(f"Could not fetch reference {url}: {page.error}")
+        return page
+
+    async def fetch_all(self, urls: Iterable[str]) -> Dict[str, FetchedPage]:
+        """
+        Fetch links concurrently, within the pool and per-host limits.
+
+        Args:
+            urls (Iterable[str]): The links; duplicates are fetched once.
+
+        Returns:
+            Dict[str, FetchedPage]: The result of every link, in the given order.
+        """
+        unique = list(dict.fromkeys(urls))
+        with span("reference_fetch"):
+            pages = await asyncio.gather(*(self.fetch(url) for url in unique))
+        return dict(zip(unique, pages))
+
+
+_link_fetcher: Optional[LinkFetcher] = None
+_link_fetcher_lock = threading.Lock()
+
+
+def get_link_fetcher() -> LinkFetcher:
+    """
+    Get the process-wide link fetcher, configured from the environment on first use.
+
+    Environment:
+        REFERENCE_FETCH_TIMEOUT: Seconds allowed per request phase. Defaults to 10.
+        REFERENCE_FETCH_PER_HOST: Concurrent requests per host. Defaults to 4.
+        REFERENCE_FETCH_CONNECTIONS: Size of the connection pool. Defaults to 32.
+        REFERENCE_FETCH_MAX_BYTES: Largest body read per link. Defaults to 5 MiB.
+        REFERENCE_CACHE_DIR: Directory of the on-disk response cache. Defaults to .cache/references.
+        REFERENCE_CACHE_TTL: Seconds a fetched page is reused. Defaults to 86400; 0 disables the cache.
+        REFERENCE_FETCH_ALLOW_PRIVATE: "true" allows loopback and private addresses. Defaults to "false".
+
+    Returns:
+        LinkFetcher: The shared fetcher.
+    """
+    global _link_fetcher
+    if _link_fetcher is None:
+        with _link_fetcher_lock:
+            if _link_fetcher is None:
+                cache_ttl = float(os.getenv("REFERENCE_CACHE_TTL", 86400))
+                _link_fetcher = LinkFetcher(
+                    timeout=float(os.getenv("REFERENCE_FETCH_TIMEOUT", 10)),
+                    per_host=int(os.getenv("REFERENCE_FETCH_PER_HOST", 4)),
+                    max_connections=int(os.getenv("REFERENCE_FETCH_CONNECTIONS", 32)),
+                    max_bytes=int(os.getenv("REFERENCE_FETCH_MAX_BYTES", 5 * 1024 * 1024)),
+                    cache_dir=Path(os.getenv("REFERENCE_CACHE_DIR", os.path.join(".cache", "references"))) if cache_ttl > 0 else None,
+                    cache_ttl=cache_ttl,
+                    allow_private=os.getenv("REFERENCE_FETCH_ALLOW_PRIVATE", "false").lower() == "true",
+                )
+    return _link_fetcher
+
+
+async def aclose_link_fetcher() -> None:
+    """
+    Close the shared fetcher's connection pool. Called from the FastAPI lifespan on shutdown.
+    """
+    global _link_fetcher
+    if _link_fetcher is not None:
+        await _link_fetcher.aclose()
+        _link_fetcher = None
@@ -0,0 +1,293 @@
+"""
+Query and tail the PID-sharded JSONL logs written by `helpers.loggers.Logger`.
+
+Shards are streamed and merged by timestamp, never loaded whole. Each shard gets a sparse
+sidecar index (one timestamp/offset pair every INDEX_STRIDE lines, stored under
+`<log_dir>/.index/`) so time-range queries seek straight to the relevant part of each file.
+The index is extended incrementally as shards grow.
+
+Usage:
+    python -m helpers.log_query --level ERROR --since 2026-10-18T09:00 --request-id 3f2a...
+    python -m helpers.log_query --tail 50 --follow
+"""
+import argparse
+import bisect
+import heapq
+import json
+import os
+import sys
+import time
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional
+
+INDEX_STRIDE = 256
+LEVELS = ["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"]
+
+
+def list_shards(log_dir: Path, levels: Optional[Iterable[str]] = None) -> List[Path]:
+    """
+    Find every log shard (live and rotated, from any process) for the given levels.
+
+    Args:
+        log_dir (Path): The log directory.
+        levels (Iterable[str], optional): Levels to include. Defaults to all levels.
+
+    Returns:
+        List[Path]: The shard files.
+    """
+    shards = []
+    for level in levels or LEVELS:
+        shards.extend(sorted(Path(log_dir).glob(f"{level.lower()}.*.jsonl")))
+        shards.extend(sorted(Path(log_dir).glob(f"{level.lower()}.jsonl")))
+    return shards
+
+
+def _index_path(shard: Path) -> Path:
+    return shard.parent / ".index" / (shard.name + ".idx")
+
+
+def load_index(shard: Path) -> List[List]:
+    """
+    Load the sparse index of a shard, extending it over any lines appended since it was built.
+
+    Args:
+        shard (Path): The shard file.
+
+    Returns:
+        List[List]: Sorted [timestamp, byte offset] pairs, one every INDEX_STRIDE lines.
+    """
+    index_path = _index_path(shard)
+    index = {"size": 0, "lines": 0, "entries": []}
+    try:
+        index = json.loads(index_path.read_text())
+    except (FileNotFoundError, json.JSONDecodeError):
+        pass
+
+    size = shard.stat().st_size
+    if size < index["size"]:
+        # The shard was replaced, rebuild from scratch
+        index = {"size": 0, "lines": 0, "entries": []}
+    if size == index["size"]:
+        return index["entries"]
+
+    with open(shard, "rb") as f:
+        f.seek(index["size"])
+        offset = index["size"]
+        lines = index["lines"]
+        for raw in f:
+            if not raw.endswith(b"\n"):
+                break  # a batch still being written
+            if lines % INDEX_STRIDE == 0:
+                try:
+                    index["entries"].append([json.loads(raw)["timestamp"], offset])
+                except (ValueError, KeyError):
+                    pass
+            offset += len(raw)
+            lines += 1
+    index["size"], index["lines"] = offset, lines
+
+    try:
+        index_path.parent.mkdir(exist_ok=True)
+        tmp_path = index_path.with_suffix(f".{os.getpid()}.tmp")
+        tmp_path.write_text(json.dumps(index))
+        os.replace(tmp_path, index_path)
+    except OSError:
+        pass  # a read-only log directory just means no persisted index
+    return index["entries"]
+
+
+def _matches(entry: Dict, since: Optional[str], until: Optional[str], request_id: Optional[str], contains: Optional[str]) -> bool:
+    timestamp = entry.get("timestamp", "")
+    if since and timestamp < since:
+        return False
+    if until and timestamp > until:
+        return False
+    if request_id and entry.get("request_id") != request_id:
+        return False
+    if contains and contains not in entry.get("message", ""):
+        return False
+    return True
+
+
+def iter_shard(shard: Path, since: Optional[str] = None, until: Optional[str] = None,
+               request_id: Optional[str] = None, contains: Optional[str] = None) -> Iterator[Dict]:
+    """
+    Stream the matching entries of one shard in file (= timestamp) order.
+
+    Args:
+        shard (Path): The shard file.
+        since (str, optional): ISO timestamp lower bound (inclusive).
+        until (str, optional): ISO timestamp upper bound (inclusive).
+        request_id (str, optional): Only entries of this request.
+        contains (str, optional): Only entries whose message contains this text.
+
+    Yields:
+        Dict: The log entries.
+    """
+    start = 0
+    if since:
+        entries = load_index(shard)
+        position = bisect.bisect_left([timestamp for timestamp, _ in entries], since)
+        if position > 0:
+            start = entries[position - 1][1]
+
+    with open(shard, "rb") as f:
+        f.seek(start)
+        for raw in f:
+            try:
+                entry = json.loads(raw)
+            except ValueError:
+                continue
+            if until and entry.get("timestamp", "") > until:
+                return
+            if _matches(entry, since, until, request_id, contains):
+                yield entry
+
+
+def query(log_dir: Path, levels: Optional[Iterable[str]] = None, since: Optional[str] = None, until: Optional[str] = None,
+          request_id: Optional[str] = None, contains: Optional[str] = None) -> Iterator[Dict]:
+    """
+    Merge every matching entry across all shards, ordered by timestamp.
+
+    Args:
+        log_dir (Path): The log directory.
+        levels (Iterable[str], optional): Levels to include. Defaults to all levels.
+        since (str, optional): ISO timestamp lower bound (inclusive).
+        until (str, optional): ISO timestamp upper bound (inclusive).
+        request_id (str, optional): Only entries of this request.
+        contains (str, optional): Only entries whose message contains this text.
+
+    Yields:
+        Dict: The log entries, oldest first.
+    """
+    streams = [iter_shard(shard, since, until, request_id, contains) for shard in list_shards(log_dir, levels)]
+    yield from heapq.merge(*streams, key=lambda entry: entry.get("timestamp", ""))
+
+
+def _read_tail(shard: Path, count: int, block_size: int = 64 * 1024) -> List[bytes]:
+    """
+    Read the last `count` complete lines of a file by seeking backwards from its end.
+    """
+    with open(shard, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        end = f.tell()
+        position, data = end, b""
+        while position > 0 and data.count(b"\n") <= count:
+            read = min(block_size, position)
+            position -= read
+            f.seek(position)
+            data = f.read(read) + data
+    lines = data.split(b"\n")
+    if position > 0:
+        lines = lines[1:]  # the first line is probably cut off
+    return [line for line in lines if line.strip()][-count:]
+
+
+def tail(log_dir: Path, count: int, levels: Optional[Iterable[str]] = None, request_id: Optional[str] = None,
+         contains: Optional[str] = None) -> List[Dict]:
+    """
+    Return the latest `count` matching entries across all shards, oldest first.
+
+    Only the end of each shard is read, unless filters make matching entries sparse.
+
+    Args:
+        log_dir (Path): The log directory.
+        count (int): Number of entries.
+        levels (Iterable[str], optional): Levels to include. Defaults to all levels.
+        request_id (str, optional): Only entries of this request.
+        contains (str, optional): Only entries whose message contains this text.
+
+    Returns:
+        List[Dict]: The entries.
+    """
+    latest: deque = deque(maxlen=count)
+    streams = []
+    for shard in list_shards(log_dir, levels):
+        if request_id or contains:
+            streams.append(iter_shard(shard, request_id=request_id, contains=contains))
+            continue
+        entries = []
+        for raw in _read_tail(shard, count):
+            try:
+                entries.append(json.loads(raw))
+            except ValueError:
+                continue
+        streams.append(entries)
+    latest.extend(heapq.merge(*streams, key=lambda entry: entry.get("timestamp", "")))
+    return list(latest)
+
+
+def follow(log_dir: Path, levels: Optional[Iterable[str]] = None, request_id: Optional[str] = None,
+           contains: Optional[str] = None, interval: float = 1.0) -> Iterator[Dict]:
+    """
+    Yield new matching entries as they are appended to any shard, including shards created later.
+    """
+    offsets = {shard: shard.stat().st_size for shard in list_shards(log_dir, levels)}
+    while True:
+        fresh = []
+        for shard in list_shards(log_dir, levels):
+            offset = offsets.get(shard, 0)
+            try:
+                size = shard.stat().st_size
+            except FileNotFoundError:
+                continue
+            if size <= offset:
+                continue
+            with open(shard, "rb") as f:
+                f.seek(offset)
+                for raw in f:
+                    if not raw.endswith(b"\n"):
+                        break
+                    offset += len(raw)
+                    try:
+                        entry = json.loads(raw)
+                    except ValueError:
+                        continue
+                    if _matches(entry, None, None, request_id, contains):
+                        fresh.append(entry)
+            offsets[shard] = offset
+        yield from sorted(fresh, key=lambda entry: entry.get("timestamp", ""))
+        time.sleep(interval)
+
+
+def _normalize_timestamp(value: Optional[str]) -> Optional[str]:
+    return datetime.fromisoformat(value).isoformat() if value else None
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--log-dir", default="logs")
+    parser.add_argument("--level", action="append", type=str.upper, choices=LEVELS, help="repeatable, defaults to every level")
+    parser.add_argument("--since", help="ISO timestamp, e.g. 2026-10-18T09:00")
+    parser.add_argument("--until", help="ISO timestamp")
+    parser.add_argument("--request-id")
+    parser.add_argument("--contains", help="substring of the message")
+    parser.add_argument("--tail", type=int, help="only the latest N entries")
+    parser.add_argument("--follow", action="store_true", help="keep printing new entries")
+    args = parser.parse_args(argv)
+
+    log_dir = Path(args.log_dir)
+    since, until = _normalize_timestamp(args.since), _normalize_timestamp(args.until)
+
+    if args.tail and not (since or until):
+        entries = tail(log_dir, args.tail, args.level, args.request_id, args.contains)
+    elif args.tail:
+        entries = deque(query(log_dir, args.level, since, until, args.request_id, args.contains), maxlen=args.tail)
+    else:
+        entries = query(log_dir, args.level, since, until, args.request_id, args.contains)
+
+    try:
+        for entry in entries:
+            sys.stdout.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        if args.follow:
+            for entry in follow(log_dir, args.level, args.request_id, args.contains):
+                sys.stdout.write(json.dumps(entry, ensure_ascii=False) + "\n")
+                sys.stdout.flush()
+    except (BrokenPipeError, KeyboardInterrupt):
+        pass
+
+
+if __name__ == "__main__":
+    main()
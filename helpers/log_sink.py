@@ -0,0 +1,181 @@
+import json
+import os
+import queue
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+_STOP = object()
+
+
+class JsonlLogSink:
+    """
+    Append-only JSON Lines log sink with a background writer.
+
+    Callers only pay for a `queue.put_nowait`; a daemon thread serializes entries, appends them
+    to `<directory>/<level>.<pid>.jsonl` in batches and rotates files by size and age. When the
+    queue is full, entries are dropped (and counted) rather than blocking the request path.
+
+    Every process (e.g. each uvicorn worker) writes its own shard, and each batch is appended
+    with a single O_APPEND write, so records are never interleaved or torn across workers.
+    `helpers.log_query` merges the shards back together.
+    """
+
+    def __init__(
+            self,
+            directory: Path,
+            max_bytes: int = 50 * 1024 * 1024,
+            rotate_seconds: float = 86400,
+            backup_count: int = 5,
+            batch_size: int = 256,
+            flush_interval: float = 0.5,
+            queue_size: int = 10000):
+        """
+        Args:
+            directory (Path): Where the log files live.
+            max_bytes (int, optional): Rotate a file once it reaches this size. Defaults to 50 MiB.
+            rotate_seconds (float, optional): Rotate a file once it has been open this long. Defaults to a day.
+            backup_count (int, optional): Rotated files kept per level. Defaults to 5.
+            batch_size (int, optional): Entries written per batch. Defaults to 256.
+            flush_interval (float, optional): Seconds a partial batch may wait before it is written. Defaults to 0.5.
+            queue_size (int, optional): Entries buffered before new ones are dropped. Defaults to 10000.
+        """
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.rotate_seconds = rotate_seconds
+        self.backup_count = backup_count
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue_size = queue_size
+        self._start()
+        if hasattr(os, "register_at_fork"):
+            # The writer thread and open files don't survive a fork, give the child its own
+            os.register_at_fork(after_in_child=self._start)
+
+    def _start(self) -> None:
+        self.pid = os.getpid()
+        self.dropped = 0
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=self.queue_size)
+        self._files: Dict[str, int] = {}
+        self._opened_at: Dict[str, float] = {}
+        self._thread = threading.Thread(target=self._run, name="jsonl-log-sink", daemon=True)
+        self._thread.start()
+
+    def emit(self, level: str, entry: Dict[str, Any]) -> None:
+        """
+        Queue an entry for writing. Never blocks.
+
+        Args:
+            level (str): The log level, which selects the file.
+            entry (Dict[str, Any]): The JSON serializable log record.
+        """
+        try:
+            self._queue.put_nowait((level, entry))
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self, timeout: Optional[float] = None) -> None:
+        """
+        Block until everything queued so far has been written.
+
+        Args:
+            timeout (float, optional): Give up waiting after this many seconds. Defaults to None.
+        """
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait(timeout)
+
+    def close(self, timeout: float = 5) -> None:
+        """
+        Write out the queue and stop the writer thread.
+
+        Args:
+            timeout (float, optional): Seconds to wait for the writer. Defaults to 5.
+        """
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join(timeout)
+
+    def _path(self, level: str) -> Path:
+        return self.directory / f"{level.lower()}.{self.pid}.jsonl"
+
+    def _file(self, level: str) -> int:
+        fd = self._files.get(level)
+        if fd is None:
+            path = self._path(level)
+            fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            self._files[level] = fd
+            stat = os.fstat(fd)
+            # An existing file keeps its age across restarts
+            self._opened_at[level] = stat.st_mtime if stat.st_size else time.time()
+        return fd
+
+    def _maybe_rotate(self, level: str) -> None:
+        fd = self._files.get(level)
+        if fd is None:
+            return
+        size = os.fstat(fd).st_size
+        too_big = size >= self.max_bytes
+        too_old = time.time() - self._opened_at[level] >= self.rotate_seconds
+        if not (too_big or too_old) or size == 0:
+            return
+
+        os.close(fd)
+        del self._files[level]
+        path = self._path(level)
+        path.rename(path.with_name(f"{path.stem}.{time.strftime('%Y%m%dT%H%M%S')}.{time.time_ns() % 1000000:06d}.jsonl"))
+
+        backups = sorted(self.directory.glob(f"{path.stem}.*.jsonl"))
+        for stale in backups[:-self.backup_count] if self.backup_count else backups:
+            stale.unlink(missing_ok=True)
+
+    def _write(self, batch: List[tuple[str, Dict[str, Any]]]) -> None:
+        lines: Dict[str, List[str]] = {}
+        for level, entry in batch:
+            lines.setdefault(level, []).append(json.dumps(entry, default=str, ensure_ascii=False) + "\n")
+        for level, level_lines in lines.items():
+            try:
+                self._maybe_rotate(level)
+                # One write per batch: O_APPEND makes it land whole at the end of the file
+                os.write(self._file(level), "".join(level_lines).encode("utf-8"))
+            except OSError as e:
+                self.dropped += len(level_lines)
+                print(f"Error writing {level} logs: {e}")
+
+    def _run(self) -> None:
+        batch: List[tuple[str, Dict[str, Any]]] = []
+        waiters: List[threading.Event] = []
+        stop = False
+        while not stop:
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                item = None
+
+            # Drain whatever else is already queued, up to a batch
+            while item is not None:
+                if item is _STOP:
+                    stop = True
+                elif isinstance(item, threading.Event):
+                    waiters.append(item)
+                else:
+                    batch.append(item)
+                if len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    item = None
+
+            if batch:
+                self._write(batch)
+                batch = []
+            for waiter in waiters:
+                waiter.set()
+            waiters = []
+
+        for fd in self._files.values():
+            os.close(fd)
+        self._files.clear()
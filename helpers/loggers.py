@@ -1,5 +1,9 @@
 import logging
+import atexit
 import json
+import sys
+from contextvars import ContextVar
+from functools import lru_cache
 from pathlib import Path
 from rich.console import Console
 from rich.theme import Theme
@@ -9,6 +13,26 @@ from rich.syntax import Syntax
 from datetime import datetime
 import os
 from typing import Optional, Dict, Any
+from helpers.log_sink import JsonlLogSink
+
+# Set per request by the middleware in main.py and stamped on every log record
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+LEVELS = {
+    'DEBUG': logging.DEBUG,
+    'INFO': logging.INFO,
+    'WARNING': logging.WARNING,
+    'ERROR': logging.ERROR,
+    'CRITICAL': logging.CRITICAL
+}
+
+@lru_cache(maxsize=1024)
+def _relative_path(filename: str) -> str:
+    """Path of a source file relative to the workspace root, memoized per file"""
+    try:
+        return os.path.relpath(filename, os.getcwd())
+    except ValueError:
+        return filename
 
 class Logger:
     """
@@ -18,9 +42,10 @@ class Logger:
     Features:
     - Rich console output with color-coded log levels and clickable file paths
     - Bounding boxes around log messages for better visibility
-    - JSON file logging for structured data
+    - Append-only JSON Lines file logging, written off the request path by a background thread
     - Caller information in logs
-    - Configurable log levels
+    - Configurable log levels, checked before any formatting work
+    - A production mode (LOG_MODE=prod) that writes compact JSON lines instead of rich panels
     - Thread-safe operations
     """
     
@@ -63,9 +88,13 @@ class Logger:
             "location": "dim"
         }))
         
+        # "dev" renders rich panels, "prod" writes one compact JSON line per record to stderr
+        self.mode = os.getenv("LOG_MODE", "dev").lower()
+
         # Create logger instance
         self.logger = logging.getLogger("app_logger")
         self.logger.setLevel(logging.DEBUG)
+        self.set_level(os.getenv("LOG_LEVEL", "INFO" if self.mode == "prod" else "DEBUG"))
         
         # Remove existing handlers to avoid duplicates
         self.logger.handlers.clear()
@@ -74,37 +103,30 @@ class Logger:
         self._setup_file_handlers()
     
     def _setup_file_handlers(self):
-        """Setup file handlers for different log levels"""
-        self.log_files = {
-            'INFO': self.log_dir / 'info.json',
-            'WARNING': self.log_dir / 'warning.json',
-            'ERROR': self.log_dir / 'error.json',
-            'CRITICAL': self.log_dir / 'critical.json',
-            'DEBUG': self.log_dir / 'debug.json'
-        }
-        
-        # Ensure log files exist
-        for log_file in self.log_files.values():
-            if not log_file.exists():
-                with open(log_file, 'w') as f:
-                    json.dump([], f)
+        """Setup the append-only sink that writes logs/<level>.<pid>.jsonl for each log level"""
+        self.sink = JsonlLogSink(
+            self.log_dir,
+            max_bytes=int(os.getenv("LOG_MAX_BYTES", 50 * 1024 * 1024)),
+            rotate_seconds=float(os.getenv("LOG_ROTATE_SECONDS", 86400)),
+            backup_count=int(os.getenv("LOG_BACKUP_COUNT", 5)),
+            flush_interval=float(os.getenv("LOG_FLUSH_INTERVAL", 0.5)),
+        )
+        # Don't lose the tail of the queue when the process exits
+        atexit.register(self.sink.close)
     
     def _get_caller_info(self) -> Dict[str, Any]:
-        """Get information about the caller"""
-        import inspect
+        """Get information about the caller from its frame, without reading any source files"""
         # Go up 3 frames to skip the logger's own methods
-        caller_frame = inspect.currentframe().f_back.f_back.f_back
-        if caller_frame:
-            caller_info = inspect.getframeinfo(caller_frame)
-            # Get relative path from workspace root
-            workspace_root = os.getcwd()
-            file_path = os.path.relpath(caller_info.filename, workspace_root)
-            return {
-                'file': file_path,
-                'line': caller_info.lineno,
-                'function': caller_info.function
-            }
-        return {}
+        try:
+            caller_frame = sys._getframe(3)
+        except ValueError:
+            return {}
+        code = caller_frame.f_code
+        return {
+            'file': _relative_path(code.co_filename),
+            'line': caller_frame.f_lineno,
+            'function': code.co_name
+        }
     
     def _format_message(self, message: str, caller_info: Dict[str, Any], **kwargs) -> str:
         """Format the log message with rich formatting"""
@@ -147,46 +169,52 @@ class Logger:
             expand=False
         )
     
-    def _log_to_file(self, level: str, message: str, **kwargs):
-        """Log message to appropriate JSON file"""
-        log_file = self.log_files[level]
-        
-        # Create log entry
+    def _log_to_file(self, level: str, message: str, caller_info: Dict[str, Any], **kwargs):
+        """Queue the message for the level's JSONL file; serialization and I/O happen on the sink's thread"""
         log_entry = {
             'timestamp': datetime.now().isoformat(),
             'level': level,
             'message': message,
+            'request_id': request_id_var.get(),
             'extra': kwargs,
-            **self._get_caller_info()
+            **caller_info
         }
-        
-        # Load existing logs and append new entry
-        try:
-            with open(log_file, 'r') as f:
-                logs = json.load(f)
-        except (json.JSONDecodeError, FileNotFoundError):
-            logs = []
-            
-        logs.append(log_entry)
-        
-        # Save updated logs
-        with open(log_file, 'w') as f:
-            json.dump(logs, f, indent=2)
+        self.sink.emit(level, log_entry)
+    
+    def _write_compact(self, level: str, message: str, caller_info: Dict[str, Any], **kwargs):
+        """Write the record as a single JSON line to stderr"""
+        record = {
+            'ts': datetime.now().isoformat(timespec='milliseconds'),
+            'level': level,
+            'msg': message,
+            'request_id': request_id_var.get(),
+            **caller_info
+        }
+        if kwargs:
+            record['extra'] = kwargs
+        sys.stderr.write(json.dumps(record, default=str, ensure_ascii=False) + "\n")
     
     def _log(self, level: str, message: str, **kwargs):
         """Internal logging method that handles both console and file logging"""
+        # Bail out before paying for caller lookup or formatting
+        if not self.logger.isEnabledFor(LEVELS[level]):
+            return
+
         # Get caller information
         caller_info = self._get_caller_info()
         
-        # Format the message with rich markup
-        formatted_message = self._format_message(message, caller_info, **kwargs)
-        
-        # Create and display the panel
-        panel = self._create_panel(level, formatted_message, caller_info)
-        self.console.print(panel)
+        if self.mode == "prod":
+            self._write_compact(level, message, caller_info, **kwargs)
+        else:
+            # Format the message with rich markup
+            formatted_message = self._format_message(message, caller_info, **kwargs)
+            
+            # Create and display the panel
+            panel = self._create_panel(level, formatted_message, caller_info)
+            self.console.print(panel)
         
         # Log to file
-        self._log_to_file(level, message, **kwargs)
+        self._log_to_file(level, message, caller_info, **kwargs)
     
     def info(self, message: str, **kwargs):
         """Log an info message"""
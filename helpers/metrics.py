@@ -0,0 +1,381 @@
+import json
+import math
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+LabelValues = Tuple[str, ...]
+
+DEFAULT_LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+
+
+class _Metric:
+    """
+    Shared bookkeeping of a labelled metric family.
+    """
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+
+class Counter(_Metric):
+    """
+    A monotonically increasing value per label set.
+    """
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def set_total(self, value: float, **labels: str) -> None:
+        """
+        Mirror a counter that is kept elsewhere (e.g. the response cache stats).
+        """
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def reset(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+    def snapshot(self) -> List:
+        with self._lock:
+            return [[list(key), value] for key, value in self._values.items()]
+
+
+class Gauge(Counter):
+    """
+    A value per label set that can go up and down, e.g. requests in flight.
+    """
+    kind = "gauge"
+
+    def dec(self, amount: float = 1, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: str) -> None:
+        self.set_total(value, **labels)
+
+
+class Histogram(_Metric):
+    """
+    Observations counted into cumulative buckets, plus their sum and count, per label set.
+    """
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (), buckets: Iterable[float] = DEFAULT_LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self._values: Dict[LabelValues, List] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][index] += 1
+                    break
+            state[1] += value
+            state[2] += 1
+
+    def reset(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+    def snapshot(self) -> List:
+        with self._lock:
+            return [[list(key), list(counts), total, count] for key, (counts, total, count) in self._values.items()]
+
+
+class MetricsRegistry:
+    """
+    Process-local metrics that are aggregated across uvicorn workers at scrape time.
+
+    Every process periodically writes a snapshot of its metrics to `<directory>/<pid>.json`
+    (atomically, and only when something changed). A scrape writes the scraping worker's own
+    snapshot and then merges all of them: counters and histograms are summed over every
+    snapshot, including those of workers that have exited, while gauges only count live workers.
+    """
+
+    def __init__(self, directory: Path, flush_interval: float = 1.0):
+        """
+        Args:
+            directory (Path): Where the per-process snapshots live.
+            flush_interval (float, optional): Seconds between background snapshot writes. Defaults to 1.0.
+        """
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.flush_interval = flush_interval
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], None]] = []
+        self._lock = threading.Lock()
+        self._start()
+        if hasattr(os, "register_at_fork"):
+            # A forked child starts counting from zero under its own pid
+            os.register_at_fork(after_in_child=self._after_fork)
+
+    def _start(self) -> None:
+        self.pid = os.getpid()
+        self._last_written: Optional[str] = None
+        # Serializes collectors and snapshot writes between the flush thread and scrapes;
+        # re-created here so a forked child never inherits it locked
+        self._snapshot_lock = threading.RLock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="metrics-snapshot", daemon=True)
+        self._thread.start()
+
+    def _after_fork(self) -> None:
+        for metric in list(self._metrics.values()):
+            metric.reset()
+        self._start()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+                    raise ValueError(f"Metric {metric.name} is already registered with a different type or labels")
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Iterable[str] = (), buckets: Iterable[float] = DEFAULT_LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def register_collector(self, collector: Callable[[], None]) -> None:
+        """
+        Add a callback run before every snapshot, to refresh metrics mirrored from elsewhere.
+
+        Args:
+            collector (Callable): Updates registered metrics, e.g. through `Counter.set_total`.
+        """
+        self._collectors.append(collector)
+
+    def snapshot(self) -> Dict:
+        """
+        Returns:
+            dict: The JSON serializable state of every metric in this process.
+        """
+        with self._snapshot_lock:
+            return self._snapshot()
+
+    def _snapshot(self) -> Dict:
+        for collector in self._collectors:
+            try:
+                collector()
+            except Exception as e:
+                print(f"Error collecting metrics: {str(e)}")
+        return {
+            "pid": self.pid,
+            "metrics": {
+                name: {
+                    "type": metric.kind,
+                    "help": metric.documentation,
+                    "labels": list(metric.labelnames),
+                    "buckets": list(metric.buckets[:-1]) if isinstance(metric, Histogram) else None,
+                    "samples": metric.snapshot(),
+                }
+                for name, metric in list(self._metrics.items())
+            },
+        }
+
+    def write_snapshot(self) -> None:
+        """
+        Atomically write this process's snapshot, skipping the write when nothing changed.
+        """
+        with self._snapshot_lock:
+            data = json.dumps(self._snapshot(), separators=(",", ":"))
+            if data == self._last_written:
+                return
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=f"{self.pid}-", suffix=".tmp")
+            try:
+                with os.fdopen(fd, "w") as f:
+                    f.write(data)
+                os.replace(tmp_path, self.directory / f"{self.pid}.json")
+            except BaseException:
+                Path(tmp_path).unlink(missing_ok=True)
+                raise
+            self._last_written = data
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.write_snapshot()
+            except Exception as e:
+                print(f"Error writing metrics snapshot: {str(e)}")
+
+    def close(self) -> None:
+        self._stop.set()
+        try:
+            self.write_snapshot()
+        except Exception as e:
+            print(f"Error writing metrics snapshot: {str(e)}")
+
+    def collect(self) -> Dict[str, Dict]:
+        """
+        Merge the snapshots of every worker.
+
+        Returns:
+            dict: {name: {"type", "help", "labels", "buckets", "samples": {label values: value}}}
+        """
+        try:
+            self.write_snapshot()
+        except Exception as e:
+            # Still serve the other snapshots, and this worker's last written one
+            print(f"Error writing metrics snapshot: {str(e)}")
+        merged: Dict[str, Dict] = {}
+        for path in sorted(self.directory.glob("*.json")):
+            try:
+                with open(path) as f:
+                    snapshot = json.load(f)
+            except (OSError, ValueError):
+                continue
+            alive = _pid_alive(snapshot.get("pid", 0))
+            for name, family in snapshot["metrics"].items():
+                if family["type"] == "gauge" and not alive:
+                    continue
+                target = merged.setdefault(name, {**family, "samples": {}})
+                for sample in family["samples"]:
+                    key = tuple(sample[0])
+                    if family["type"] == "histogram":
+                        counts, total, count = sample[1:]
+                        current = target["samples"].get(key)
+                        if current is None:
+                            target["samples"][key] = [list(counts), total, count]
+                        else:
+                            current[0] = [a + b for a, b in zip(current[0], counts)]
+                            current[1] += total
+                            current[2] += count
+                    else:
+                        target["samples"][key] = target["samples"].get(key, 0.0) + sample[1]
+        return merged
+
+    def render(self) -> str:
+        """
+        Render the merged metrics in the Prometheus text exposition format (version 0.0.4).
+
+        Returns:
+            str: The `/metrics` response body.
+        """
+        lines = []
+        for name, family in sorted(self.collect().items()):
+            lines.append(f"# HELP {name} {_escape_help(family['help'])}")
+            lines.append(f"# TYPE {name} {family['type']}")
+            labelnames = family["labels"]
+            for key, value in sorted(family["samples"].items()):
+                labels = list(zip(labelnames, key))
+                if family["type"] == "histogram":
+                    counts, total, count = value
+                    cumulative = 0
+                    for bound, bucket_count in zip(list(family["buckets"]) + ["+Inf"], counts):
+                        cumulative += bucket_count
+                        lines.append(f"{name}_bucket{_format_labels(labels + [('le', _format_value(bound))])} {cumulative}")
+                    lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(total)}")
+                    lines.append(f"{name}_count{_format_labels(labels)} {count}")
+                else:
+                    lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def clear_directory(directory: Path) -> None:
+        """
+        Remove the snapshots of a previous run. Call once in the parent before workers start,
+        otherwise counters of the last server process are added to the new one.
+        """
+        directory = Path(directory)
+        if not directory.exists():
+            return
+        for path in directory.glob("*"):
+            if path.suffix in (".json", ".tmp"):
+                path.unlink(missing_ok=True)
+
+
+def _pid_alive(pid: int) -> bool:
+    if pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    except OSError:
+        return False
+    return True
+
+
+def _escape_help(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("\n", "\\n")
+
+
+def _format_labels(labels: List[Tuple[str, str]]) -> str:
+    if not labels:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') for _, value in labels)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(labels, escaped)) + "}"
+
+
+def _format_value(value) -> str:
+    if isinstance(value, str):
+        return value
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value)) if abs(value) < 1e15 else repr(float(value))
+    return repr(float(value))
+
+
+def metrics_directory() -> Path:
+    return Path(os.getenv("METRICS_DIR", ".cache/metrics"))
+
+
+_registry: Optional[MetricsRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_registry() -> MetricsRegistry:
+    """
+    Get the process-wide metrics registry, configured from the environment on first use.
+
+    Environment:
+        METRICS_DIR: Where worker snapshots are shared. Defaults to ".cache/metrics".
+        METRICS_FLUSH_INTERVAL: Seconds between snapshot writes. Defaults to 1.
+
+    Returns:
+        MetricsRegistry: The shared registry.
+    """
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = MetricsRegistry(
+                    metrics_directory(),
+                    flush_interval=float(os.getenv("METRICS_FLUSH_INTERVAL", 1)),
+                )
+    return _registry
@@ -0,0 +1,257 @@
+import json
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+# States of the top-level object scanner
+_START, _KEY_OR_END, _KEY, _COLON, _VALUE, _STRING, _RAW, _COMMA_OR_END, _DONE = range(9)
+
+_WHITESPACE = " \t\r\n"
+_ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+# Runs of string characters that need no decoding
+_PLAIN_RUN = re.compile(r'[^"\\]+')
+
+
+class PartialJSONError(ValueError):
+    """Raised when the streamed text can't be the start of a JSON object."""
+    pass
+
+
+@dataclass
+class FieldEvent:
+    """
+    A change to one top-level field of the object being streamed.
+
+    Attributes:
+        field (str): The field name.
+        delta (str): Newly decoded text of a string value (empty for other events).
+        done (bool): True once the value is complete; `value` then holds it.
+        value (Any): The complete value when `done`, otherwise None.
+    """
+    field: str
+    delta: str = ""
+    done: bool = False
+    value: Any = None
+
+
+class PartialJSONParser:
+    """
+    Incremental parser for a JSON object that arrives in arbitrary chunks, e.g. streamed
+    structured output from an LLM.
+
+    String values of top-level fields are decoded as they arrive and reported as deltas, so a
+    UI can render `reasoning` while the model is still writing it. Other values (numbers,
+    nested objects, arrays) are reported once complete. Every character is looked at once,
+    so feeding a response token by token costs O(n) overall rather than re-parsing the prefix.
+    """
+
+    def __init__(self):
+        self._state = _START
+        self._key_parts: List[str] = []
+        self._key = ""
+        self._value_parts: List[str] = []
+        self._escape: Optional[str] = None
+        self._high_surrogate: Optional[int] = None
+        self._raw_depth = 0
+        self._raw_in_string = False
+        self._raw_escape = False
+        self.values: Dict[str, Any] = {}
+
+    @property
+    def done(self) -> bool:
+        return self._state == _DONE
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Returns:
+            dict: The fields seen so far, including the partial value of a string being streamed.
+        """
+        values = dict(self.values)
+        if self._state == _STRING and self._key:
+            values[self._key] = "".join(self._value_parts)
+        return values
+
+    def feed(self, chunk: str) -> List[FieldEvent]:
+        """
+        Consume the next piece of the JSON text.
+
+        Args:
+            chunk (str): Any slice of the text, it may split tokens, escapes or surrogate pairs.
+
+        Returns:
+            List[FieldEvent]: What changed, in order. String deltas are merged per call.
+
+        Raises:
+            PartialJSONError: If the text is not a JSON object.
+        """
+        events: List[FieldEvent] = []
+        i, n = 0, len(chunk)
+        while i < n:
+            state = self._state
+            if state == _STRING:
+                i = self._scan_string(chunk, i, events, value=True)
+                continue
+            if state == _KEY:
+                i = self._scan_string(chunk, i, events, value=False)
+                continue
+            if state == _RAW:
+                i = self._scan_raw(chunk, i, events)
+                continue
+
+            char = chunk[i]
+            i += 1
+            if char in _WHITESPACE:
+                continue
+            if state == _START:
+                if char != "{":
+                    raise PartialJSONError(f"Expected '{{' at the start of the object, got {char!r}")
+                self._state = _KEY_OR_END
+            elif state == _KEY_OR_END:
+                if char == "}":
+                    self._state = _DONE
+                elif char == '"':
+                    self._key_parts = []
+                    self._state = _KEY
+                else:
+                    raise PartialJSONError(f"Expected a field name, got {char!r}")
+            elif state == _COLON:
+                if char != ":":
+                    raise PartialJSONError(f"Expected ':' after {self._key!r}, got {char!r}")
+                self._state = _VALUE
+            elif state == _VALUE:
+                self._value_parts = []
+                if char == '"':
+                    self._state = _STRING
+                else:
+                    self._value_parts.append(char)
+                    self._raw_depth = 1 if char in "{[" else 0
+                    self._raw_in_string = False
+                    self._raw_escape = False
+                    self._state = _RAW
+            elif state == _COMMA_OR_END:
+                if char == ",":
+                    self._state = _KEY_OR_END
+                elif char == "}":
+                    self._state = _DONE
+                else:
+                    raise PartialJSONError(f"Expected ',' or '}}', got {char!r}")
+            elif state == _DONE:
+                raise PartialJSONError(f"Unexpected {char!r} after the end of the object")
+        return events
+
+    def _scan_string(self, chunk: str, i: int, events: List[FieldEvent], value: bool) -> int:
+        parts = self._value_parts if value else self._key_parts
+        start_len = len(parts)
+        n = len(chunk)
+        while i < n:
+            if self._escape is not None:
+                i = self._scan_escape(chunk, i, parts)
+                continue
+            match = _PLAIN_RUN.match(chunk, i)
+            if match:
+                parts.append(self._flush_surrogate() + match.group())
+                i = match.end()
+                continue
+            char = chunk[i]
+            i += 1
+            if char == "\\":
+                self._escape = ""
+            else:
+                parts.append(self._flush_surrogate())
+                if value:
+                    self._emit_delta(parts, start_len, events)
+                    text = "".join(parts)
+                    self.values[self._key] = text
+                    events.append(FieldEvent(self._key, done=True, value=text))
+                    self._value_parts = []
+                    self._state = _COMMA_OR_END
+                else:
+                    self._key = "".join(parts)
+                    self._state = _COLON
+                return i
+        if value:
+            self._emit_delta(parts, start_len, events)
+        return i
+
+    def _emit_delta(self, parts: List[str], start_len: int, events: List[FieldEvent]) -> None:
+        delta = "".join(parts[start_len:])
+        if not delta:
+            return
+        if events and not events[-1].done and events[-1].field == self._key:
+            events[-1].delta += delta
+        else:
+            events.append(FieldEvent(self._key, delta=delta))
+
+    def _scan_escape(self, chunk: str, i: int, parts: List[str]) -> int:
+        self._escape += chunk[i]
+        i += 1
+        escape = self._escape
+        if escape[0] != "u":
+            if escape not in _ESCAPES:
+                raise PartialJSONError(f"Invalid escape \\{escape}")
+            parts.append(self._flush_surrogate() + _ESCAPES[escape])
+            self._escape = None
+            return i
+        if len(escape) < 5:
+            return i
+        code = int(escape[1:], 16)
+        self._escape = None
+        if 0xD800 <= code <= 0xDBFF:
+            parts.append(self._flush_surrogate())
+            self._high_surrogate = code
+        elif 0xDC00 <= code <= 0xDFFF and self._high_surrogate is not None:
+            parts.append(chr(0x10000 + ((self._high_surrogate - 0xD800) << 10) + (code - 0xDC00)))
+            self._high_surrogate = None
+        else:
+            parts.append(self._flush_surrogate() + chr(code))
+        return i
+
+    def _flush_surrogate(self) -> str:
+        # A lone high surrogate that wasn't followed by its pair
+        if self._high_surrogate is None:
+            return ""
+        text = chr(self._high_surrogate)
+        self._high_surrogate = None
+        return text
+
+    def _scan_raw(self, chunk: str, i: int, events: List[FieldEvent]) -> int:
+        n = len(chunk)
+        start = i
+        while i < n:
+            char = chunk[i]
+            if self._raw_in_string:
+                if self._raw_escape:
+                    self._raw_escape = False
+                elif char == "\\":
+                    self._raw_escape = True
+                elif char == '"':
+                    self._raw_in_string = False
+            elif char == '"':
+                self._raw_in_string = True
+            elif char in "{[":
+                self._raw_depth += 1
+            elif char in "}]" and self._raw_depth > 0:
+                self._raw_depth -= 1
+                if self._raw_depth == 0:
+                    self._value_parts.append(chunk[start:i + 1])
+                    self._finish_raw(events)
+                    return i + 1
+            elif self._raw_depth == 0 and (char in ",}" or char in _WHITESPACE):
+                # End of a scalar; the delimiter is handled by the object scanner
+                self._value_parts.append(chunk[start:i])
+                self._finish_raw(events)
+                return i
+            i += 1
+        self._value_parts.append(chunk[start:i])
+        return i
+
+    def _finish_raw(self, events: List[FieldEvent]) -> None:
+        text = "".join(self._value_parts)
+        try:
+            value = json.loads(text)
+        except ValueError as e:
+            raise PartialJSONError(f"Invalid value for {self._key!r}: {e}")
+        self.values[self._key] = value
+        events.append(FieldEvent(self._key, done=True, value=value))
+        self._value_parts = []
+        self._state = _COMMA_OR_END
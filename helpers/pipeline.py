@@ -0,0 +1,143 @@
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from helpers.loggers import get_logger
+from helpers.tracing import span
+
+logger = get_logger()
+
+
+@dataclass
+class Stage:
+    """
+    One step of a pipeline.
+
+    Attributes:
+        name (str): Unique stage name.
+        func (Callable[[Dict[str, Any]], Awaitable[Any]]): Coroutine function called with the results
+            of its dependencies, keyed by stage name.
+        depends_on (Tuple[str, ...]): Stages that must succeed before this one starts.
+    """
+    name: str
+    func: Callable[[Dict[str, Any]], Awaitable[Any]]
+    depends_on: Tuple[str, ...] = ()
+
+
+@dataclass
+class StageOutcome:
+    """
+    What happened to a stage.
+
+    Attributes:
+        name (str): The stage name.
+        status (str): "succeeded", "failed", or "skipped" when a dependency didn't succeed.
+        depends_on (List[str]): The stage's dependencies.
+        started_ms (float | None): When it started, relative to the start of the pipeline.
+        duration_ms (float | None): How long it ran.
+        result (Any): Its return value once succeeded.
+        error (BaseException | None): The exception that failed it.
+    """
+    name: str
+    status: str = "pending"
+    depends_on: List[str] = field(default_factory=list)
+    started_ms: Optional[float] = None
+    duration_ms: Optional[float] = None
+    result: Any = None
+    error: Optional[BaseException] = None
+
+    @property
+    def succeeded(self) -> bool:
+        return self.status == "succeeded"
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Returns:
+            dict: The stage's status and timings, and its error once failed, without the result.
+        """
+        data = {
+            "status": self.status,
+            "depends_on": self.depends_on,
+            "started_ms": self.started_ms,
+            "duration_ms": self.duration_ms,
+        }
+        if self.error is not None:
+            data["error"] = str(self.error)
+            data["error_type"] = type(self.error).__name__
+        return data
+
+
+def _topological_order(stages: List[Stage]) -> List[Stage]:
+    by_name = {stage.name: stage for stage in stages}
+    if len(by_name) != len(stages):
+        raise ValueError("Pipeline stage names must be unique")
+    order: List[Stage] = []
+    state: Dict[str, str] = {}
+
+    def visit(stage: Stage, path: Tuple[str, ...]) -> None:
+        if state.get(stage.name) == "done":
+            return
+        if state.get(stage.name) == "visiting":
+            raise ValueError(f"Pipeline stages form a cycle: {' -> '.join(path + (stage.name,))}")
+        state[stage.name] = "visiting"
+        for dependency in stage.depends_on:
+            if dependency not in by_name:
+                raise ValueError(f"Stage '{stage.name}' depends on unknown stage '{dependency}'")
+            visit(by_name[dependency], path + (stage.name,))
+        state[stage.name] = "done"
+        order.append(stage)
+
+    for stage in stages:
+        visit(stage, ())
+    return order
+
+
+async def run_dag(stages: List[Stage]) -> Dict[str, StageOutcome]:
+    """
+    Run stages as a DAG: each starts as soon as all of its dependencies have succeeded, so
+    independent stages run concurrently. A failed stage doesn't stop the others, but every
+    stage depending on it is skipped.
+
+    Args:
+        stages (List[Stage]): The stages, in any order.
+
+    Returns:
+        Dict[str, StageOutcome]: The outcome of every stage, in dependency order.
+
+    Raises:
+        ValueError: If a dependency is unknown or the stages form a cycle.
+    """
+    order = _topological_order(stages)
+    outcomes = {stage.name: StageOutcome(stage.name, depends_on=list(stage.depends_on)) for stage in order}
+    tasks: Dict[str, asyncio.Task] = {}
+    pipeline_start = time.perf_counter()
+
+    async def run(stage: Stage) -> StageOutcome:
+        outcome = outcomes[stage.name]
+        dependencies = await asyncio.gather(*(tasks[dependency] for dependency in stage.depends_on))
+        if not all(dependency.succeeded for dependency in dependencies):
+            outcome.status = "skipped"
+            return outcome
+
+        start = time.perf_counter()
+        outcome.started_ms = round((start - pipeline_start) * 1000, 1)
+        try:
+            with span(f"stage_{stage.name}"):
+                outcome.result = await stage.func({dependency.name: dependency.result for dependency in dependencies})
+            outcome.status = "succeeded"
+        except Exception as e:
+            logger.error(f"Pipeline stage {stage.name} failed: {e}")
+            outcome.status = "failed"
+            outcome.error = e
+        outcome.duration_ms = round((time.perf_counter() - start) * 1000, 1)
+        return outcome
+
+    # Dependencies come first in `order`, so their tasks exist by the time a dependent is created
+    for stage in order:
+        tasks[stage.name] = asyncio.create_task(run(stage), name=f"stage-{stage.name}")
+    try:
+        await asyncio.gather(*tasks.values())
+    finally:
+        for task in tasks.values():
+            task.cancel()
+    return outcomes
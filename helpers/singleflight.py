@@ -0,0 +1,83 @@
+import asyncio
+import hashlib
+import json
+from typing import Any, Awaitable, Callable, Dict
+
+
+def make_flight_key(*parts: Any) -> str:
+    """
+    Build a compact key identifying a call from its (JSON serializable) arguments.
+
+    Args:
+        *parts: The values that make two calls identical.
+
+    Returns:
+        str: A hex SHA-256 digest of the parts.
+    """
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+class _Flight:
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent identical coroutine calls into a single execution.
+
+    The first caller for a key starts the work as its own task; every caller that arrives
+    while it is still running awaits that same task and receives the same result or exception.
+    A caller being cancelled (e.g. a client disconnecting) never cancels the shared work for
+    the others; the work is only cancelled once every caller waiting on it has gone away.
+    """
+
+    def __init__(self):
+        self._flights: Dict[str, _Flight] = {}
+
+    def in_flight(self) -> int:
+        """
+        Returns:
+            int: Number of distinct calls currently running.
+        """
+        return len(self._flights)
+
+    async def do(self, key: str, func: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+        """
+        Run `func(*args, **kwargs)` unless an identical call is already running, then await it.
+
+        Args:
+            key (str): Identifies identical calls.
+            func (Callable[..., Awaitable[Any]]): The coroutine function doing the work.
+            *args: Positional arguments for `func`.
+            **kwargs: Keyword arguments for `func`.
+
+        Returns:
+            Any: The result of the shared call.
+
+        Raises:
+            Exception: Whatever the shared call raised.
+        """
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = _Flight(asyncio.ensure_future(func(*args, **kwargs)))
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda task: self._forget(key, flight))
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        except asyncio.CancelledError:
+            if not flight.task.done() and flight.waiters == 1:
+                flight.task.cancel()
+            raise
+        finally:
+            flight.waiters -= 1
+
+    def _forget(self, key: str, flight: _Flight) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+        # Mark the exception as retrieved in case every waiter was cancelled before it landed
+        if not flight.task.cancelled():
+            flight.task.exception()
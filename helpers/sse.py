@@ -0,0 +1,16 @@
+import json
+from typing import Any
+
+
+def format_sse(event: str, data: Any) -> str:
+    """
+    Encode one Server-Sent Event.
+
+    Args:
+        event (str): The event name, dispatched to `addEventListener(event, ...)` on the client.
+        data (Any): A JSON serializable payload.
+
+    Returns:
+        str: The event, terminated by the blank line that ends an SSE message.
+    """
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
@@ -0,0 +1,173 @@
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional
+
+
+@dataclass
+class Span:
+    """
+    One timed stage of a request.
+
+    Attributes:
+        name (str): Stage name, e.g. "pdf_open" or "llm_call".
+        start_ms (float): Offset from the start of the request.
+        duration_ms (float): How long the stage took.
+    """
+    name: str
+    start_ms: float
+    duration_ms: float
+
+
+@dataclass
+class Trace:
+    """
+    The spans recorded while handling one request.
+
+    Spans can be recorded from any task or thread the request fans out to, since the trace
+    travels with the context (asyncio tasks and `asyncio.to_thread` both copy it).
+    """
+    method: str
+    path: str
+    request_id: Optional[str] = None
+    started_at: float = field(default_factory=time.time)
+    spans: List[Span] = field(default_factory=list)
+    total_ms: float = 0.0
+    status_code: Optional[int] = None
+    _origin: float = field(default_factory=time.perf_counter, repr=False)
+
+    def add(self, name: str, start: float, end: float) -> None:
+        self.spans.append(Span(name, round((start - self._origin) * 1000, 3), round((end - start) * 1000, 3)))
+
+    def finish(self, status_code: int) -> None:
+        self.total_ms = round((time.perf_counter() - self._origin) * 1000, 3)
+        self.status_code = status_code
+
+    def durations(self) -> Dict[str, float]:
+        """
+        Returns:
+            Dict[str, float]: Total milliseconds per stage name, in order of first occurrence.
+        """
+        totals: Dict[str, float] = {}
+        for recorded in list(self.spans):
+            totals[recorded.name] = totals.get(recorded.name, 0.0) + recorded.duration_ms
+        return totals
+
+    def server_timing(self) -> str:
+        """
+        Render the trace as a `Server-Timing` header value.
+
+        Returns:
+            str: e.g. `pdf_open;dur=1.2, llm_call;dur=812.4, total;dur=830.1`
+        """
+        entries = [f"{name};dur={duration:.1f}" for name, duration in self.durations().items()]
+        entries.append(f"total;dur={self.total_ms:.1f}")
+        return ", ".join(entries)
+
+    def to_dict(self) -> Dict:
+        return {
+            "request_id": self.request_id,
+            "method": self.method,
+            "path": self.path,
+            "status_code": self.status_code,
+            "started_at": self.started_at,
+            "total_ms": self.total_ms,
+            "spans": [{"name": s.name, "start_ms": s.start_ms, "duration_ms": s.duration_ms} for s in list(self.spans)],
+        }
+
+
+current_trace: ContextVar[Optional[Trace]] = ContextVar("current_trace", default=None)
+
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    """
+    Time a stage of the current request. Does nothing outside a traced request.
+
+    Args:
+        name (str): The stage name.
+    """
+    trace = current_trace.get()
+    if trace is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.add(name, start, time.perf_counter())
+
+
+def _percentile(values: List[float], percentile: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(percentile / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+class TraceBuffer:
+    """
+    A bounded, thread-safe ring buffer of the most recent finished traces.
+    """
+
+    def __init__(self, size: int):
+        self._traces: deque = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def record(self, trace: Trace) -> None:
+        with self._lock:
+            self._traces.append(trace)
+
+    def recent(self, limit: int = 50, path: Optional[str] = None, min_ms: float = 0) -> List[Dict]:
+        """
+        Args:
+            limit (int, optional): Maximum traces returned. Defaults to 50.
+            path (str, optional): Only traces of this path. Defaults to None.
+            min_ms (float, optional): Only traces at least this slow. Defaults to 0.
+
+        Returns:
+            List[Dict]: Matching traces, newest first.
+        """
+        with self._lock:
+            traces = list(self._traces)
+        matching = [t for t in reversed(traces) if (path is None or t.path == path) and t.total_ms >= min_ms]
+        return [t.to_dict() for t in matching[:limit]]
+
+    def summary(self, path: Optional[str] = None) -> Dict[str, Dict[str, Dict[str, float]]]:
+        """
+        Latency percentiles per path and stage over the buffered traces.
+
+        Args:
+            path (str, optional): Only summarize this path. Defaults to None.
+
+        Returns:
+            dict: {path: {stage: {"count", "p50", "p95", "p99"}}}, with the whole request under "total".
+        """
+        with self._lock:
+            traces = list(self._traces)
+        samples: Dict[str, Dict[str, List[float]]] = {}
+        for trace in traces:
+            if path is not None and trace.path != path:
+                continue
+            stages = samples.setdefault(trace.path, {})
+            stages.setdefault("total", []).append(trace.total_ms)
+            for name, duration in trace.durations().items():
+                stages.setdefault(name, []).append(duration)
+        return {
+            trace_path: {
+                name: {
+                    "count": len(values),
+                    "p50": _percentile(values, 50),
+                    "p95": _percentile(values, 95),
+                    "p99": _percentile(values, 99),
+                }
+                for name, values in stages.items()
+            }
+            for trace_path, stages in samples.items()
+        }
+
+
+trace_buffer = TraceBuffer(int(os.getenv("TRACE_BUFFER_SIZE", 1000)))
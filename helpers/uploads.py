@@ -0,0 +1,160 @@
+import hashlib
+import os
+import tempfile
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+from fastapi import Request
+from python_multipart.multipart import MultipartParser, parse_options_header
+
+# Small form fields (provider, selected_model, ...) are held in memory, so keep them small
+MAX_FIELD_BYTES = 4096
+
+
+class UploadTooLargeError(Exception):
+    """Raised when an upload exceeds the configured size cap."""
+    pass
+
+
+class InvalidUploadError(Exception):
+    """Raised when the request isn't a multipart PDF upload."""
+    pass
+
+
+@dataclass
+class SpooledUpload:
+    """
+    A PDF that was streamed to a temporary file.
+
+    Attributes:
+        path (str): Location of the temporary file. Remove it with `cleanup` once processed.
+        sha256 (str): Hex SHA-256 of the file, computed while it streamed in.
+        size (int): Size in bytes.
+        filename (str | None): The client supplied file name.
+        fields (Dict[str, str]): The other (non-file) form fields.
+    """
+    path: str
+    sha256: str
+    size: int
+    filename: Optional[str] = None
+    fields: Dict[str, str] = field(default_factory=dict)
+
+    def cleanup(self) -> None:
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+
+async def stream_pdf_upload(request: Request, max_bytes: int, file_field: str = "file") -> SpooledUpload:
+    """
+    Stream a multipart/form-data request body straight to a temporary file.
+
+    The body is consumed chunk by chunk as it arrives: the file part is written to disk and
+    hashed incrementally, and the upload is aborted as soon as it exceeds `max_bytes`, so memory
+    use stays constant no matter how large the document is.
+
+    Args:
+        request (Request): The incoming request.
+        max_bytes (int): Maximum size of the uploaded file.
+        file_field (str, optional): Name of the form field holding the PDF. Defaults to "file".
+
+    Returns:
+        SpooledUpload: The spooled file with its hash, size and the other form fields.
+
+    Raises:
+        UploadTooLargeError: If the file (or the declared body) is larger than `max_bytes`.
+        InvalidUploadError: If the body isn't multipart, has no file field, or the file isn't a PDF.
+    """
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    boundary = params.get(b"boundary")
+    if content_type != b"multipart/form-data" or not boundary:
+        raise InvalidUploadError("Expected a multipart/form-data body")
+
+    declared_length = request.headers.get("content-length")
+    # Leave room for the multipart envelope and the small form fields
+    if declared_length and int(declared_length) > max_bytes + 64 * 1024:
+        raise UploadTooLargeError(f"Upload exceeds the {max_bytes} byte limit")
+
+    part_headers: Dict[bytes, bytes] = {}
+    header_field: List[bytes] = []
+    header_value: List[bytes] = []
+    current = {"name": None, "filename": None}
+    pending: List[tuple[str, bytes]] = []
+
+    def on_part_begin():
+        part_headers.clear()
+
+    def on_header_field(data: bytes, start: int, end: int):
+        header_field.append(data[start:end])
+
+    def on_header_value(data: bytes, start: int, end: int):
+        header_value.append(data[start:end])
+
+    def on_header_end():
+        part_headers[b"".join(header_field).lower()] = b"".join(header_value)
+        header_field.clear()
+        header_value.clear()
+
+    def on_headers_finished():
+        _, disposition = parse_options_header(part_headers.get(b"content-disposition", b""))
+        current["name"] = disposition.get(b"name", b"").decode("utf-8", "replace")
+        filename = disposition.get(b"filename")
+        if current["name"] == file_field and filename is not None:
+            current["filename"] = filename.decode("utf-8", "replace")
+
+    def on_part_data(data: bytes, start: int, end: int):
+        pending.append((current["name"], data[start:end]))
+
+    parser = MultipartParser(boundary, {
+        "on_part_begin": on_part_begin,
+        "on_header_field": on_header_field,
+        "on_header_value": on_header_value,
+        "on_header_end": on_header_end,
+        "on_headers_finished": on_headers_finished,
+        "on_part_data": on_part_data,
+    })
+
+    sha = hashlib.sha256()
+    size = 0
+    fields: Dict[str, bytearray] = {}
+    saw_file = False
+    fd, path = tempfile.mkstemp(suffix=".pdf", dir=os.getenv("UPLOAD_DIR"))
+    try:
+        with os.fdopen(fd, "wb") as spool:
+            async for chunk in request.stream():
+                parser.write(chunk)
+                for name, data in pending:
+                    if name == file_field:
+                        saw_file = True
+                        size += len(data)
+                        if size > max_bytes:
+                            raise UploadTooLargeError(f"Upload exceeds the {max_bytes} byte limit")
+                        sha.update(data)
+                        spool.write(data)
+                    else:
+                        value = fields.setdefault(name, bytearray())
+                        value += data
+                        if len(value) > MAX_FIELD_BYTES:
+                            raise InvalidUploadError(f"Form field '{name}' is too large")
+                pending.clear()
+            parser.finalize()
+
+        if not saw_file or size == 0:
+            raise InvalidUploadError(f"No file was uploaded in the '{file_field}' field")
+        with open(path, "rb") as f:
+            if not f.read(5) == b"%PDF-":
+                raise InvalidUploadError("The uploaded file is not a PDF")
+    except BaseException:
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+        raise
+
+    return SpooledUpload(
+        path=path,
+        sha256=sha.hexdigest(),
+        size=size,
+        filename=current["filename"],
+        fields={name: bytes(value).decode("utf-8", "replace") for name, value in fields.items()},
+    )
@@ -1,12 +1,42 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from contextlib import asynccontextmanager
 import uvicorn
 import os
+import uuid
 from fastapi.middleware.cors import CORSMiddleware
 from routes.research_routes import router as research_routers
 from routes.resource_routes import router as resource_routers
+from routes.debug_routes import router as debug_routers
+from routes.metrics_routes import router as metrics_routers
+from routes.job_routes import router as job_routers
+from routes.pipeline_routes import router as pipeline_routers
+from routes.reference_routes import router as reference_routers
+from routes.document_routes import router as document_routers
 from enums.environmet_variables import EnvironmentVariables
+from providers.manager import aclose_clients
+from helpers.helpers import shutdown_extraction_pool
+from helpers.loggers import request_id_var, get_logger
+from helpers.tracing import Trace, current_trace, trace_buffer
+from helpers.metrics import get_registry, metrics_directory, MetricsRegistry
+from helpers.jobs import get_job_queue
+from helpers.link_fetcher import aclose_link_fetcher
+from services.job_service import JOB_HANDLERS, JOB_ABANDON_HOOKS
 
-app = FastAPI() 
+logger = get_logger()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await get_job_queue().start(JOB_HANDLERS, JOB_ABANDON_HOOKS)
+    yield
+    await get_job_queue().stop()
+    await aclose_clients()
+    await aclose_link_fetcher()
+    shutdown_extraction_pool()
+    get_registry().close()
+
+app = FastAPI(lifespan=lifespan) 
+
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "true").lower() == "true"
 
 app.add_middleware(
     CORSMiddleware,
@@ -16,12 +46,52 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def trace_request(request: Request, call_next):
+    # Registered before assign_request_id so it runs inside it and sees the request id
+    if not TRACING_ENABLED:
+        return await call_next(request)
+    trace = Trace(method=request.method, path=request.url.path, request_id=request_id_var.get())
+    token = current_trace.set(trace)
+    try:
+        response = await call_next(request)
+    finally:
+        current_trace.reset(token)
+    trace.finish(response.status_code)
+    response.headers["Server-Timing"] = trace.server_timing()
+    trace_buffer.record(trace)
+    return response
+
+@app.middleware("http")
+async def assign_request_id(request: Request, call_next):
+    request_id = request.headers.get("x-request-id") or uuid.uuid4().hex
+    token = request_id_var.set(request_id)
+    try:
+        response = await call_next(request)
+    finally:
+        request_id_var.reset(token)
+    response.headers["X-Request-ID"] = request_id
+    return response
+
 app.include_router(research_routers, prefix="/api")
 app.include_router(resource_routers, prefix="/api")
+app.include_router(reference_routers, prefix="/api")
+app.include_router(pipeline_routers, prefix="/api")
+app.include_router(document_routers, prefix="/api")
+app.include_router(job_routers, prefix="/api")
+app.include_router(debug_routers, prefix="/api")
+# Prometheus scrapes /metrics at the root
+app.include_router(metrics_routers)
 
 if __name__ == "__main__":
     try:
-        uvicorn.run(app, host="0.0.0.0", port=8000, timeout_keep_alive=120, workers = max(int(EnvironmentVariables.WORKERS.value_from_env),4))
+        # Counters are summed over every snapshot in the directory, drop the last run's before workers start
+        MetricsRegistry.clear_directory(metrics_directory())
+        workers = max(int(EnvironmentVariables.WORKERS.value_from_env),4)
+        if workers > 1 and not os.getenv("JOB_REDIS_URL"):
+            logger.warning("Jobs are kept in memory per worker, polls can land on a worker that doesn't know the job; set JOB_REDIS_URL")
+        # Workers are separate processes, so uvicorn needs the import string rather than the app object
+        uvicorn.run("main:app", host="0.0.0.0", port=8000, timeout_keep_alive=120, workers = workers)
     except Exception as e:
         print(f"Falied to Start Server: {e}")
         raise e
\ No newline at end of file
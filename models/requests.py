@@ -1,23 +1,29 @@
 from pydantic import BaseModel
 from typing import Optional, List
+from enums.cache_mode import CacheMode
 
 class ResearchRequest(BaseModel):
     user_query: str
-    data: str
+    data: Optional[str] = None
+    doc_id: Optional[str] = None
     instructions: Optional[str] | None
     provider: Optional[str] | None
     selected_model: Optional[str] | None
+    cache_mode: CacheMode = CacheMode.USE
 
 class ResourceRequest(BaseModel):
     pdf_path: str
     summarization_instructions: Optional[str] | None
     provider: Optional[str] | None
     selected_model: Optional[str] | None
+    cache_mode: CacheMode = CacheMode.USE
 
 class ReferenceScouterRequest(BaseModel):
-    references: List[str]
+    pdf_path: Optional[str] = None
+    references: Optional[List[str]] = None
     provider: Optional[str] | None
     selected_model: Optional[str] | None
+    cache_mode: CacheMode = CacheMode.USE
 
 class QandARequest(BaseModel):
     context: str
@@ -30,4 +36,17 @@ class AudioGenerationRequest(BaseModel):
     audio_instructions: Optional[str] | None
     provider: Optional[str] | None
     selected_model: Optional[str] | None
-    conversation_style: Optional[str] | None
\ No newline at end of file
+    conversation_style: Optional[str] | None
+
+class PipelineRequest(BaseModel):
+    pdf_path: str
+    stages: Optional[List[str]] = None
+    provider: Optional[str] | None
+    selected_model: Optional[str] | None
+    audio_model: Optional[str] = None
+    cache_mode: CacheMode = CacheMode.USE
+
+class DocumentRequest(BaseModel):
+    text: Optional[str] = None
+    pdf_path: Optional[str] = None
+    title: Optional[str] = None
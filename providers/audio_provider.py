@@ -1,11 +1,15 @@
 from pathlib import Path
 from openai import OpenAI
+from helpers.documents import normalize_text
+from helpers.tracing import span
 import base64
 
 class AudioProvider():
 
-    def __init__(self, model: str, model_name: str, agent_name: str, role: str, task: str, instructions: str, user_input: str, temperature: float = 0, examples: list = None) -> None:
+    def __init__(self, model: str, model_name: str, agent_name: str, role: str, task: str, instructions: str, user_input: str, temperature: float = 0, examples: list = None,
+                 async_model: str = None, voice: str = "alloy") -> None:
         self.model = model
+        self.async_model = async_model
         self.model_name = model_name
         self.agent_name = agent_name
         self.role = role
@@ -14,6 +18,7 @@ class AudioProvider():
         self.user_input = user_input
         self.temperature = temperature
         self.examples = examples
+        self.voice = voice
 
     def generate_system_prompt(self):
         """
@@ -38,6 +43,31 @@ class AudioProvider():
         
         return system_prompt
     
+    def generate_user_input(self, **kwargs):
+        """
+        Format the user input template with the provided kwargs, normalized to ASCII like `BaseProvider.generate_user_input`.
+
+        Args:
+            **kwargs: Values for the placeholders in the template.
+
+        Returns:
+            str: The formatted user input.
+        """
+        normalized_kwargs = {k: normalize_text(v) for k, v in kwargs.items()}
+        return self.user_input.format(**normalized_kwargs)
+
+    def _messages(self, prompt: str):
+        return [
+            {
+                "role": "system",
+                "content": self.generate_system_prompt()
+            },
+            {
+                "role": "user",
+                "content": prompt
+            }
+        ]
+
     def generate_audio(self, prompt: str):
         """
         Generate audio from the LLM, with the given prompt as input. 
@@ -50,21 +80,32 @@ class AudioProvider():
         """
 
         audio_output = self.model.chat.completions.create(
-            model="gpt-4o-audio-preview",
+            model=self.model_name,
             modalities=["text", "audio"],
-            audio={"voice": "alloy", "format": "wav"},
-            messages=[
-                {
-                    "role": "system",
-                    "content": self.generate_system_prompt()
-                },
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ]
+            audio={"voice": self.voice, "format": "wav"},
+            messages=self._messages(prompt)
         )
 
         wav_bytes = base64.b64decode(audio_output.choices[0].message.audio.data)
 
-        return wav_bytes
\ No newline at end of file
+        return wav_bytes
+
+    async def agenerate_audio(self, prompt: str):
+        """
+        Asynchronously generate audio from the LLM through the async client.
+
+        Args:
+            prompt (str): The prompt to generate audio from.
+
+        Returns:
+            bytes: The generated WAV audio.
+        """
+        with span("audio_generation"):
+            audio_output = await self.async_model.chat.completions.create(
+                model=self.model_name,
+                modalities=["text", "audio"],
+                audio={"voice": self.voice, "format": "wav"},
+                messages=self._messages(prompt)
+            )
+
+        return base64.b64decode(audio_output.choices[0].message.audio.data)
\ No newline at end of file
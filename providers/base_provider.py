@@ -1,20 +1,47 @@
 from abc import ABC, abstractmethod
+import asyncio
 import time
 import os
-from unicodedata import normalize
+from dataclasses import dataclass
+from typing import AsyncIterator, Optional
+from pydantic import ValidationError
+from enums.cache_mode import CacheMode
+from providers.cache import get_response_cache, make_cache_key
+from providers.errors import ContextLengthExceededError, SchemaValidationError
+from providers.retry import get_retry_policy, get_retry_budget, get_circuit_breaker
+from providers.metrics import record_failure, record_retry
+from providers.rate_limit import get_rate_limiter
+from helpers.chunking import estimate_tokens
+from helpers.documents import normalize_text
+from helpers.tracing import span
+
+@dataclass
+class StreamEvent:
+    """
+    One item of `BaseProvider.astream_response`.
+
+    Attributes:
+        delta (str): Newly generated response text.
+        result (tuple, optional): Set on the last event only: the same tuple `generate_response` returns.
+    """
+    delta: str = ""
+    result: Optional[tuple] = None
 
 class BaseProvider(ABC):
     """
     Base class for all LLM providers.
     """
+    # Name used for rate limit configuration, matching the key in `providers.manager.PROVIDERS`
+    provider_name = ""
     def __init__(
             self, 
             model, model_name: str, agent_name: str, 
             role: str, task: str, instructions: str, 
             structured_outputs: bool, response_structure: str, 
-            user_input: str, temperature: float = 0, examples: list = None ):
+            user_input: str, temperature: float = 0, examples: list = None, async_model = None ):
         
         self.model = model
+        self.async_model = async_model
         self.model_name = model_name
         self.agent_name = agent_name
         self.role = role
@@ -59,6 +86,7 @@ class BaseProvider(ABC):
         
         This method formats the stored user input template with the provided keyword arguments.
         It also performs encoding validation to prevent any Unicode/encoding related errors.
+        Values that are already `NormalizedText` (e.g. stored documents) are used as is.
 
         Args:
             **kwargs: Keyword arguments used to format the user input template.
@@ -72,42 +100,285 @@ class BaseProvider(ABC):
             KeyError: If required template placeholders are missing from kwargs.
         """
         
-        normalized_template = normalize('NFKC', self.user_input).encode('ascii', 'ignore').decode('ascii')
-        normalized_kwargs = {
-            k: normalize('NFKC', str(v)).encode('ascii', 'ignore').decode('ascii') for k, v in kwargs.items()
-        }
+        normalized_template = normalize_text(self.user_input)
+        normalized_kwargs = {k: normalize_text(v) for k, v in kwargs.items()}
         
         return normalized_template.format(**normalized_kwargs)
     
-    def retry_request(self, func, attempt: int = 1, max_retries: int = 3, **kwargs):
+    def build_result(self, response_content: str, prompt_tokens: int, completion_tokens: int, total_tokens: int, start_time: float):
+        """
+        Assemble the tuple returned by `generate_response` from raw response content.
+
+        Args:
+            response_content (str): The raw text returned by the model.
+            prompt_tokens (int): Number of prompt tokens used.
+            completion_tokens (int): Number of completion tokens used.
+            total_tokens (int): Total tokens used.
+            start_time (float): The `time.time()` at which the request started.
+
+        Returns:
+            tuple: (response, prompt_tokens, completion_tokens, total_tokens, response_time), where
+                response is the validated `response_structure` when structured outputs are enabled.
+
+        Raises:
+            SchemaValidationError: If the content doesn't match the expected schema.
         """
-        Retry a failed request with exponential backoff.
+        response_time = round(time.time() - start_time, 2)
+
+        if self.structured_outputs:
+            try:
+                with span("schema_validation"):
+                    structured_response = self.response_structure.model_validate_json(response_content)
+                return structured_response, prompt_tokens, completion_tokens, total_tokens, response_time
+            except ValidationError as e:
+                raise SchemaValidationError(f"JSON response: {e} Dosen't match the expected schema")
+
+        return response_content, prompt_tokens, completion_tokens, total_tokens, response_time
+
+    def response_cache_key(self, system_prompt: str, user_input: str) -> str:
+        """
+        Build the response cache key for a rendered prompt.
 
         Args:
-            func: The function to retry
-            max_retries (int, optional): Maximum number of retry attempts. Defaults to 3.
-            **kwargs: Additional keyword arguments passed to the function.
+            system_prompt (str): The rendered system prompt.
+            user_input (str): The normalized user input.
+
+        Returns:
+            str: The cache key.
+        """
+        return make_cache_key(
+            provider=type(self).__name__,
+            model_name=self.model_name,
+            system_prompt=system_prompt,
+            user_input=user_input,
+            temperature=self.temperature,
+            response_structure=self.response_structure,
+        )
+
+    def cache_lookup(self, cache_key: str, cache_mode: CacheMode = CacheMode.USE):
+        """
+        Look up a cached response payload.
+
+        Args:
+            cache_key (str): Key from `response_cache_key`.
+            cache_mode (CacheMode, optional): Per-request cache control. Defaults to CacheMode.USE.
+
+        Returns:
+            dict | None: The cached payload, or None on a miss, bypass or refresh.
+        """
+        cache = get_response_cache()
+        if cache is None:
+            return None
+        if CacheMode(cache_mode) is not CacheMode.USE:
+            cache.record_bypass()
+            return None
+        return cache.get(cache_key)
+
+    async def acache_lookup(self, cache_key: str, cache_mode: CacheMode = CacheMode.USE):
+        """
+        Awaitable counterpart of `cache_lookup`.
+        """
+        cache = get_response_cache()
+        if cache is None:
+            return None
+        if CacheMode(cache_mode) is not CacheMode.USE:
+            cache.record_bypass()
+            return None
+        return await cache.aget(cache_key)
+
+    def cache_store(self, cache_key: str, payload: dict, cache_mode: CacheMode = CacheMode.USE) -> None:
+        """
+        Store a response payload unless the request bypasses the cache.
+
+        Args:
+            cache_key (str): Key from `response_cache_key`.
+            payload (dict): The response content and token counts.
+            cache_mode (CacheMode, optional): Per-request cache control. Defaults to CacheMode.USE.
+        """
+        cache = get_response_cache()
+        if cache is not None and CacheMode(cache_mode) is not CacheMode.BYPASS:
+            cache.set(cache_key, payload)
+
+    async def acache_store(self, cache_key: str, payload: dict, cache_mode: CacheMode = CacheMode.USE) -> None:
+        """
+        Awaitable counterpart of `cache_store`.
+        """
+        cache = get_response_cache()
+        if cache is not None and CacheMode(cache_mode) is not CacheMode.BYPASS:
+            await cache.aset(cache_key, payload)
+
+    @property
+    def circuit_breaker(self):
+        return get_circuit_breaker(f"{type(self).__name__}:{self.model_name}")
+
+    def estimate_request_tokens(self, system_prompt: str, user_input: str) -> int:
+        """
+        Estimate the tokens a request will be charged against the tokens-per-minute limit:
+        the prompt plus the completion allowance `LLM_RATE_LIMIT_COMPLETION_TOKENS` (default 1024).
+
+        Returns:
+            int: The estimate, or 0 when no rate limits are configured.
+        """
+        if get_rate_limiter() is None:
+            return 0
+        return estimate_tokens(system_prompt) + estimate_tokens(user_input) + int(os.getenv("LLM_RATE_LIMIT_COMPLETION_TOKENS", 1024))
+
+    def settle_rate_limit(self, estimated_tokens: int, total_tokens: int) -> None:
+        limiter = get_rate_limiter()
+        if limiter is not None and estimated_tokens:
+            limiter.settle(self.provider_name, self.model_name, estimated_tokens, total_tokens)
+
+    async def asettle_rate_limit(self, estimated_tokens: int, total_tokens: int) -> None:
+        limiter = get_rate_limiter()
+        if limiter is not None and estimated_tokens:
+            await limiter.asettle(self.provider_name, self.model_name, estimated_tokens, total_tokens)
+
+    def _retry_or_raise(self, error: Exception, attempt: int, max_attempts: int) -> float:
+        """
+        Book-keep a failed attempt and decide whether to try again.
+
+        Returns:
+            float: Seconds to wait before the next attempt.
+
+        Raises:
+            Exception: `error` itself when it isn't retryable, attempts are used up or the retry budget is spent.
+        """
+        policy = get_retry_policy()
+        retryable = policy.is_retryable(error)
+        if retryable:
+            self.circuit_breaker.record_failure()
+        else:
+            # The provider answered, it just didn't like this request
+            self.circuit_breaker.record_success()
+        record_failure(self.agent_name, self.model_name, context_length=isinstance(error, ContextLengthExceededError))
+        if not retryable or attempt >= max_attempts or not get_retry_budget().try_acquire():
+            raise error
+        record_retry(self.agent_name, self.model_name)
+        return policy.delay(attempt, getattr(error, "retry_after", None))
+
+    @staticmethod
+    def _attempts_left(max_retries: Optional[int], attempt: int = 1) -> int:
+        """
+        Attempts left for a call starting at `attempt`, out of `max_retries` or, when None, the
+        retry policy's `max_attempts` (`LLM_RETRY_MAX_ATTEMPTS`).
+        """
+        return (get_retry_policy().max_attempts if max_retries is None else max_retries) - attempt + 1
+
+    def call_with_retry(self, func, max_attempts: Optional[int] = None, estimated_tokens: int = 0, **kwargs):
+        """
+        Call a provider request function, retrying retryable failures with jittered exponential backoff.
+
+        Each attempt first waits for rate limit capacity and asks the circuit breaker, so an outage
+        fails fast with `CircuitOpenError` instead of queueing up more blocked threads. Retries also
+        draw on the process-wide retry budget.
+
+        Args:
+            func: The request function, raising provider-neutral errors (see `providers.errors`).
+            max_attempts (int, optional): Attempts including the first one. Defaults to the retry policy's.
+            estimated_tokens (int, optional): Tokens each attempt is charged by the rate limiter, see
+                `estimate_request_tokens`. Defaults to 0.
+            **kwargs: Keyword arguments passed to the function.
+
+        Returns:
+            The result of the successful function call.
+
+        Raises:
+            RateLimitTimeoutError: If no rate limit capacity frees up within `LLM_RATE_LIMIT_MAX_WAIT`.
+            CircuitOpenError: If the circuit for this provider/model is open.
+            Exception: The last error when it isn't retryable or retries are exhausted.
+        """
+        max_attempts = self._attempts_left(max_attempts)
+        get_retry_budget().record_request()
+        limiter = get_rate_limiter()
+        attempt = 1
+        while True:
+            if limiter is not None:
+                with span("rate_limit_wait"):
+                    limiter.acquire(self.provider_name, self.model_name, estimated_tokens)
+            self.circuit_breaker.before_call()
+            try:
+                result = func(**kwargs)
+            except Exception as e:
+                time.sleep(self._retry_or_raise(e, attempt, max_attempts))
+                attempt += 1
+                continue
+            except BaseException:
+                self.circuit_breaker.release()
+                raise
+            self.circuit_breaker.record_success()
+            return result
+
+    async def acall_with_retry(self, func, max_attempts: Optional[int] = None, estimated_tokens: int = 0, **kwargs):
+        """
+        Awaitable counterpart of `call_with_retry` that backs off with `asyncio.sleep`,
+        so the event loop keeps serving other requests while this one waits.
+
+        Args:
+            func: The coroutine function making the request.
+            max_attempts (int, optional): Attempts including the first one. Defaults to the retry policy's.
+            estimated_tokens (int, optional): Tokens each attempt is charged by the rate limiter. Defaults to 0.
+            **kwargs: Keyword arguments passed to the function.
 
         Returns:
             The result of the successful function call.
 
         Raises:
-            Exception: If max retries are exceeded without a successful call.
+            RateLimitTimeoutError: If no rate limit capacity frees up within `LLM_RATE_LIMIT_MAX_WAIT`.
+            CircuitOpenError: If the circuit for this provider/model is open.
+            Exception: The last error when it isn't retryable or retries are exhausted.
         """
-        if attempt < max_retries:
+        max_attempts = self._attempts_left(max_attempts)
+        get_retry_budget().record_request()
+        limiter = get_rate_limiter()
+        attempt = 1
+        while True:
+            if limiter is not None:
+                with span("rate_limit_wait"):
+                    await limiter.aacquire(self.provider_name, self.model_name, estimated_tokens)
+            self.circuit_breaker.before_call()
             try:
-                return func(attempt=attempt, max_retries=max_retries, **kwargs)
+                result = await func(**kwargs)
             except Exception as e:
-                print(f"Error: {e}")
-                time.sleep(int(os.getenv("LLM_RETRY_DELAY", 3)))
-                return func(attempt=attempt+1, max_retries=max_retries, **kwargs)
-        raise Exception("Max retries exceeded")
+                await asyncio.sleep(self._retry_or_raise(e, attempt, max_attempts))
+                attempt += 1
+                continue
+            except BaseException:
+                # Cancelled, free a half-open probe slot for the next caller
+                self.circuit_breaker.release()
+                raise
+            self.circuit_breaker.record_success()
+            return result
     
     @abstractmethod
-    def generate_response(self, attempt: int = 1, max_retries: int = 3, **kwargs):
+    def generate_response(self, attempt: int = 1, max_retries: Optional[int] = None, cache_mode: CacheMode = CacheMode.USE, **kwargs):
         """
         Generate the response from the LLM.
         """
         pass
-    
-    
\ No newline at end of file
+
+    @abstractmethod
+    async def agenerate_response(self, attempt: int = 1, max_retries: Optional[int] = None, cache_mode: CacheMode = CacheMode.USE, **kwargs):
+        """
+        Generate the response from the LLM without blocking the event loop.
+        """
+        pass
+
+    async def astream_response(self, max_retries: Optional[int] = None, cache_mode: CacheMode = CacheMode.USE, **kwargs) -> AsyncIterator[StreamEvent]:
+        """
+        Stream the response text as it is generated, then the validated result.
+
+        Providers without token streaming fall back to this: the whole response arrives as a
+        single delta once `agenerate_response` returns.
+
+        Args:
+            max_retries (int, optional): Maximum number of attempts to open the stream. Defaults to the retry policy's.
+            cache_mode (CacheMode, optional): Per-request response cache control. Defaults to CacheMode.USE.
+            **kwargs: Additional keyword arguments passed to generate_user_input.
+
+        Yields:
+            StreamEvent: Text deltas, then one event carrying the result tuple.
+        """
+        result = await self.agenerate_response(max_retries=max_retries, cache_mode=cache_mode, **kwargs)
+        response = result[0]
+        yield StreamEvent(delta=response.model_dump_json() if self.structured_outputs else response)
+        yield StreamEvent(result=result)
@@ -0,0 +1,250 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+from helpers.loggers import get_logger
+
+try:
+    import redis
+    import redis.asyncio as aioredis
+except ImportError:  # redis is optional, the in-memory tier works on its own
+    redis = None
+    aioredis = None
+
+logger = get_logger()
+
+
+def make_cache_key(provider: str, model_name: str, system_prompt: str, user_input: str, temperature: float, response_structure: Any) -> str:
+    """
+    Build a stable cache key for an LLM call.
+
+    Args:
+        provider (str): The provider class name.
+        model_name (str): The model the request is sent to.
+        system_prompt (str): The fully rendered system prompt.
+        user_input (str): The normalized user input.
+        temperature (float): The sampling temperature.
+        response_structure (Any): The pydantic response model, or None for free-form output.
+
+    Returns:
+        str: A hex SHA-256 digest identifying the request.
+    """
+    schema = response_structure.model_json_schema() if response_structure is not None else None
+    material = json.dumps(
+        [provider, model_name, system_prompt, user_input, temperature, schema],
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class LRUCache:
+    """
+    A thread-safe in-process LRU cache with per-entry TTL and a bounded number of entries.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 3600):
+        """
+        Args:
+            max_entries (int, optional): Entries kept before the least recently used is evicted. Defaults to 1024.
+            ttl (float, optional): Seconds an entry stays valid. Defaults to 3600.
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class RedisCache:
+    """
+    Shared cache tier backed by Redis, so every uvicorn worker sees the same hits.
+
+    Redis failures are logged and treated as misses; the cache must never fail a request.
+    """
+
+    def __init__(self, url: str, ttl: float = 3600, prefix: str = "llm-cache:"):
+        """
+        Args:
+            url (str): Redis connection URL.
+            ttl (float, optional): Seconds an entry stays valid. Defaults to 3600.
+            prefix (str, optional): Key namespace. Defaults to "llm-cache:".
+        """
+        self.url = url
+        self.ttl = int(ttl)
+        self.prefix = prefix
+        self._client = None
+        self._async_client = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = redis.Redis.from_url(self.url, socket_timeout=0.5)
+        return self._client
+
+    @property
+    def async_client(self):
+        if self._async_client is None:
+            self._async_client = aioredis.Redis.from_url(self.url, socket_timeout=0.5)
+        return self._async_client
+
+    def get(self, key: str) -> Optional[str]:
+        try:
+            value = self.client.get(self.prefix + key)
+            return value.decode("utf-8") if value is not None else None
+        except Exception as e:
+            logger.warning(f"Redis cache read failed: {e}")
+            return None
+
+    def set(self, key: str, value: str) -> None:
+        try:
+            self.client.set(self.prefix + key, value, ex=self.ttl)
+        except Exception as e:
+            logger.warning(f"Redis cache write failed: {e}")
+
+    async def aget(self, key: str) -> Optional[str]:
+        try:
+            value = await self.async_client.get(self.prefix + key)
+            return value.decode("utf-8") if value is not None else None
+        except Exception as e:
+            logger.warning(f"Redis cache read failed: {e}")
+            return None
+
+    async def aset(self, key: str, value: str) -> None:
+        try:
+            await self.async_client.set(self.prefix + key, value, ex=self.ttl)
+        except Exception as e:
+            logger.warning(f"Redis cache write failed: {e}")
+
+
+class ResponseCache:
+    """
+    Two-tier LLM response cache: an in-process LRU in front of an optional shared Redis tier.
+
+    Values are JSON strings; hits found in Redis are promoted into the local tier.
+    """
+
+    def __init__(self, memory: LRUCache, shared: Optional[RedisCache] = None):
+        self.memory = memory
+        self.shared = shared
+        self._counters = {"memory_hits": 0, "shared_hits": 0, "misses": 0, "stores": 0, "bypasses": 0}
+        self._lock = threading.Lock()
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._counters[name] += 1
+
+    def record_bypass(self) -> None:
+        self._count("bypasses")
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        value = self.memory.get(key)
+        if value is not None:
+            self._count("memory_hits")
+            return json.loads(value)
+        if self.shared is not None:
+            value = self.shared.get(key)
+            if value is not None:
+                self._count("shared_hits")
+                self.memory.set(key, value)
+                return json.loads(value)
+        self._count("misses")
+        return None
+
+    async def aget(self, key: str) -> Optional[Dict[str, Any]]:
+        value = self.memory.get(key)
+        if value is not None:
+            self._count("memory_hits")
+            return json.loads(value)
+        if self.shared is not None:
+            value = await self.shared.aget(key)
+            if value is not None:
+                self._count("shared_hits")
+                self.memory.set(key, value)
+                return json.loads(value)
+        self._count("misses")
+        return None
+
+    def set(self, key: str, payload: Dict[str, Any]) -> None:
+        value = json.dumps(payload)
+        self.memory.set(key, value)
+        if self.shared is not None:
+            self.shared.set(key, value)
+        self._count("stores")
+
+    async def aset(self, key: str, payload: Dict[str, Any]) -> None:
+        value = json.dumps(payload)
+        self.memory.set(key, value)
+        if self.shared is not None:
+            await self.shared.aset(key, value)
+        self._count("stores")
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Returns:
+            dict: Hit/miss/store/bypass counters for this process plus the local tier size.
+        """
+        with self._lock:
+            stats = dict(self._counters)
+        stats["memory_entries"] = len(self.memory)
+        return stats
+
+
+_response_cache: Optional[ResponseCache] = None
+_response_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """
+    Get the process-wide response cache, configured from the environment on first use.
+
+    Environment:
+        LLM_CACHE_ENABLED: "false" disables caching entirely. Defaults to "true".
+        LLM_CACHE_MAX_ENTRIES: Size of the in-process LRU. Defaults to 1024.
+        LLM_CACHE_TTL: Entry lifetime in seconds for both tiers. Defaults to 3600.
+        LLM_CACHE_REDIS_URL: Enables the shared Redis tier when set.
+
+    Returns:
+        ResponseCache | None: The cache, or None when caching is disabled.
+    """
+    global _response_cache
+    if os.getenv("LLM_CACHE_ENABLED", "true").lower() == "false":
+        return None
+    if _response_cache is None:
+        with _response_cache_lock:
+            if _response_cache is None:
+                ttl = float(os.getenv("LLM_CACHE_TTL", 3600))
+                memory = LRUCache(max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", 1024)), ttl=ttl)
+                shared = None
+                redis_url = os.getenv("LLM_CACHE_REDIS_URL")
+                if redis_url:
+                    if redis is None:
+                        logger.warning("LLM_CACHE_REDIS_URL is set but the redis package is not installed, using the in-memory tier only")
+                    else:
+                        shared = RedisCache(redis_url, ttl=ttl)
+                _response_cache = ResponseCache(memory, shared)
+    return _response_cache
@@ -0,0 +1,80 @@
+from typing import Optional
+
+
+class ContextLengthExceededError(Exception):
+    """
+    Raised when a prompt does not fit the model's context window. Retrying the same input
+    can never succeed, so callers should shrink the input (e.g. chunk it) instead.
+    """
+    pass
+
+
+class SchemaValidationError(Exception):
+    """
+    Raised when a structured response doesn't match the expected schema. The same prompt
+    usually produces the same shape again, so it is not retried.
+    """
+    pass
+
+
+class ProviderError(Exception):
+    """
+    Base class of provider-neutral transport errors. Providers translate their SDK's exceptions
+    into these so retries and the circuit breaker don't depend on any one SDK.
+
+    Attributes:
+        retryable (bool): Whether a later attempt may succeed.
+        retry_after (float, optional): Seconds the provider asked us to wait, if it said.
+    """
+    retryable = False
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class ProviderRateLimitError(ProviderError):
+    """The provider rejected the request because of a rate or quota limit."""
+    retryable = True
+
+
+class ProviderTimeoutError(ProviderError):
+    """The request timed out before the provider answered."""
+    retryable = True
+
+
+class ProviderUnavailableError(ProviderError):
+    """The provider couldn't be reached or answered with a server error."""
+    retryable = True
+
+
+class ProviderRequestError(ProviderError):
+    """The provider rejected the request itself (bad input, authentication, permissions)."""
+    retryable = False
+
+
+class CircuitOpenError(Exception):
+    """
+    Raised without calling the provider while its circuit breaker is open.
+
+    Attributes:
+        retry_after (float): Seconds until the breaker lets a probe request through.
+    """
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+
+class RateLimitTimeoutError(Exception):
+    """
+    Raised when a request waited longer than allowed for rate limit capacity.
+
+    Attributes:
+        retry_after (float): Estimated seconds until capacity is free.
+    """
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
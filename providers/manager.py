@@ -1,10 +1,117 @@
-from typing import Any
-from openai import OpenAI
+from typing import Any, Callable, Dict
+from openai import OpenAI, AsyncOpenAI
+import hashlib
+import httpx
 import os
+import threading
 from providers.base_provider import BaseProvider
 from providers.providers.openai_provider import OpenAIProvider
+from providers.providers.mock_provider import MockProvider, build_mock_clients
 
-def get_provider(provider: str, selected_model: str = None) -> tuple[Any, BaseProvider]:
+_client_registry: Dict[tuple, tuple[Any, Any]] = {}
+_registry_lock = threading.Lock()
+
+
+def _connection_limits() -> httpx.Limits:
+    """
+    Build the connection pool limits shared by every pooled LLM client.
+
+    Reads `LLM_MAX_CONNECTIONS`, `LLM_MAX_KEEPALIVE_CONNECTIONS` and `LLM_KEEPALIVE_EXPIRY`
+    (seconds) from the environment.
+
+    Returns:
+        httpx.Limits: The limits to apply to the underlying HTTP connection pools.
+    """
+    return httpx.Limits(
+        max_connections=int(os.getenv("LLM_MAX_CONNECTIONS", 100)),
+        max_keepalive_connections=int(os.getenv("LLM_MAX_KEEPALIVE_CONNECTIONS", 20)),
+        keepalive_expiry=float(os.getenv("LLM_KEEPALIVE_EXPIRY", 30)),
+    )
+
+
+def _build_openai_clients(api_key: str | None) -> tuple[OpenAI, AsyncOpenAI]:
+    """
+    Create a sync and an async OpenAI client, each backed by its own long-lived connection pool.
+
+    Args:
+        api_key (str | None): The OpenAI API key.
+
+    Returns:
+        tuple[OpenAI, AsyncOpenAI]: The sync and async clients.
+    """
+    timeout = httpx.Timeout(float(os.getenv("LLM_REQUEST_TIMEOUT", 600)), connect=5.0)
+    limits = _connection_limits()
+    # Retries are handled by BaseProvider's retry policy, the SDK's own would multiply them
+    return (
+        OpenAI(api_key=api_key, http_client=httpx.Client(limits=limits, timeout=timeout), max_retries=0),
+        AsyncOpenAI(api_key=api_key, http_client=httpx.AsyncClient(limits=limits, timeout=timeout), max_retries=0),
+    )
+
+
+# provider name -> (env var passed to the client factory, client factory, provider class).
+# The env var holds the credentials, or for the offline "mock" provider its JSON config.
+PROVIDERS: Dict[str, tuple[str, Callable[[str | None], tuple[Any, Any]], type[BaseProvider]]] = {
+    "openai": ("OPENAI_API_KEY", _build_openai_clients, OpenAIProvider),
+    "mock": ("MOCK_LLM_CONFIG", build_mock_clients, MockProvider),
+}
+
+
+def get_clients(provider: str) -> tuple[Any, Any]:
+    """
+    Return the pooled (sync, async) clients for a provider, creating them on first use.
+
+    Clients are cached per process and keyed by provider and a digest of its credentials,
+    so rotating an API key transparently gets a fresh pool.
+
+    Args:
+        provider (str): The name of the provider (e.g. "openai")
+
+    Returns:
+        tuple[Any, Any]: The sync and async client instances.
+
+    Raises:
+        ValueError: If the specified provider is not registered
+    """
+    if provider not in PROVIDERS:
+        raise ValueError(f"Provider '{provider}' not supported. Available providers: {list(PROVIDERS.keys())}")
+    credential_env, client_factory, _ = PROVIDERS[provider]
+    api_key = os.getenv(credential_env)
+    key = (provider, hashlib.sha256((api_key or "").encode()).hexdigest())
+
+    clients = _client_registry.get(key)
+    if clients is None:
+        with _registry_lock:
+            clients = _client_registry.get(key)
+            if clients is None:
+                clients = client_factory(api_key)
+                _client_registry[key] = clients
+    return clients
+
+
+async def aclose_clients() -> None:
+    """
+    Close every pooled client and empty the registry. Called from the FastAPI lifespan on shutdown.
+    """
+    with _registry_lock:
+        registered = list(_client_registry.values())
+        _client_registry.clear()
+    for model_client, async_model_client in registered:
+        if model_client is not None:
+            model_client.close()
+        if async_model_client is not None:
+            await async_model_client.close()
+
+
+def _reset_after_fork() -> None:
+    # Connections must never be shared between a parent and its forked workers
+    _client_registry.clear()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def get_provider(provider: str, selected_model: str = None) -> tuple[Any, Any, BaseProvider]:
     """
     Get the provider for the selected model.
 
@@ -13,17 +120,14 @@ def get_provider(provider: str, selected_model: str = None) -> tuple[Any, BasePr
         selected_model (str, optional): The specific model to use. Defaults to None.
 
     Returns:
-        tuple[Any, BaseProvider]: A tuple containing:
-            - The provider client instance
+        tuple[Any, Any, BaseProvider]: A tuple containing:
+            - The pooled provider client instance
+            - The pooled async provider client instance, used by `agenerate_response`
             - The provider class that inherits from BaseProvider
 
     Raises:
         ValueError: If the specified provider is not found in the provider mapping
     """
-    provider_map = {
-        "openai": (OpenAI(api_key=os.getenv("OPENAI_API_KEY")), OpenAIProvider)
-    }
-    if provider not in provider_map:
-        raise ValueError(f"Provider '{provider}' not supported. Available providers: {list(provider_map.keys())}")
-    model_client, provider_class = provider_map[provider]
-    return model_client, provider_class
+    model_client, async_model_client = get_clients(provider)
+    provider_class = PROVIDERS[provider][2]
+    return model_client, async_model_client, provider_class
@@ -0,0 +1,107 @@
+import threading
+from contextlib import contextmanager
+from typing import Iterator, Optional
+from helpers.metrics import get_registry
+from providers.cache import get_response_cache
+
+_LABELS = ("agent", "model")
+
+
+class LLMMetrics:
+    """
+    The metric families recorded around provider calls, labelled by agent and model.
+    """
+
+    def __init__(self):
+        registry = get_registry()
+        self.requests = registry.counter("llm_requests_total", "Provider calls by outcome (success, cache_hit, error, context_length).", _LABELS + ("outcome",))
+        self.prompt_tokens = registry.counter("llm_prompt_tokens_total", "Prompt tokens billed by the provider.", _LABELS)
+        self.completion_tokens = registry.counter("llm_completion_tokens_total", "Completion tokens billed by the provider.", _LABELS)
+        self.latency = registry.histogram("llm_request_duration_seconds", "Wall time of provider calls, from prompt construction to validated result.", _LABELS)
+        self.retries = registry.counter("llm_retries_total", "Provider calls retried after a failure.", _LABELS)
+        self.context_length_errors = registry.counter("llm_context_length_errors_total", "Prompts rejected for exceeding the context window.", _LABELS)
+        self.in_flight = registry.gauge("llm_requests_in_flight", "Provider calls currently awaiting a response.", _LABELS)
+
+        self.cache_events = registry.counter("llm_response_cache_events_total", "Response cache lookups and writes by event.", ("event",))
+        self.cache_entries = registry.gauge("llm_response_cache_memory_entries", "Entries held in the in-process response cache.")
+        registry.register_collector(self._collect_cache_stats)
+
+    def _collect_cache_stats(self) -> None:
+        cache = get_response_cache()
+        if cache is None:
+            return
+        stats = cache.stats()
+        self.cache_entries.set(stats.pop("memory_entries", 0))
+        for event, value in stats.items():
+            self.cache_events.set_total(value, event=event)
+
+
+_llm_metrics: Optional[LLMMetrics] = None
+_llm_metrics_lock = threading.Lock()
+
+
+def get_llm_metrics() -> LLMMetrics:
+    """
+    Get the process-wide provider metrics, registering them on first use.
+
+    Returns:
+        LLMMetrics: The shared metric families.
+    """
+    global _llm_metrics
+    if _llm_metrics is None:
+        with _llm_metrics_lock:
+            if _llm_metrics is None:
+                _llm_metrics = LLMMetrics()
+    return _llm_metrics
+
+
+def record_response(agent: str, model: str, prompt_tokens: int, completion_tokens: int, seconds: float, cached: bool = False) -> None:
+    """
+    Record a completed provider call. Cache hits count as requests but not as billed tokens.
+
+    Args:
+        agent (str): The agent name.
+        model (str): The model name.
+        prompt_tokens (int): Prompt tokens reported by the provider.
+        completion_tokens (int): Completion tokens reported by the provider.
+        seconds (float): Wall time of the call.
+        cached (bool, optional): Whether the response came from the response cache. Defaults to False.
+    """
+    metrics = get_llm_metrics()
+    metrics.requests.inc(agent=agent, model=model, outcome="cache_hit" if cached else "success")
+    metrics.latency.observe(seconds, agent=agent, model=model)
+    if not cached:
+        metrics.prompt_tokens.inc(prompt_tokens or 0, agent=agent, model=model)
+        metrics.completion_tokens.inc(completion_tokens or 0, agent=agent, model=model)
+
+
+def record_failure(agent: str, model: str, context_length: bool = False) -> None:
+    """
+    Record a provider call that raised.
+
+    Args:
+        agent (str): The agent name.
+        model (str): The model name.
+        context_length (bool, optional): Whether the prompt overflowed the context window. Defaults to False.
+    """
+    metrics = get_llm_metrics()
+    metrics.requests.inc(agent=agent, model=model, outcome="context_length" if context_length else "error")
+    if context_length:
+        metrics.context_length_errors.inc(agent=agent, model=model)
+
+
+def record_retry(agent: str, model: str) -> None:
+    get_llm_metrics().retries.inc(agent=agent, model=model)
+
+
+@contextmanager
+def in_flight(agent: str, model: str) -> Iterator[None]:
+    """
+    Count a provider call as in flight for the duration of the block.
+    """
+    metrics = get_llm_metrics()
+    metrics.in_flight.inc(agent=agent, model=model)
+    try:
+        yield
+    finally:
+        metrics.in_flight.dec(agent=agent, model=model)
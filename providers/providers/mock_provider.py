@@ -0,0 +1,308 @@
+import asyncio
+import base64
+import hashlib
+import io
+import json
+import math
+import random
+import threading
+import time
+import typing
+import wave
+from dataclasses import dataclass, field
+from types import SimpleNamespace, UnionType
+from typing import Any, Dict, List, Optional
+import httpx
+from openai import APITimeoutError, BadRequestError, InternalServerError, RateLimitError
+from pydantic import BaseModel
+from helpers.chunking import estimate_tokens
+from providers.providers.openai_provider import OpenAIProvider
+
+_LOREM = (
+    "lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod tempor incididunt ut labore "
+    "et dolore magna aliqua ut enim ad minim veniam quis nostrud exercitation ullamco laboris nisi"
+).split()
+
+_MOCK_REQUEST = httpx.Request("POST", "https://mock.invalid/v1/chat/completions")
+
+
+@dataclass
+class MockLLMConfig:
+    """
+    Behaviour of the mock LLM, read from the `MOCK_LLM_CONFIG` JSON.
+
+    Attributes:
+        seed (int): Seeds latency and error sampling, so a sequential run is reproducible. The content
+            and token counts only depend on the prompt.
+        latency (dict): {"distribution": "constant" | "uniform" | "exponential" | "lognormal",
+            "mean": seconds, "sigma": lognormal shape, "min": seconds, "max": seconds}.
+        stream_chunk_delay (float): Seconds between streamed deltas.
+        completion_tokens (dict): {"mean": tokens, "jitter": relative spread} of generated output.
+        max_context_tokens (int): Prompts estimated above this fail with a context-length error.
+        errors (dict): Probability per request of "context_length", "rate_limit", "timeout" and "server_error".
+        retry_after (float): Retry-after seconds sent with injected rate limit errors.
+        timeout_after (float): Seconds an injected timeout takes to surface.
+    """
+    seed: int = 0
+    latency: Dict[str, float] = field(default_factory=lambda: {"distribution": "lognormal", "mean": 0.8, "sigma": 0.5, "min": 0.05, "max": 10.0})
+    stream_chunk_delay: float = 0.01
+    completion_tokens: Dict[str, float] = field(default_factory=lambda: {"mean": 200, "jitter": 0.2})
+    max_context_tokens: int = 128000
+    errors: Dict[str, float] = field(default_factory=dict)
+    retry_after: float = 1.0
+    timeout_after: float = 1.0
+
+    @classmethod
+    def from_json(cls, raw: Optional[str]) -> "MockLLMConfig":
+        if not raw:
+            return cls()
+        values = json.loads(raw)
+        config = cls()
+        for key, value in values.items():
+            if not hasattr(config, key):
+                raise ValueError(f"Unknown MOCK_LLM_CONFIG option '{key}'")
+            current = getattr(config, key)
+            setattr(config, key, {**current, **value} if isinstance(current, dict) and key != "errors" else value)
+        return config
+
+
+class _Sampler:
+    """Seeded, thread-safe draws shared by every request of a mock client."""
+
+    def __init__(self, config: MockLLMConfig):
+        self.config = config
+        self._random = random.Random(config.seed)
+        self._lock = threading.Lock()
+
+    def latency(self) -> float:
+        spec = self.config.latency
+        mean = float(spec.get("mean", 0.8))
+        with self._lock:
+            distribution = spec.get("distribution", "lognormal")
+            if distribution == "constant":
+                value = mean
+            elif distribution == "uniform":
+                value = self._random.uniform(float(spec.get("min", 0)), float(spec.get("max", 2 * mean)))
+            elif distribution == "exponential":
+                value = self._random.expovariate(1 / mean) if mean > 0 else 0.0
+            elif distribution == "lognormal":
+                sigma = float(spec.get("sigma", 0.5))
+                # Parameterised so the distribution's mean is `mean`
+                value = self._random.lognormvariate(math.log(mean) - sigma ** 2 / 2, sigma) if mean > 0 else 0.0
+            else:
+                raise ValueError(f"Unknown latency distribution '{distribution}'")
+        return min(max(value, float(spec.get("min", 0))), float(spec.get("max", math.inf)))
+
+    def injected_error(self) -> Optional[str]:
+        with self._lock:
+            draw = self._random.random()
+        cumulative = 0.0
+        for kind in ("context_length", "rate_limit", "timeout", "server_error"):
+            cumulative += float(self.config.errors.get(kind, 0))
+            if draw < cumulative:
+                return kind
+        return None
+
+
+def _error(kind: str, config: MockLLMConfig) -> Exception:
+    if kind == "context_length":
+        return BadRequestError(
+            "Error code: 400 - This model's maximum context length is exceeded (context_length_exceeded)",
+            response=httpx.Response(400, request=_MOCK_REQUEST), body={"code": "context_length_exceeded"})
+    if kind == "rate_limit":
+        return RateLimitError(
+            "Error code: 429 - Rate limit reached (mock)",
+            response=httpx.Response(429, request=_MOCK_REQUEST, headers={"retry-after": str(config.retry_after)}), body=None)
+    if kind == "timeout":
+        return APITimeoutError(request=_MOCK_REQUEST)
+    return InternalServerError(
+        "Error code: 500 - The server had an error (mock)",
+        response=httpx.Response(500, request=_MOCK_REQUEST), body=None)
+
+
+def _example_value(annotation: Any, name: str, words: List[str], budget: int, rng: random.Random) -> Any:
+    """Build a value of `annotation` whose text adds up to roughly `budget` words."""
+    origin = typing.get_origin(annotation)
+    args = [arg for arg in typing.get_args(annotation) if arg is not type(None)]
+    if origin in (typing.Union, UnionType) and args:
+        return _example_value(args[0], name, words, budget, rng)
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return _example_instance(annotation, words, budget, rng)
+    if annotation is str:
+        return " ".join(rng.choice(words) for _ in range(max(1, budget)))
+    if annotation is int:
+        return rng.randint(0, 100)
+    if annotation is float:
+        return round(rng.random(), 3)
+    if annotation is bool:
+        return rng.random() < 0.5
+    if annotation in (dict, Dict) or origin is dict:
+        value_type = args[1] if len(args) == 2 else str
+        entries = max(1, min(5, budget // 20))
+        return {f"{name}_{index + 1}": _example_value(value_type, name, words, budget // entries, rng) for index in range(entries)}
+    if annotation in (list, List) or origin is list:
+        item_type = args[0] if args else str
+        entries = max(1, min(5, budget // 20))
+        return [_example_value(item_type, name, words, budget // entries, rng) for _ in range(entries)]
+    return None
+
+
+def _example_instance(model: type[BaseModel], words: List[str], budget: int, rng: random.Random) -> BaseModel:
+    fields = model.model_fields
+    share = max(1, budget // max(1, len(fields)))
+    return model(**{name: _example_value(info.annotation, name, words, share, rng) for name, info in fields.items()})
+
+
+class _MockCompletions:
+    """Stands in for `client.beta.chat.completions` with the same `parse` / `stream` surface."""
+
+    def __init__(self, config: MockLLMConfig, sampler: _Sampler, asynchronous: bool):
+        self.config = config
+        self.sampler = sampler
+        self.asynchronous = asynchronous
+
+    def _prepare(self, messages: List[Dict[str, str]], response_format: Any):
+        """Everything about the response except the waiting: (latency, error, content, usage)."""
+        prompt = "".join(message["content"] for message in messages)
+        prompt_tokens = estimate_tokens(prompt)
+        latency = self.sampler.latency()
+        error = "context_length" if prompt_tokens > self.config.max_context_tokens else self.sampler.injected_error()
+
+        # Same prompt, same answer (and the same token count)
+        digest = hashlib.sha256(prompt.encode("utf-8", "surrogatepass")).digest()
+        rng = random.Random(digest)
+        spec = self.config.completion_tokens
+        jitter = float(spec.get("jitter", 0))
+        completion_tokens = max(1, int(float(spec.get("mean", 200)) * (1 + rng.uniform(-jitter, jitter))))
+        words = [word for word in messages[-1]["content"].split()[:2000] if word.isalpha()] or _LOREM
+        word_budget = max(1, int(completion_tokens * 0.75))
+        if isinstance(response_format, type) and issubclass(response_format, BaseModel):
+            content = _example_instance(response_format, words, word_budget, rng).model_dump_json()
+        else:
+            content = " ".join(rng.choice(words) for _ in range(word_budget))
+        usage = SimpleNamespace(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens, total_tokens=prompt_tokens + completion_tokens)
+        return latency, error, content, usage
+
+    @staticmethod
+    def _completion(content: str, usage) -> SimpleNamespace:
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))], usage=usage)
+
+    def parse(self, model: str, messages: List[Dict[str, str]], response_format: Any = None, **kwargs):
+        latency, error, content, usage = self._prepare(messages, response_format)
+        if self.asynchronous:
+            return self._aparse(latency, error, content, usage)
+        time.sleep(self.config.timeout_after if error == "timeout" else latency)
+        if error:
+            raise _error(error, self.config)
+        return self._completion(content, usage)
+
+    async def _aparse(self, latency: float, error: Optional[str], content: str, usage):
+        await asyncio.sleep(self.config.timeout_after if error == "timeout" else latency)
+        if error:
+            raise _error(error, self.config)
+        return self._completion(content, usage)
+
+    def stream(self, model: str, messages: List[Dict[str, str]], response_format: Any = None, **kwargs):
+        return _MockStreamManager(self.config, *self._prepare(messages, response_format))
+
+    @staticmethod
+    def _audio_completion(transcript: str, usage) -> SimpleNamespace:
+        # Silence lasting roughly as long as reading the transcript aloud would
+        buffer = io.BytesIO()
+        with wave.open(buffer, "wb") as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(8000)
+            wav.writeframes(b"\x00\x00" * int(8000 * 0.4 * len(transcript.split())))
+        audio = SimpleNamespace(data=base64.b64encode(buffer.getvalue()).decode("ascii"), transcript=transcript)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=None, audio=audio))], usage=usage)
+
+    def create(self, model: str, messages: List[Dict[str, str]], **kwargs):
+        """`client.chat.completions.create`, as used for audio output: a silent WAV plus its transcript."""
+        latency, error, transcript, usage = self._prepare(messages, None)
+        if self.asynchronous:
+            return self._acreate(latency, error, transcript, usage)
+        time.sleep(self.config.timeout_after if error == "timeout" else latency)
+        if error:
+            raise _error(error, self.config)
+        return self._audio_completion(transcript, usage)
+
+    async def _acreate(self, latency: float, error: Optional[str], transcript: str, usage):
+        await asyncio.sleep(self.config.timeout_after if error == "timeout" else latency)
+        if error:
+            raise _error(error, self.config)
+        return self._audio_completion(transcript, usage)
+
+
+class _MockStreamManager:
+    """Async context manager mimicking the SDK's chat completion stream manager."""
+
+    def __init__(self, config: MockLLMConfig, latency: float, error: Optional[str], content: str, usage):
+        self.config = config
+        self.latency = latency
+        self.error = error
+        self.content = content
+        self.usage = usage
+
+    async def __aenter__(self):
+        # Time to first token
+        await asyncio.sleep(self.config.timeout_after if self.error == "timeout" else self.latency)
+        if self.error:
+            raise _error(self.error, self.config)
+        return self._events()
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    async def _events(self):
+        step = 16
+        for start in range(0, len(self.content), step):
+            if self.config.stream_chunk_delay:
+                await asyncio.sleep(self.config.stream_chunk_delay)
+            yield SimpleNamespace(type="content.delta", delta=self.content[start:start + step])
+        yield SimpleNamespace(type="chunk", chunk=SimpleNamespace(usage=self.usage))
+
+
+class MockLLMClient:
+    """
+    An offline stand-in for the OpenAI client: `client.beta.chat.completions.parse/stream` return
+    schema-valid content (and `client.chat.completions.create` audio) after a sampled latency, or
+    raise the SDK's own errors when an error is injected, so everything above the client runs
+    exactly as in production.
+    """
+
+    def __init__(self, config: MockLLMConfig, sampler: _Sampler, asynchronous: bool):
+        completions = _MockCompletions(config, sampler, asynchronous)
+        self.beta = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+        self.chat = SimpleNamespace(completions=completions)
+
+    def close(self):
+        pass
+
+
+class AsyncMockLLMClient(MockLLMClient):
+    async def close(self):
+        pass
+
+
+def build_mock_clients(config: Optional[str]) -> tuple[MockLLMClient, AsyncMockLLMClient]:
+    """
+    Create the sync and async mock clients. Both share one sampler, so a run is reproducible per seed.
+
+    Args:
+        config (str | None): The `MOCK_LLM_CONFIG` JSON, see `MockLLMConfig`.
+
+    Returns:
+        tuple[MockLLMClient, AsyncMockLLMClient]: The sync and async clients.
+    """
+    parsed = MockLLMConfig.from_json(config)
+    sampler = _Sampler(parsed)
+    return MockLLMClient(parsed, sampler, asynchronous=False), AsyncMockLLMClient(parsed, sampler, asynchronous=True)
+
+
+class MockProvider(OpenAIProvider):
+    """
+    The OpenAI provider pipeline (cache, rate limits, retries, circuit breaker, metrics, streaming)
+    driven by a `MockLLMClient`, for load tests, benchmarks and running offline.
+    """
+    provider_name = "mock"
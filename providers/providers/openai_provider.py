@@ -1,16 +1,117 @@
-from providers.base_provider import BaseProvider
-from pydantic import ValidationError
-import traceback
+from providers.base_provider import BaseProvider, StreamEvent
+from providers.errors import (
+    ContextLengthExceededError, SchemaValidationError, ProviderRateLimitError,
+    ProviderTimeoutError, ProviderUnavailableError, ProviderRequestError
+)
+from enums.cache_mode import CacheMode
+from helpers.tracing import span
+from providers.metrics import record_response, record_failure, in_flight
 import time
-from openai import BadRequestError
+from typing import AsyncIterator, Optional
+from openai import (
+    APIError, APIStatusError, APIConnectionError, APITimeoutError,
+    BadRequestError, RateLimitError, InternalServerError
+)
 
-class OpenAIProvider(BaseProvider):    
-    def generate_response(self, attempt: int = 1, max_retries: int = 3, **kwargs):
+def _retry_after(error: APIStatusError) -> Optional[float]:
+    """Read the wait the API asked for from the `retry-after-ms` / `retry-after` headers."""
+    headers = error.response.headers
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except ValueError:
+        pass
+    return None
+
+def translate_error(error: APIError) -> Exception:
+    """
+    Map an OpenAI SDK error onto the provider-neutral errors the retry policy understands.
+
+    Args:
+        error (APIError): The error raised by the SDK.
+
+    Returns:
+        Exception: The equivalent error from `providers.errors`.
+    """
+    message = str(error)
+    if isinstance(error, BadRequestError):
+        if "context_length" in message or "string too long" in message:
+            # The same input will overflow again, let the caller chunk it instead of retrying
+            return ContextLengthExceededError(message)
+        return ProviderRequestError(message)
+    if isinstance(error, RateLimitError):
+        if error.code == "insufficient_quota":
+            # Waiting won't refill the account
+            return ProviderRequestError(message)
+        return ProviderRateLimitError(message, retry_after=_retry_after(error))
+    if isinstance(error, APITimeoutError):
+        return ProviderTimeoutError(message)
+    if isinstance(error, APIConnectionError):
+        return ProviderUnavailableError(message)
+    if isinstance(error, InternalServerError):
+        return ProviderUnavailableError(message, retry_after=_retry_after(error))
+    if isinstance(error, APIStatusError):
+        if error.status_code == 408:
+            return ProviderTimeoutError(message)
+        if error.status_code == 409:
+            return ProviderUnavailableError(message, retry_after=_retry_after(error))
+        return ProviderRequestError(message)
+    return ProviderUnavailableError(message)
+
+def _payload(response) -> dict:
+    return {
+        "response_content": response.choices[0].message.content,
+        "prompt_tokens": response.usage.prompt_tokens,
+        "completion_tokens": response.usage.completion_tokens,
+        "total_tokens": response.usage.total_tokens,
+    }
+
+class OpenAIProvider(BaseProvider):
+    provider_name = "openai"
+
+    def _request(self, system_prompt: str, user_input: str) -> dict:
+        """Make one chat completion request and return its response payload."""
+        try:
+            with span("llm_call"), in_flight(self.agent_name, self.model_name):
+                response = self.model.beta.chat.completions.parse(
+                    model=self.model_name,
+                    messages=[
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": user_input}
+                        ],
+                    response_format = self.response_structure,
+                    temperature = self.temperature,
+                )
+        except APIError as e:
+            raise translate_error(e) from e
+        return _payload(response)
+
+    async def _arequest(self, system_prompt: str, user_input: str) -> dict:
+        """Make one chat completion request with the async client and return its response payload."""
+        try:
+            with span("llm_call"), in_flight(self.agent_name, self.model_name):
+                response = await self.async_model.beta.chat.completions.parse(
+                    model=self.model_name,
+                    messages=[
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": user_input}
+                        ],
+                    response_format = self.response_structure,
+                    temperature = self.temperature,
+                )
+        except APIError as e:
+            raise translate_error(e) from e
+        return _payload(response)
+
+    def generate_response(self, attempt: int = 1, max_retries: Optional[int] = None, cache_mode: CacheMode = CacheMode.USE, **kwargs):
         """Generate a response from the OpenAI API.
 
         Args:
-            attempt (int, optional): Current attempt number for retries. Defaults to 1.
-            max_retries (int, optional): Maximum number of retry attempts. Defaults to 3.
+            attempt (int, optional): Attempt number to start from. Defaults to 1.
+            max_retries (int, optional): Maximum number of attempts. Defaults to the retry policy's.
+            cache_mode (CacheMode, optional): Per-request response cache control. Defaults to CacheMode.USE.
             **kwargs: Additional keyword arguments passed to generate_user_input.
 
         Returns:
@@ -20,61 +121,186 @@ class OpenAIProvider(BaseProvider):
                 tuple: (
                     str: Raw response content,
                     int: Number of prompt tokens used,
-                    int: Number of completion tokens used, 
+                    int: Number of completion tokens used,
                     int: Total tokens used,
                     float: Response time in seconds
                 )
 
         Raises:
-            Exception: If validation fails, max retries exceeded, or other API errors occur
+            ContextLengthExceededError: If the prompt does not fit the model's context window
+            SchemaValidationError: If the response doesn't match the expected schema
+            RateLimitTimeoutError: If the rate limiter had no capacity in time
+            CircuitOpenError: If the circuit for this model is open
+            ProviderError: If the request failed and retrying didn't (or couldn't) help
         """
+        start_time = time.time()
+        with span("prompt_build"):
+            system_prompt = self.generate_system_prompt()
+            user_input = self.generate_user_input(**kwargs)
+
+        cache_key = self.response_cache_key(system_prompt, user_input)
+        with span("cache_lookup"):
+            cached = self.cache_lookup(cache_key, cache_mode)
+        if cached is not None:
+            result = self.build_result(start_time=start_time, **cached)
+            record_response(self.agent_name, self.model_name, cached["prompt_tokens"], cached["completion_tokens"], time.time() - start_time, cached=True)
+            return result
 
+        estimated_tokens = self.estimate_request_tokens(system_prompt, user_input)
+        payload = self.call_with_retry(self._request, self._attempts_left(max_retries, attempt), estimated_tokens, system_prompt=system_prompt, user_input=user_input)
+        # Billed whether or not the content validates
+        self.settle_rate_limit(estimated_tokens, payload["total_tokens"])
         try:
-            start_time = time.time()
+            result = self.build_result(start_time=start_time, **payload)
+        except SchemaValidationError:
+            record_failure(self.agent_name, self.model_name)
+            raise
+        record_response(self.agent_name, self.model_name, payload["prompt_tokens"], payload["completion_tokens"], time.time() - start_time)
+        self.cache_store(cache_key, payload, cache_mode)
+        return result
+
+    async def agenerate_response(self, attempt: int = 1, max_retries: Optional[int] = None, cache_mode: CacheMode = CacheMode.USE, **kwargs):
+        """Generate a response from the OpenAI API using the async client.
+
+        Behaves exactly like `generate_response`, but awaits the request and the
+        retry backoff instead of blocking the worker thread.
+
+        Args:
+            attempt (int, optional): Attempt number to start from. Defaults to 1.
+            max_retries (int, optional): Maximum number of attempts. Defaults to the retry policy's.
+            cache_mode (CacheMode, optional): Per-request response cache control. Defaults to CacheMode.USE.
+            **kwargs: Additional keyword arguments passed to generate_user_input.
+
+        Returns:
+            tuple: Same shape as `generate_response`.
+
+        Raises:
+            ContextLengthExceededError: If the prompt does not fit the model's context window
+            SchemaValidationError: If the response doesn't match the expected schema
+            RateLimitTimeoutError: If the rate limiter had no capacity in time
+            CircuitOpenError: If the circuit for this model is open
+            ProviderError: If the request failed and retrying didn't (or couldn't) help
+        """
+        if self.async_model is None:
+            raise Exception(f"{self.agent_name} was created without an async client")
+
+        start_time = time.time()
+        with span("prompt_build"):
+            system_prompt = self.generate_system_prompt()
+            user_input = self.generate_user_input(**kwargs)
+
+        cache_key = self.response_cache_key(system_prompt, user_input)
+        with span("cache_lookup"):
+            cached = await self.acache_lookup(cache_key, cache_mode)
+        if cached is not None:
+            result = self.build_result(start_time=start_time, **cached)
+            record_response(self.agent_name, self.model_name, cached["prompt_tokens"], cached["completion_tokens"], time.time() - start_time, cached=True)
+            return result
+
+        estimated_tokens = self.estimate_request_tokens(system_prompt, user_input)
+        payload = await self.acall_with_retry(self._arequest, self._attempts_left(max_retries, attempt), estimated_tokens, system_prompt=system_prompt, user_input=user_input)
+        # Billed whether or not the content validates
+        await self.asettle_rate_limit(estimated_tokens, payload["total_tokens"])
+        try:
+            result = self.build_result(start_time=start_time, **payload)
+        except SchemaValidationError:
+            record_failure(self.agent_name, self.model_name)
+            raise
+        record_response(self.agent_name, self.model_name, payload["prompt_tokens"], payload["completion_tokens"], time.time() - start_time)
+        await self.acache_store(cache_key, payload, cache_mode)
+        return result
+
+    async def _aopen_stream(self, system_prompt: str, user_input: str):
+        """Start a streamed chat completion; returns the stream manager and the entered stream."""
+        manager = self.async_model.beta.chat.completions.stream(
+            model=self.model_name,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_input}
+                ],
+            response_format = self.response_structure,
+            temperature = self.temperature,
+            stream_options = {"include_usage": True},
+        )
+        try:
+            stream = await manager.__aenter__()
+        except APIError as e:
+            raise translate_error(e) from e
+        return manager, stream
+
+    async def astream_response(self, max_retries: Optional[int] = None, cache_mode: CacheMode = CacheMode.USE, **kwargs) -> AsyncIterator[StreamEvent]:
+        """Stream a response from the OpenAI API as it is generated.
+
+        Opening the stream goes through the same rate limiter, circuit breaker and retries as
+        `agenerate_response`; once text has been sent it can't be taken back, so failures after
+        the first delta are raised without retrying. A cached response is sent as a single delta.
+
+        Args:
+            max_retries (int, optional): Maximum number of attempts to open the stream. Defaults to the retry policy's.
+            cache_mode (CacheMode, optional): Per-request response cache control. Defaults to CacheMode.USE.
+            **kwargs: Additional keyword arguments passed to generate_user_input.
+
+        Yields:
+            StreamEvent: Text deltas, then one event carrying the same tuple `generate_response` returns.
+
+        Raises:
+            ContextLengthExceededError: If the prompt does not fit the model's context window
+            SchemaValidationError: If the complete response doesn't match the expected schema
+            RateLimitTimeoutError: If the rate limiter had no capacity in time
+            CircuitOpenError: If the circuit for this model is open
+            ProviderError: If the request failed
+        """
+        if self.async_model is None:
+            raise Exception(f"{self.agent_name} was created without an async client")
+
+        start_time = time.time()
+        with span("prompt_build"):
             system_prompt = self.generate_system_prompt()
             user_input = self.generate_user_input(**kwargs)
-            response = self.model.beta.chat.completions.parse(
-                model=self.model_name,
-                messages=[
-                    {"role": "system", "content": system_prompt}, 
-                    {"role": "user", "content": user_input}
-                    ],
-                response_format = self.response_structure,
-                temperature = self.temperature,
-            )
-
-            response_content = response.choices[0].message.content
-            prompt_tokens = response.usage.prompt_tokens
-            completion_tokens = response.usage.completion_tokens
-            total_tokens = response.usage.total_tokens  
-            response_time = round(time.time() - start_time, 2)
-
-            if self.structured_outputs:
-                try:
-                    structured_response = self.response_structure.model_validate_json(response_content)
-                    return structured_response, prompt_tokens, completion_tokens, total_tokens, response_time
-                except ValidationError as e:
-                    raise Exception(f"JSON response: {e} Dosen't match the expected schema")
-                
-            return response_content, prompt_tokens, completion_tokens, total_tokens, response_time
-        
-        except BadRequestError as e:
-
-            error_message = e.__str__()
-            if "context_length" in error_message or "string too long" in error_message:
-                if attempt < max_retries:
-                    return self.retry_request(self.generate_response, attempt + 1, max_retries, **kwargs)
-                else:
-                    print(traceback.format_exc())
-                    raise Exception("Max attempts reached")
-            else:
-                print(traceback.format_exc())
-                raise Exception(error_message)
-            
-        except Exception as e:
-            if attempt < max_retries:
-                return self.retry_request(self.generate_response, attempt + 1, max_retries, **kwargs)
-            else:
-                print(traceback.format_exc())
-                raise Exception(e)
-            
\ No newline at end of file
+
+        cache_key = self.response_cache_key(system_prompt, user_input)
+        with span("cache_lookup"):
+            cached = await self.acache_lookup(cache_key, cache_mode)
+        if cached is not None:
+            result = self.build_result(start_time=start_time, **cached)
+            record_response(self.agent_name, self.model_name, cached["prompt_tokens"], cached["completion_tokens"], time.time() - start_time, cached=True)
+            yield StreamEvent(delta=cached["response_content"])
+            yield StreamEvent(result=result)
+            return
+
+        estimated_tokens = self.estimate_request_tokens(system_prompt, user_input)
+        with span("llm_first_byte"):
+            manager, stream = await self.acall_with_retry(self._aopen_stream, max_retries, estimated_tokens, system_prompt=system_prompt, user_input=user_input)
+
+        parts = []
+        usage = None
+        try:
+            with span("llm_stream"), in_flight(self.agent_name, self.model_name):
+                async for event in stream:
+                    if event.type == "content.delta":
+                        parts.append(event.delta)
+                        yield StreamEvent(delta=event.delta)
+                    elif event.type == "chunk" and event.chunk.usage is not None:
+                        usage = event.chunk.usage
+        except APIError as e:
+            record_failure(self.agent_name, self.model_name)
+            raise translate_error(e) from e
+        finally:
+            await manager.__aexit__(None, None, None)
+
+        payload = {
+            "response_content": "".join(parts),
+            "prompt_tokens": usage.prompt_tokens if usage else 0,
+            "completion_tokens": usage.completion_tokens if usage else 0,
+            "total_tokens": usage.total_tokens if usage else 0,
+        }
+        if usage is not None:
+            await self.asettle_rate_limit(estimated_tokens, payload["total_tokens"])
+        try:
+            result = self.build_result(start_time=start_time, **payload)
+        except SchemaValidationError:
+            record_failure(self.agent_name, self.model_name)
+            raise
+        record_response(self.agent_name, self.model_name, payload["prompt_tokens"], payload["completion_tokens"], time.time() - start_time)
+        await self.acache_store(cache_key, payload, cache_mode)
+        yield StreamEvent(result=result)
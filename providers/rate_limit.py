@@ -0,0 +1,352 @@
+import asyncio
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+from helpers.loggers import get_logger
+from providers.errors import RateLimitTimeoutError
+
+try:
+    import redis
+    import redis.asyncio as aioredis
+except ImportError:  # redis is optional, the local buckets work on their own
+    redis = None
+    aioredis = None
+
+logger = get_logger()
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    """
+    An account limit for one provider/model.
+
+    Attributes:
+        rpm (float): Requests per minute, or 0 for no request limit.
+        tpm (float): Tokens (prompt plus completion) per minute, or 0 for no token limit.
+    """
+    rpm: float = 0
+    tpm: float = 0
+
+
+def _bucket_wait(level: float, capacity: float, rate: float, cost: float) -> float:
+    """Seconds until a bucket at `level` holds `cost` (capped at `capacity` so huge requests still pass)."""
+    need = min(cost, capacity)
+    return 0.0 if level >= need else (need - level) / rate
+
+
+class LocalRateLimitStore:
+    """
+    In-process token buckets, the stand-in when no Redis is configured.
+
+    Every process only knows its own traffic, so with several uvicorn workers each one gets
+    `1 / processes` of the limits.
+    """
+
+    def __init__(self, processes: int = 1):
+        self.processes = max(1, processes)
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+
+    def _level(self, key: str, capacity: float, now: float) -> float:
+        level, updated = self._buckets.get(key, (capacity, now))
+        return min(capacity, level + (now - updated) * capacity / 60)
+
+    def try_acquire(self, key: str, limit: RateLimit, tokens: float) -> float:
+        """
+        Take one request and `tokens` tokens if both buckets have them.
+
+        Returns:
+            float: 0 when granted, otherwise seconds to wait before trying again.
+        """
+        now = time.monotonic()
+        buckets = [(f"{key}:rpm", limit.rpm / self.processes, 1.0), (f"{key}:tpm", limit.tpm / self.processes, tokens)]
+        with self._lock:
+            levels = [(name, capacity, cost, self._level(name, capacity, now)) for name, capacity, cost in buckets if capacity > 0]
+            wait = max([_bucket_wait(level, capacity, capacity / 60, cost) for _, capacity, cost, level in levels] or [0.0])
+            for name, capacity, cost, level in levels:
+                self._buckets[name] = (level - min(cost, capacity) if wait == 0 else level, now)
+        return wait
+
+    def adjust(self, key: str, limit: RateLimit, tokens: float) -> None:
+        """
+        Correct the token bucket once the real usage is known. A positive `tokens` takes more,
+        a negative one gives back an overestimate. The level may go negative (debt).
+        """
+        capacity = limit.tpm / self.processes
+        if capacity <= 0 or tokens == 0:
+            return
+        now = time.monotonic()
+        name = f"{key}:tpm"
+        with self._lock:
+            self._buckets[name] = (min(capacity, self._level(name, capacity, now) - tokens), now)
+
+
+# Both buckets are checked and taken in one atomic step, using the Redis clock so every
+# worker (and host) agrees on the refill. Returns the wait in seconds as a string, "0" if granted.
+_ACQUIRE_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local wait = 0
+local levels = {}
+for i = 1, #KEYS do
+    local capacity = tonumber(ARGV[2 * i - 1])
+    local cost = math.min(tonumber(ARGV[2 * i]), capacity)
+    local state = redis.call('HMGET', KEYS[i], 'level', 'updated')
+    local level = tonumber(state[1]) or capacity
+    local updated = tonumber(state[2]) or now
+    level = math.min(capacity, level + (now - updated) * capacity / 60)
+    levels[i] = level
+    if level < cost then
+        wait = math.max(wait, (cost - level) / (capacity / 60))
+    end
+end
+for i = 1, #KEYS do
+    local capacity = tonumber(ARGV[2 * i - 1])
+    local level = levels[i]
+    if wait == 0 then
+        level = level - math.min(tonumber(ARGV[2 * i]), capacity)
+    end
+    redis.call('HSET', KEYS[i], 'level', tostring(level), 'updated', tostring(now))
+    redis.call('EXPIRE', KEYS[i], 120)
+end
+return tostring(wait)
+"""
+
+_ADJUST_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local capacity = tonumber(ARGV[1])
+local state = redis.call('HMGET', KEYS[1], 'level', 'updated')
+local level = tonumber(state[1]) or capacity
+local updated = tonumber(state[2]) or now
+level = math.min(capacity, level + (now - updated) * capacity / 60 - tonumber(ARGV[2]))
+redis.call('HSET', KEYS[1], 'level', tostring(level), 'updated', tostring(now))
+redis.call('EXPIRE', KEYS[1], 120)
+return tostring(level)
+"""
+
+
+class RedisRateLimitStore:
+    """
+    Token buckets kept in Redis and shared by every worker.
+
+    Redis failures are logged and the request is let through; the limiter must never be the
+    reason a request fails.
+    """
+
+    def __init__(self, url: str, prefix: str = "llm-ratelimit:"):
+        """
+        Args:
+            url (str): Redis connection URL.
+            prefix (str, optional): Key namespace. Defaults to "llm-ratelimit:".
+        """
+        self.url = url
+        self.prefix = prefix
+        self._client = None
+        self._async_client = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = redis.Redis.from_url(self.url, socket_timeout=0.5)
+        return self._client
+
+    @property
+    def async_client(self):
+        if self._async_client is None:
+            self._async_client = aioredis.Redis.from_url(self.url, socket_timeout=0.5)
+        return self._async_client
+
+    def _arguments(self, key: str, limit: RateLimit, tokens: float):
+        keys, args = [], []
+        for suffix, capacity, cost in (("rpm", limit.rpm, 1), ("tpm", limit.tpm, tokens)):
+            if capacity > 0:
+                keys.append(f"{self.prefix}{key}:{suffix}")
+                args.extend([capacity, cost])
+        return keys, args
+
+    def try_acquire(self, key: str, limit: RateLimit, tokens: float) -> float:
+        keys, args = self._arguments(key, limit, tokens)
+        if not keys:
+            return 0.0
+        try:
+            return float(self.client.eval(_ACQUIRE_SCRIPT, len(keys), *keys, *args))
+        except Exception as e:
+            logger.warning(f"Redis rate limiter unavailable, not limiting: {e}")
+            return 0.0
+
+    async def atry_acquire(self, key: str, limit: RateLimit, tokens: float) -> float:
+        keys, args = self._arguments(key, limit, tokens)
+        if not keys:
+            return 0.0
+        try:
+            return float(await self.async_client.eval(_ACQUIRE_SCRIPT, len(keys), *keys, *args))
+        except Exception as e:
+            logger.warning(f"Redis rate limiter unavailable, not limiting: {e}")
+            return 0.0
+
+    def adjust(self, key: str, limit: RateLimit, tokens: float) -> None:
+        if limit.tpm <= 0 or tokens == 0:
+            return
+        try:
+            self.client.eval(_ADJUST_SCRIPT, 1, f"{self.prefix}{key}:tpm", limit.tpm, tokens)
+        except Exception as e:
+            logger.warning(f"Redis rate limiter adjust failed: {e}")
+
+    async def aadjust(self, key: str, limit: RateLimit, tokens: float) -> None:
+        if limit.tpm <= 0 or tokens == 0:
+            return
+        try:
+            await self.async_client.eval(_ADJUST_SCRIPT, 1, f"{self.prefix}{key}:tpm", limit.tpm, tokens)
+        except Exception as e:
+            logger.warning(f"Redis rate limiter adjust failed: {e}")
+
+
+class RateLimiter:
+    """
+    Paces provider calls to the account's requests-per-minute and tokens-per-minute limits.
+
+    Callers ask for one request plus the tokens they estimate to spend and wait (without
+    blocking the event loop on the async path) until both buckets can cover it, so requests are
+    queued here instead of being rejected with a 429 and retried. Once the response reports the
+    real usage, `settle` corrects the estimate.
+    """
+
+    def __init__(self, limits: Dict[str, RateLimit], store, max_wait: float = 60.0):
+        """
+        Args:
+            limits (Dict[str, RateLimit]): Limits by "provider:model", "provider:*" or "*".
+            store: A `LocalRateLimitStore` or `RedisRateLimitStore`.
+            max_wait (float, optional): Longest a caller may queue, in seconds. Defaults to 60.
+        """
+        self.limits = limits
+        self.store = store
+        self.max_wait = max_wait
+        self.waits = 0
+        self.waited_seconds = 0.0
+
+    def limit_for(self, provider: str, model: str) -> Optional[RateLimit]:
+        for key in (f"{provider}:{model}", f"{provider}:*", "*"):
+            if key in self.limits:
+                return self.limits[key]
+        return None
+
+    def _next_wait(self, wait: float, deadline: float, key: str) -> float:
+        remaining = deadline - time.monotonic()
+        if wait > remaining:
+            raise RateLimitTimeoutError(f"Rate limit for {key} has no capacity within {self.max_wait}s", retry_after=wait)
+        self.waits += 1
+        self.waited_seconds += wait
+        # Re-check a little early, other workers may give back an overestimate meanwhile
+        return min(wait, 1.0)
+
+    def acquire(self, provider: str, model: str, tokens: float) -> None:
+        """
+        Block until one request and `tokens` tokens are available.
+
+        Raises:
+            RateLimitTimeoutError: If that takes longer than `max_wait`.
+        """
+        limit = self.limit_for(provider, model)
+        if limit is None:
+            return
+        key = f"{provider}:{model}"
+        deadline = time.monotonic() + self.max_wait
+        while True:
+            wait = self.store.try_acquire(key, limit, tokens)
+            if wait <= 0:
+                return
+            time.sleep(self._next_wait(wait, deadline, key))
+
+    async def aacquire(self, provider: str, model: str, tokens: float) -> None:
+        """
+        Awaitable counterpart of `acquire`.
+
+        Raises:
+            RateLimitTimeoutError: If that takes longer than `max_wait`.
+        """
+        limit = self.limit_for(provider, model)
+        if limit is None:
+            return
+        key = f"{provider}:{model}"
+        deadline = time.monotonic() + self.max_wait
+        while True:
+            if isinstance(self.store, RedisRateLimitStore):
+                wait = await self.store.atry_acquire(key, limit, tokens)
+            else:
+                wait = self.store.try_acquire(key, limit, tokens)
+            if wait <= 0:
+                return
+            await asyncio.sleep(self._next_wait(wait, deadline, key))
+
+    def settle(self, provider: str, model: str, estimated: float, actual: float) -> None:
+        """
+        Charge the difference between the estimated and the reported token usage.
+        """
+        limit = self.limit_for(provider, model)
+        if limit is not None:
+            self.store.adjust(f"{provider}:{model}", limit, actual - estimated)
+
+    async def asettle(self, provider: str, model: str, estimated: float, actual: float) -> None:
+        limit = self.limit_for(provider, model)
+        if limit is None:
+            return
+        if isinstance(self.store, RedisRateLimitStore):
+            await self.store.aadjust(f"{provider}:{model}", limit, actual - estimated)
+        else:
+            self.store.adjust(f"{provider}:{model}", limit, actual - estimated)
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "backend": "redis" if isinstance(self.store, RedisRateLimitStore) else "local",
+            "limits": {key: {"rpm": limit.rpm, "tpm": limit.tpm} for key, limit in self.limits.items()},
+            "waits": self.waits,
+            "waited_seconds": round(self.waited_seconds, 3),
+        }
+
+
+def parse_limits(raw: str) -> Dict[str, RateLimit]:
+    """
+    Parse `LLM_RATE_LIMITS`, e.g. `{"openai:gpt-4o-mini": {"rpm": 500, "tpm": 200000}, "openai:*": {"rpm": 60}}`.
+    """
+    return {key: RateLimit(rpm=float(value.get("rpm", 0)), tpm=float(value.get("tpm", 0))) for key, value in json.loads(raw).items()}
+
+
+_rate_limiter: Optional[RateLimiter] = None
+_rate_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> Optional[RateLimiter]:
+    """
+    Get the process-wide rate limiter, configured from the environment on first use.
+
+    Environment:
+        LLM_RATE_LIMITS: JSON limits by "provider:model" (see `parse_limits`). No limiting when unset.
+        LLM_RATE_LIMIT_REDIS_URL: Shares the buckets between workers through Redis when set.
+        LLM_RATE_LIMIT_PROCESSES: Without Redis, the limits are split evenly over this many processes. Defaults to 1.
+        LLM_RATE_LIMIT_MAX_WAIT: Longest a request may queue for capacity, in seconds. Defaults to 60.
+
+    Returns:
+        RateLimiter | None: The limiter, or None when no limits are configured.
+    """
+    global _rate_limiter
+    raw = os.getenv("LLM_RATE_LIMITS")
+    if not raw:
+        return None
+    if _rate_limiter is None:
+        with _rate_limiter_lock:
+            if _rate_limiter is None:
+                store = None
+                redis_url = os.getenv("LLM_RATE_LIMIT_REDIS_URL")
+                if redis_url:
+                    if redis is None:
+                        logger.warning("LLM_RATE_LIMIT_REDIS_URL is set but the redis package is not installed, using local buckets")
+                    else:
+                        store = RedisRateLimitStore(redis_url)
+                if store is None:
+                    store = LocalRateLimitStore(processes=int(os.getenv("LLM_RATE_LIMIT_PROCESSES", 1)))
+                _rate_limiter = RateLimiter(parse_limits(raw), store, max_wait=float(os.getenv("LLM_RATE_LIMIT_MAX_WAIT", 60)))
+    return _rate_limiter
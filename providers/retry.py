@@ -0,0 +1,307 @@
+import os
+import random
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional
+from providers.errors import ProviderError, CircuitOpenError
+
+
+class RetryPolicy:
+    """
+    Decides whether a failed provider call is retried and how long to wait first.
+
+    Only errors marked `retryable` (rate limits, timeouts, unavailability) are retried; schema
+    failures, context-length overflows and rejected requests fail on the first attempt. Waits
+    grow exponentially with "full jitter" so a burst of failing requests doesn't retry in lockstep.
+    """
+
+    def __init__(self, max_attempts: int = 3, base_delay: float = 0.5, max_delay: float = 20.0, multiplier: float = 2.0):
+        """
+        Args:
+            max_attempts (int, optional): Attempts per call, including the first. Defaults to 3.
+            base_delay (float, optional): Upper bound of the first wait in seconds. Defaults to 0.5.
+            max_delay (float, optional): Cap on any single wait in seconds. Defaults to 20.
+            multiplier (float, optional): Growth of the wait bound per attempt. Defaults to 2.
+        """
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.multiplier = multiplier
+
+    @staticmethod
+    def is_retryable(error: BaseException) -> bool:
+        return isinstance(error, ProviderError) and error.retryable
+
+    def delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """
+        Args:
+            attempt (int): The attempt that just failed, starting at 1.
+            retry_after (float, optional): The provider's requested wait, used as a lower bound. Defaults to None.
+
+        Returns:
+            float: Seconds to wait before the next attempt.
+        """
+        bound = min(self.max_delay, self.base_delay * self.multiplier ** (attempt - 1))
+        wait = random.uniform(0, bound)
+        if retry_after is not None:
+            wait = max(wait, min(retry_after, self.max_delay))
+        return wait
+
+
+class RetryBudget:
+    """
+    Caps retries at a fraction of recent requests so a provider brownout isn't amplified.
+
+    Within a sliding window, retries are allowed while they stay under
+    `max(min_retries, ratio * requests)`; beyond that a retryable failure is raised as is.
+    """
+
+    def __init__(self, ratio: float = 0.2, min_retries: int = 10, window: float = 10.0):
+        """
+        Args:
+            ratio (float, optional): Retries allowed per request in the window. Defaults to 0.2.
+            min_retries (int, optional): Retries always allowed per window, for low traffic. Defaults to 10.
+            window (float, optional): Length of the sliding window in seconds. Defaults to 10.
+        """
+        self.ratio = ratio
+        self.min_retries = min_retries
+        self.window = window
+        self._requests: deque = deque()
+        self._retries: deque = deque()
+        self.exhausted = 0
+        self._lock = threading.Lock()
+
+    def _trim(self, now: float) -> None:
+        horizon = now - self.window
+        while self._requests and self._requests[0] < horizon:
+            self._requests.popleft()
+        while self._retries and self._retries[0] < horizon:
+            self._retries.popleft()
+
+    def record_request(self) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self._trim(now)
+            self._requests.append(now)
+
+    def try_acquire(self) -> bool:
+        """
+        Returns:
+            bool: True if a retry may be made now (and it is counted), False if the budget is spent.
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._trim(now)
+            if len(self._retries) >= max(self.min_retries, self.ratio * len(self._requests)):
+                self.exhausted += 1
+                return False
+            self._retries.append(now)
+            return True
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            self._trim(time.monotonic())
+            return {
+                "window_seconds": self.window,
+                "requests": len(self._requests),
+                "retries": len(self._retries),
+                "allowed": max(self.min_retries, self.ratio * len(self._requests)),
+                "exhausted": self.exhausted,
+            }
+
+
+class CircuitBreaker:
+    """
+    Fails fast while a provider/model keeps failing.
+
+    States:
+        closed: Calls go through; `failure_threshold` consecutive retryable failures open the circuit.
+        open: Calls raise `CircuitOpenError` immediately until `recovery_timeout` has passed.
+        half_open: Up to `half_open_max_calls` probe calls go through; a success closes the
+            circuit, a failure opens it again.
+
+    Only availability failures (retryable provider errors) count against the circuit. Any answer
+    from the provider, even a rejected request or an invalid schema, shows it is up.
+    """
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = 5, recovery_timeout: float = 30.0, half_open_max_calls: int = 1):
+        """
+        Args:
+            name (str): What the breaker guards, e.g. "OpenAIProvider:gpt-4o-mini".
+            failure_threshold (int, optional): Consecutive failures that open the circuit. Defaults to 5.
+            recovery_timeout (float, optional): Seconds the circuit stays open before probing. Defaults to 30.
+            half_open_max_calls (int, optional): Concurrent probe calls while half open. Defaults to 1.
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probes = 0
+        self.times_opened = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state(time.monotonic())
+
+    def _current_state(self, now: float) -> str:
+        if self._state == self.OPEN and now - self._opened_at >= self.recovery_timeout:
+            self._state = self.HALF_OPEN
+            self._probes = 0
+        return self._state
+
+    def before_call(self) -> None:
+        """
+        Raises:
+            CircuitOpenError: If the call must not go through right now.
+        """
+        now = time.monotonic()
+        with self._lock:
+            state = self._current_state(now)
+            if state == self.CLOSED:
+                return
+            if state == self.HALF_OPEN and self._probes < self.half_open_max_calls:
+                self._probes += 1
+                return
+            self.rejected += 1
+            retry_after = max(0.0, self.recovery_timeout - (now - self._opened_at)) if state == self.OPEN else 1.0
+        raise CircuitOpenError(f"Circuit for {self.name} is {state}, not calling the provider", retry_after=retry_after)
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            if self._state == self.HALF_OPEN:
+                self._state = self.CLOSED
+                self._probes = 0
+
+    def record_failure(self) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or (self._state == self.CLOSED and self._failures >= self.failure_threshold):
+                self._state = self.OPEN
+                self._opened_at = now
+                self._probes = 0
+                self.times_opened += 1
+
+    def release(self) -> None:
+        """
+        Give back a probe slot of a call that ended without an outcome (e.g. it was cancelled).
+        """
+        with self._lock:
+            if self._state == self.HALF_OPEN and self._probes > 0:
+                self._probes -= 1
+
+    def reset(self) -> None:
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._probes = 0
+
+    def snapshot(self) -> Dict[str, object]:
+        now = time.monotonic()
+        with self._lock:
+            state = self._current_state(now)
+            return {
+                "name": self.name,
+                "state": state,
+                "consecutive_failures": self._failures,
+                "retry_after": round(max(0.0, self.recovery_timeout - (now - self._opened_at)), 3) if state == self.OPEN else 0.0,
+                "times_opened": self.times_opened,
+                "rejected": self.rejected,
+            }
+
+
+_retry_policy: Optional[RetryPolicy] = None
+_retry_budget: Optional[RetryBudget] = None
+_breakers: Dict[str, CircuitBreaker] = {}
+_lock = threading.Lock()
+
+
+def get_retry_policy() -> RetryPolicy:
+    """
+    Get the process-wide retry policy, configured from the environment on first use.
+
+    Environment:
+        LLM_RETRY_MAX_ATTEMPTS: Attempts per call, including the first, unless the caller passes its own. Defaults to 3.
+        LLM_RETRY_BASE_DELAY: Upper bound of the first backoff in seconds. Defaults to 0.5.
+        LLM_RETRY_MAX_DELAY: Cap on a single backoff in seconds. Defaults to 20.
+
+    Returns:
+        RetryPolicy: The shared policy.
+    """
+    global _retry_policy
+    if _retry_policy is None:
+        with _lock:
+            if _retry_policy is None:
+                _retry_policy = RetryPolicy(
+                    max_attempts=int(os.getenv("LLM_RETRY_MAX_ATTEMPTS", 3)),
+                    base_delay=float(os.getenv("LLM_RETRY_BASE_DELAY", 0.5)),
+                    max_delay=float(os.getenv("LLM_RETRY_MAX_DELAY", 20)),
+                )
+    return _retry_policy
+
+
+def get_retry_budget() -> RetryBudget:
+    """
+    Get the process-wide retry budget, configured from the environment on first use.
+
+    Environment:
+        LLM_RETRY_BUDGET_RATIO: Retries allowed per request in the window. Defaults to 0.2.
+        LLM_RETRY_BUDGET_MIN: Retries always allowed per window. Defaults to 10.
+        LLM_RETRY_BUDGET_WINDOW: Window length in seconds. Defaults to 10.
+
+    Returns:
+        RetryBudget: The shared budget.
+    """
+    global _retry_budget
+    if _retry_budget is None:
+        with _lock:
+            if _retry_budget is None:
+                _retry_budget = RetryBudget(
+                    ratio=float(os.getenv("LLM_RETRY_BUDGET_RATIO", 0.2)),
+                    min_retries=int(os.getenv("LLM_RETRY_BUDGET_MIN", 10)),
+                    window=float(os.getenv("LLM_RETRY_BUDGET_WINDOW", 10)),
+                )
+    return _retry_budget
+
+
+def get_circuit_breaker(name: str) -> CircuitBreaker:
+    """
+    Get the circuit breaker for a provider/model, creating it on first use.
+
+    Environment:
+        LLM_CIRCUIT_FAILURE_THRESHOLD: Consecutive failures that open a circuit. Defaults to 5.
+        LLM_CIRCUIT_RECOVERY_SECONDS: Seconds a circuit stays open before probing. Defaults to 30.
+
+    Args:
+        name (str): The provider/model the breaker guards.
+
+    Returns:
+        CircuitBreaker: The breaker shared by every agent using that provider/model.
+    """
+    breaker = _breakers.get(name)
+    if breaker is None:
+        with _lock:
+            breaker = _breakers.get(name)
+            if breaker is None:
+                breaker = _breakers[name] = CircuitBreaker(
+                    name,
+                    failure_threshold=int(os.getenv("LLM_CIRCUIT_FAILURE_THRESHOLD", 5)),
+                    recovery_timeout=float(os.getenv("LLM_CIRCUIT_RECOVERY_SECONDS", 30)),
+                )
+    return breaker
+
+
+def circuit_breakers() -> List[CircuitBreaker]:
+    with _lock:
+        return list(_breakers.values())
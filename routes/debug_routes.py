@@ -0,0 +1,13 @@
+from fastapi import APIRouter
+from controllers.debug_controller import recent_traces, trace_summary, circuit_states, reset_circuit, rate_limit_stats, job_queue_stats, admission_stats, document_store_stats
+
+router = APIRouter()
+
+router.get("/debug/traces")(recent_traces)
+router.get("/debug/traces/summary")(trace_summary)
+router.get("/debug/circuits")(circuit_states)
+router.post("/debug/circuits/reset")(reset_circuit)
+router.get("/debug/rate-limits")(rate_limit_stats)
+router.get("/debug/jobs")(job_queue_stats)
+router.get("/debug/admission")(admission_stats)
+router.get("/debug/documents")(document_store_stats)
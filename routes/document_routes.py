@@ -0,0 +1,9 @@
+from fastapi import APIRouter
+from controllers.document_controller import create_document, upload_document, document_metadata, delete_document
+
+router = APIRouter()
+
+router.post("/documents")(create_document)
+router.post("/documents/upload")(upload_document)
+router.get("/documents/{doc_id}")(document_metadata)
+router.delete("/documents/{doc_id}")(delete_document)
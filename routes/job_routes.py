@@ -0,0 +1,9 @@
+from fastapi import APIRouter
+from controllers.job_controller import submit_resource_job_agent, submit_upload_resource_job_agent, job_status, job_result
+
+router = APIRouter()
+
+router.post("/resource/jobs")(submit_resource_job_agent)
+router.post("/resource/upload/jobs")(submit_upload_resource_job_agent)
+router.get("/jobs/{job_id}")(job_status)
+router.get("/jobs/{job_id}/result")(job_result)
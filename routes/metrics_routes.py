@@ -0,0 +1,6 @@
+from fastapi import APIRouter
+from controllers.metrics_controller import metrics
+
+router = APIRouter()
+
+router.get("/metrics")(metrics)
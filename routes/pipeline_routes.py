@@ -0,0 +1,6 @@
+from fastapi import APIRouter
+from controllers.agent_controller import pipeline_agent
+
+router = APIRouter()
+
+router.post("/pipeline")(pipeline_agent)
@@ -0,0 +1,6 @@
+from fastapi import APIRouter
+from controllers.agent_controller import reference_agent
+
+router = APIRouter()
+
+router.post("/reference")(reference_agent)
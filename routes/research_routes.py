@@ -1,6 +1,7 @@
 from fastapi import APIRouter
-from controllers.agent_controller import research_agent
+from controllers.agent_controller import research_agent, research_stream_agent
 
 router = APIRouter()
 
-router.post("/research")(research_agent)
\ No newline at end of file
+router.post("/research")(research_agent)
+router.post("/research/stream")(research_stream_agent)
@@ -1,6 +1,7 @@
 from fastapi import APIRouter
-from controllers.agent_controller import resource_agent
+from controllers.agent_controller import resource_agent, upload_resource_agent
 
 router = APIRouter()
 
-router.post("/resource")(resource_agent)
\ No newline at end of file
+router.post("/resource")(resource_agent)
+router.post("/resource/upload")(upload_resource_agent)
\ No newline at end of file
@@ -0,0 +1,99 @@
+from helpers.documents import get_document_store, StoredDocument, DocumentNotFoundError
+from helpers.helpers import PDFProcessor
+from helpers.loggers import get_logger
+from helpers.tracing import span
+from typing import Optional, Tuple
+import asyncio
+import os
+
+logger = get_logger()
+
+def extract_pdf_text(path: str, content_hash: str = None) -> Tuple[str, int]:
+    """
+    Extract the text of a PDF file for the document store.
+
+    Args:
+        path (str): The file path to the PDF document.
+        content_hash (str, optional): SHA-256 of the file when the caller already has it. Defaults to None.
+
+    Returns:
+        Tuple[str, int]: The text of all pages and the page count.
+    """
+    pages = PDFProcessor(pdf_path = path, content_hash = content_hash).extract_page_texts()
+    return "".join(pages), len(pages)
+
+async def ingest_text_document(text: str, title: str = None) -> StoredDocument:
+    """
+    Normalize and store a text document.
+
+    Args:
+        text (str): The document text.
+        title (str, optional): A title for the document. Defaults to None.
+
+    Returns:
+        StoredDocument: The stored document; its `id` can be sent as `doc_id` instead of the text.
+    """
+    with span("document_ingest"):
+        return await asyncio.to_thread(get_document_store().ingest, text, "text", title)
+
+async def ingest_pdf_document(path: str, title: str = None, content_hash: str = None) -> StoredDocument:
+    """
+    Extract, normalize and store the text of a PDF file.
+
+    Args:
+        path (str): The file path to the PDF document.
+        title (str, optional): A title for the document. Defaults to the file name.
+        content_hash (str, optional): SHA-256 of the file when the caller already has it. Defaults to None.
+
+    Returns:
+        StoredDocument: The stored document.
+
+    Raises:
+        ValueError: If no text could be extracted from the PDF.
+    """
+    text, pages = await asyncio.to_thread(extract_pdf_text, path, content_hash)
+    if not text.strip():
+        raise ValueError("No text could be extracted from the PDF")
+    with span("document_ingest"):
+        return await asyncio.to_thread(get_document_store().ingest, text, "pdf", title or os.path.basename(path), pages)
+
+async def load_document(doc_id: str) -> StoredDocument:
+    """
+    Load a stored document with its normalized text.
+
+    Args:
+        doc_id (str): The document id returned at ingestion.
+
+    Returns:
+        StoredDocument: The document.
+
+    Raises:
+        DocumentNotFoundError: If the id is unknown or the document was evicted.
+    """
+    with span("document_load"):
+        document = await asyncio.to_thread(get_document_store().get, doc_id)
+    if document is None:
+        raise DocumentNotFoundError(f"Unknown document id: {doc_id}")
+    return document
+
+async def resolve_document_data(data: Optional[str], doc_id: Optional[str]) -> str:
+    """
+    Resolve the data of a request that sends either the text itself or the id of a stored document.
+
+    Args:
+        data (str | None): Inline data.
+        doc_id (str | None): The id of a stored document.
+
+    Returns:
+        str: The inline data, or the document's `NormalizedText`.
+
+    Raises:
+        ValueError: If both or neither are given.
+        DocumentNotFoundError: If the document is unknown.
+    """
+    if (data is None) == (doc_id is None):
+        raise ValueError("Provide exactly one of 'data' or 'doc_id'")
+    if doc_id is None:
+        return data
+    document = await load_document(doc_id)
+    return document.text
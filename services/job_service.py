@@ -0,0 +1,78 @@
+from helpers.jobs import get_job_queue, Job
+from helpers.loggers import get_logger
+from services.resource_service import process_document
+from enums.cache_mode import CacheMode
+from typing import Any, Dict
+import os
+
+logger = get_logger()
+
+def _remove_upload(pdf_path: str) -> None:
+    try:
+        os.unlink(pdf_path)
+    except FileNotFoundError:
+        pass
+
+async def run_resource_job(payload: Dict[str, Any]) -> dict:
+    """Run `process_document` for a queued resource job, removing a spooled upload afterwards.
+
+    Args:
+        payload (Dict[str, Any]): pdf_path, provider, selected_model, cache_mode, and for uploads
+            content_hash and cleanup (delete `pdf_path` once done).
+
+    Returns:
+        dict: The document summary, as returned by `/api/resource`.
+    """
+    pdf_path = payload["pdf_path"]
+
+    # process_document removes the upload once no shared extraction reads it, even if the job times out first
+    return await process_document(
+        pdf_path,
+        payload.get("provider"),
+        payload.get("selected_model"),
+        CacheMode(payload.get("cache_mode", CacheMode.USE.value)),
+        content_hash=payload.get("content_hash"),
+        cleanup=(lambda: _remove_upload(pdf_path)) if payload.get("cleanup") else None
+    )
+
+def abandon_resource_job(payload: Dict[str, Any]) -> None:
+    """Remove the spooled upload of a resource job that is dropped before it ever ran (e.g. at shutdown)."""
+    if payload.get("cleanup"):
+        _remove_upload(payload["pdf_path"])
+
+JOB_HANDLERS = {
+    "resource": run_resource_job,
+}
+
+JOB_ABANDON_HOOKS = {
+    "resource": abandon_resource_job,
+}
+
+async def submit_resource_job(pdf_path: str, provider: str = None, selected_model: str = None, cache_mode: CacheMode = CacheMode.USE,
+                              content_hash: str = None, cleanup: bool = False) -> Job:
+    """Queue a document for background summarization.
+
+    Args:
+        pdf_path (str): The PDF to process.
+        provider (str, optional): The AI provider to use. Defaults to None (environment default)
+        selected_model (str, optional): The specific model to use. Defaults to None (environment default)
+        cache_mode (CacheMode, optional): Response cache control for this job. Defaults to CacheMode.USE
+        content_hash (str, optional): SHA-256 of the file when already known (uploads). Defaults to None
+        cleanup (bool, optional): Delete the file once the job is done. Defaults to False
+
+    Returns:
+        Job: The queued job.
+
+    Raises:
+        JobQueueFullError: If the queue has no room for another job.
+    """
+    job = await get_job_queue().submit("resource", {
+        "pdf_path": pdf_path,
+        "provider": provider,
+        "selected_model": selected_model,
+        "cache_mode": cache_mode.value,
+        "content_hash": content_hash,
+        "cleanup": cleanup,
+    })
+    logger.info(f"Queued resource job {job.id} for {pdf_path}")
+    return job
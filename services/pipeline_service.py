@@ -0,0 +1,117 @@
+from helpers.helpers import PDFProcessor
+from helpers.loggers import get_logger
+from helpers.pipeline import Stage, StageOutcome, run_dag
+from agents.audio_agent import create_audio_agent
+from services.resource_service import summarize_extraction
+from services.reference_service import collect_references, scout_references
+from enums.cache_mode import CacheMode
+from typing import Any, Dict, List
+import asyncio
+import hashlib
+import os
+
+logger = get_logger()
+
+# Stages a client can ask for; extraction always runs, and audio pulls in the stages it builds on
+PIPELINE_STAGES = ("resource", "reference", "audio")
+DEFAULT_PIPELINE_STAGES = ("resource", "reference")
+_STAGE_DEPENDENCIES = {
+    "resource": ("extract",),
+    "reference": ("extract",),
+    "audio": ("resource", "reference"),
+}
+
+def _render_document_summary(document_info: dict) -> str:
+    atomic = "\n".join(f"- {topic}: {synopsis}" for topic, synopsis in (document_info.get("atomic_summaries") or {}).items())
+    return f"Title: {document_info['title']}\nSummary: {document_info['summary']}\nKey topics:\n{atomic}"
+
+def _render_reference_summaries(reference_info: dict) -> str:
+    references = reference_info.get("encapsulated_references") or {}
+    return "\n".join(f"- {title}: {summary}" for title, summary in references.items()) or "None"
+
+def _save_audio(wav_bytes: bytes) -> dict:
+    directory = os.getenv("AUDIO_OUTPUT_DIR", os.path.join(".cache", "audio"))
+    os.makedirs(directory, exist_ok=True)
+    digest = hashlib.sha256(wav_bytes).hexdigest()
+    path = os.path.join(directory, f"{digest[:32]}.wav")
+    with open(path, "wb") as f:
+        f.write(wav_bytes)
+    return {"path": path, "bytes": len(wav_bytes), "sha256": digest}
+
+def resolve_stages(stages: List[str] = None) -> List[str]:
+    """Validate the requested stages and add the ones they depend on, in pipeline order.
+
+    Args:
+        stages (List[str], optional): Stages requested by the client. Defaults to DEFAULT_PIPELINE_STAGES
+
+    Returns:
+        List[str]: Every stage to run, including "extract".
+
+    Raises:
+        ValueError: If an unknown stage is requested.
+    """
+    unknown = set(stages or ()) - set(PIPELINE_STAGES)
+    if unknown:
+        raise ValueError(f"Unknown pipeline stage(s) {sorted(unknown)}, expected some of {list(PIPELINE_STAGES)}")
+    wanted = set(stages or DEFAULT_PIPELINE_STAGES)
+    pending = list(wanted)
+    while pending:
+        for dependency in _STAGE_DEPENDENCIES.get(pending.pop(), ()):
+            if dependency not in wanted:
+                wanted.add(dependency)
+                pending.append(dependency)
+    return ["extract"] + [stage for stage in PIPELINE_STAGES if stage in wanted]
+
+async def run_pipeline(pdf_file, provider: str = None, selected_model: str = None, cache_mode: CacheMode = CacheMode.USE,
+                       stages: List[str] = None, audio_model: str = None, content_hash: str = None) -> Dict[str, StageOutcome]:
+    """Run the agents over one document as a DAG.
+
+    The PDF is extracted once; the resource and reference agents then run concurrently on that
+    extraction, and the audio lesson starts as soon as both of its inputs are ready.
+
+    Args:
+        pdf_file: The PDF file to process
+        provider (str, optional): The AI provider to use. Defaults to environment variable or 'openai'
+        selected_model (str, optional): The model of the resource and reference agents. Defaults to environment variable or 'gpt-4o-mini'
+        cache_mode (CacheMode, optional): Response cache control for the agents. Defaults to CacheMode.USE
+        stages (List[str], optional): Stages to run, see PIPELINE_STAGES. Defaults to resource and reference
+        audio_model (str, optional): The audio capable model of the audio agent. Defaults to AUDIO_MODEL
+        content_hash (str, optional): SHA-256 of the file when the caller already has it. Defaults to None
+
+    Returns:
+        Dict[str, StageOutcome]: The outcome (result, status and timings) of every stage that ran.
+
+    Raises:
+        ValueError: If an unknown stage is requested.
+    """
+    selected_model = os.getenv("SELECTED_MODEL", "gpt-4o-mini") if selected_model is None else selected_model
+    provider = os.getenv("PROVIDER", "openai") if provider is None else provider
+    to_run = resolve_stages(stages)
+
+    async def extract(_: Dict[str, Any]) -> dict:
+        pdf_processor = PDFProcessor(pdf_path = pdf_file, content_hash = content_hash)
+        # PyMuPDF is synchronous, keep it off the event loop
+        extracted = await asyncio.to_thread(pdf_processor.extract_text_and_images)
+        if not extracted["pages"]:
+            raise ValueError(f"Could not extract any content from {pdf_file}")
+        return extracted
+
+    async def resource(inputs: Dict[str, Any]) -> dict:
+        return await summarize_extraction(inputs["extract"], provider, selected_model, cache_mode)
+
+    async def reference(inputs: Dict[str, Any]) -> dict:
+        hyperlinks = collect_references(inputs["extract"]["pages"])
+        return await scout_references(hyperlinks, inputs["extract"]["text"], provider, selected_model, cache_mode)
+
+    async def audio(inputs: Dict[str, Any]) -> dict:
+        audio_agent = create_audio_agent(provider = provider, selected_model = audio_model)
+        prompt = audio_agent.generate_user_input(
+            data = _render_document_summary(inputs["resource"]),
+            references = _render_reference_summaries(inputs["reference"])
+        )
+        wav_bytes = await audio_agent.agenerate_audio(prompt)
+        return await asyncio.to_thread(_save_audio, wav_bytes)
+
+    functions = {"extract": extract, "resource": resource, "reference": reference, "audio": audio}
+    logger.info(f"Running pipeline stages {to_run} on {pdf_file}")
+    return await run_dag([Stage(name, functions[name], _STAGE_DEPENDENCIES.get(name, ())) for name in to_run])
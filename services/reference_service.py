@@ -1,49 +1,124 @@
-from agents.reference_agent import create_research_agent #noqa
+from agents.reference_agent import create_reference_agent
 from helpers.loggers import get_logger
-from helpers.helpers import PDFProcessor
-from typing import Dict, Any
+from helpers.helpers import PDFProcessor, PageRecord
+from helpers.chunking import CHARS_PER_TOKEN
+from helpers.link_fetcher import get_link_fetcher, FetchedPage
+from enums.cache_mode import CacheMode
+from typing import Dict, Any, Iterable, List, Tuple
+import os
 import traceback
 
 logger = get_logger()
 
-def source_reference_content(path: str):
+def source_reference_content(path: str, content_hash: str = None) -> Dict[str, str]:
     """
-    Extract reference hyperlinks from a given PDF file using the PDFProcessor.
+    Extract the reference hyperlinks of a PDF file, from its link annotations and the URLs in its text.
 
     Args:
         path (str): The file path to the PDF document.
+        content_hash (str, optional): SHA-256 of the file when the caller already has it. Defaults to None.
 
     Returns:
-        list: A list of extracted references (typically hyperlinks) from the PDF, or None if an error occurs.
+        Dict[str, str]: Each distinct link, in order of first appearance, with the pages citing it.
     """
-    try:
-        
-        pdf_processor = PDFProcessor()
-        extracted_references = pdf_processor.extract_references(path)
+    return collect_references(PDFProcessor(pdf_path = path, content_hash = content_hash).iter_pages())
 
-        return extracted_references 
+def collect_references(pages: Iterable[PageRecord]) -> Dict[str, str]:
+    """
+    Collect the links of an already extracted document: its link annotations and the URLs written in its text.
 
-    except Exception as e:
-        logger.error(f"An error {e} occurred during reference scouting.\More Details: {traceback.format_exc()}")
-    return 
+    Args:
+        pages (Iterable[PageRecord]): The page records of the document.
+
+    Returns:
+        Dict[str, str]: Each distinct link, in order of first appearance, with the pages citing it.
+    """
+    cited_on: Dict[str, List[int]] = {}
+    for record in pages:
+        for link in PDFProcessor.page_hyperlinks(record):
+            cited_on.setdefault(link, []).append(record.number + 1)
+    return {link: f"Cited on page(s) {', '.join(map(str, numbers))}" for link, numbers in cited_on.items()}
+
+async def fetch_reference_content(hyperlinks: Dict[str, str]) -> Tuple[Dict[str, str], Dict[str, FetchedPage]]:
+    """
+    Fetch the referenced pages concurrently through the pooled link fetcher.
+
+    At most REFERENCE_MAX_LINKS (default 20) links are fetched, and the text of each is cut to
+    REFERENCE_MAX_CHARS (default 6000) characters before it reaches the agent.
+
+    Args:
+        hyperlinks (Dict[str, str]): Links with their citation context, as returned by `collect_references`.
+
+    Returns:
+        tuple: The readable content of every link that could be fetched, and the fetch outcome of every link tried.
+    """
+    max_links = int(os.getenv("REFERENCE_MAX_LINKS", 20))
+    max_chars = int(os.getenv("REFERENCE_MAX_CHARS", 6000))
+    links = list(hyperlinks)[:max_links]
+    if len(hyperlinks) > max_links:
+        logger.info(f"Fetching the first {max_links} of {len(hyperlinks)} references")
+
+    pages = await get_link_fetcher().fetch_all(links)
+    content = {
+        link: f"{hyperlinks[link]}\n{page.text[:max_chars]}"
+        for link, page in pages.items() if page.ok and page.text
+    }
+    logger.info(f"Fetched {len(content)} of {len(links)} references")
+    return content, pages
+
+async def scout_references(hyperlinks: Dict[str, str], pdf_content: str, provider: str, selected_model: str, cache_mode: CacheMode = CacheMode.USE) -> dict:
+    """
+    Fetch a document's references and have the reference agent summarize them for the main source.
+
+    Args:
+        hyperlinks (Dict[str, str]): Links with their citation context.
+        pdf_content (str): The main document's text.
+        provider (str): The provider used for the model.
+        selected_model (str): The model to use.
+        cache_mode (CacheMode, optional): Response cache control for this request. Defaults to CacheMode.USE
+
+    Returns:
+        dict: The links, the fetch outcome of each and the encapsulated references.
+    """
+    if not hyperlinks:
+        return {"links": [], "fetched": {}, "encapsulated_references": {}}
+    content, pages = await fetch_reference_content(hyperlinks)
+    encapsulated = {}
+    if content:
+        encapsulated = await encapsulate_references(provider, selected_model, pdf_content, content, cache_mode)
+    return {
+        "links": list(hyperlinks),
+        "fetched": {link: page.summary() for link, page in pages.items()},
+        "encapsulated_references": encapsulated or {},
+    }
+
+def _render_references(hyperlink_content: Dict[str, str]) -> str:
+    return "\n\n".join(f"Reference: {link}\n{content}" for link, content in hyperlink_content.items())
 
-def encapsulate_references(provider: str, selected_model: Any, pdf_content ,hyperlink_content: Dict[str, str]):
+async def encapsulate_references(provider: str, selected_model: Any, pdf_content ,hyperlink_content: Dict[str, str], cache_mode: CacheMode = CacheMode.USE):
     """
     Generate summarized or encapsulated references from extracted hyperlinks and PDF content using a research agent.
 
     Args:
         provider (str): The provider used for the model (e.g., OpenAI, Anthropic).
         selected_model (Any): The specific model to be used for generating responses.
-        pdf_content (Any): The main textual content extracted from the PDF.
+        pdf_content (Any): The main textual content extracted from the PDF. Only its beginning
+            (REFERENCE_MAIN_SOURCE_TOKENS, default 4000 tokens) is sent along as the main source.
         hyperlink_content (Dict[str, str]): A dictionary of hyperlinks and their associated reference text.
+        cache_mode (CacheMode, optional): Response cache control for this request. Defaults to CacheMode.USE
 
     Returns:
         Any: The encapsulated reference summaries produced by the agent, or raises an exception if an error occurs.
     """
     try:
+        main_source_chars = int(int(os.getenv("REFERENCE_MAIN_SOURCE_TOKENS", 4000)) * CHARS_PER_TOKEN)
 
-        reference_agent = create_research_agent(provider = provider, selected_model = selected_model)
-        response_json, prompt_tokens, completion_tokens, total_tokens, response_time = reference_agent.generate_response(reference_data = hyperlink_content, main_content = pdf_content)
+        reference_agent = create_reference_agent(provider = provider, selected_model = selected_model)
+        response_json, prompt_tokens, completion_tokens, total_tokens, response_time = await reference_agent.agenerate_response(
+            reference_data = _render_references(hyperlink_content),
+            main_source = str(pdf_content)[:main_source_chars],
+            cache_mode = cache_mode
+        )
         encapsulated_references = response_json.encapsulated_references
         
         logger.info(f"Prompt Tokens: {prompt_tokens}")
@@ -55,4 +130,4 @@ def encapsulate_references(provider: str, selected_model: Any, pdf_content ,hype
     
     except Exception as e:
         logger.error(f"An error {e} occurred during generation of reference summaries.\n{traceback.format_exc()}")
-        raise e
\ No newline at end of file
+        raise e
@@ -1,17 +1,26 @@
 from agents.research_agent import create_research_agent
 from helpers.loggers import get_logger
+from helpers.singleflight import SingleFlight, make_flight_key
+from enums.cache_mode import CacheMode
+from helpers.partial_json import PartialJSONParser
+from helpers.documents import NormalizedText
+from typing import AsyncIterator, Dict
 import os
 
 logger = get_logger()
 
-def research_service(query: str, data: str, provider: str = None, selected_model: str = None):
+# Identical queries that arrive while one is in flight share its LLM call
+_research_flights = SingleFlight()
+
+async def research_service(query: str, data: str, provider: str = None, selected_model: str = None, cache_mode: CacheMode = CacheMode.USE):
     """Research service function that processes queries using an AI research agent.
 
     Args:
         query (str): The user's research query or question
-        data (str): The context or data to analyze
+        data (str): The context or data to analyze, or a stored document's `NormalizedText`
         provider (str, optional): The AI provider to use. Defaults to environment variable or 'openai'
         selected_model (str, optional): The specific model to use. Defaults to environment variable or 'gpt-4o-mini'
+        cache_mode (CacheMode, optional): Response cache control for this request. Defaults to CacheMode.USE
 
     Returns:
         str: The answer/response from the research agent
@@ -21,20 +30,70 @@ def research_service(query: str, data: str, provider: str = None, selected_model
     """
     try:
         selected_model = os.getenv("SELECTED_MODEL", "gpt-4o-mini") if selected_model is None else selected_model
-        provider = os.getenv("PROVIDER", "openai")
-        research_agent = create_research_agent(provider = provider, selected_model = selected_model)
-        response_json, prompt_tokens, completion_tokens, total_tokens, response_time = research_agent.generate_response(query = query, data = data)
+        provider = os.getenv("PROVIDER", "openai") if provider is None else provider
+        # A stored document is identified by its digest, without hashing its whole text again
+        data_key = ["doc", data.digest] if isinstance(data, NormalizedText) and data.digest else data
+        flight_key = make_flight_key(query, data_key, provider, selected_model, cache_mode)
+        return await _research_flights.do(flight_key, _run_research, query, data, provider, selected_model, cache_mode)
+    except Exception as e:
+        logger.error(f"Error in research service: {e}")
+        raise e
 
-        reason = response_json.reasoning
-        answer = response_json.answer
 
-        logger.info(f"Reason: {reason}")
-        logger.info(f"Prompt Tokens: {prompt_tokens}")
-        logger.info(f"Completion Tokens: {completion_tokens}")
-        logger.info(f"Total Tokens: {total_tokens}")
-        logger.info(f"Response Time: {response_time}")
+async def _run_research(query: str, data: str, provider: str, selected_model: str, cache_mode: CacheMode):
+    """Run the research agent once; shared by every identical in-flight `research_service` call."""
+    research_agent = create_research_agent(provider = provider, selected_model = selected_model)
+    response_json, prompt_tokens, completion_tokens, total_tokens, response_time = await research_agent.agenerate_response(query = query, data = data, cache_mode = cache_mode)
 
-        return answer
-    except Exception as e:
-        logger.error(f"Error in research service: {e}")
-        raise e
\ No newline at end of file
+    reason = response_json.reasoning
+    answer = response_json.answer
+
+    logger.info(f"Reason: {reason}")
+    logger.info(f"Prompt Tokens: {prompt_tokens}")
+    logger.info(f"Completion Tokens: {completion_tokens}")
+    logger.info(f"Total Tokens: {total_tokens}")
+    logger.info(f"Response Time: {response_time}")
+
+    return answer
+
+
+async def research_stream_service(query: str, data: str, provider: str = None, selected_model: str = None, cache_mode: CacheMode = CacheMode.USE) -> AsyncIterator[Dict]:
+    """Stream a research answer field by field while the agent generates it.
+
+    The agent's structured output is parsed incrementally, so `reasoning` and `answer` are
+    forwarded as they fill in instead of after the whole response has been validated.
+
+    Args:
+        query (str): The user's research query or question
+        data (str): The context or data to analyze
+        provider (str, optional): The AI provider to use. Defaults to environment variable or 'openai'
+        selected_model (str, optional): The specific model to use. Defaults to environment variable or 'gpt-4o-mini'
+        cache_mode (CacheMode, optional): Response cache control for this request. Defaults to CacheMode.USE
+
+    Yields:
+        dict: {"event": "delta", "data": {"field", "delta"}} while a field's text grows,
+            {"event": "field", "data": {"field", "value"}} when a field is complete, and finally
+            {"event": "result", "data": {"reasoning", "answer"}} with the validated response.
+
+    Raises:
+        Exception: If there is an error during processing
+    """
+    selected_model = os.getenv("SELECTED_MODEL", "gpt-4o-mini") if selected_model is None else selected_model
+    provider = os.getenv("PROVIDER", "openai") if provider is None else provider
+    research_agent = create_research_agent(provider = provider, selected_model = selected_model)
+    parser = PartialJSONParser()
+
+    async for event in research_agent.astream_response(query = query, data = data, cache_mode = cache_mode):
+        if event.result is not None:
+            response_json, prompt_tokens, completion_tokens, total_tokens, response_time = event.result
+            logger.info(f"Prompt Tokens: {prompt_tokens}")
+            logger.info(f"Completion Tokens: {completion_tokens}")
+            logger.info(f"Total Tokens: {total_tokens}")
+            logger.info(f"Response Time: {response_time}")
+            yield {"event": "result", "data": response_json.model_dump()}
+            continue
+        for field_event in parser.feed(event.delta):
+            if field_event.done:
+                yield {"event": "field", "data": {"field": field_event.field, "value": field_event.value}}
+            else:
+                yield {"event": "delta", "data": {"field": field_event.field, "delta": field_event.delta}}
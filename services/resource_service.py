@@ -1,18 +1,42 @@
 from helpers.helpers import PDFProcessor
 from helpers.loggers import get_logger
-from agents.resource_agent import understand_resource_agent
+from agents.resource_agent import understand_resource_agent, merge_resource_agent
+from agents.resource_agent.model import ResourceAgentResponse
+from helpers.chunking import estimate_tokens, pack_blocks
+from providers.base_provider import ContextLengthExceededError
+from typing import Callable, List, Optional
+from helpers.singleflight import SingleFlight, make_flight_key
+from enums.cache_mode import CacheMode
+import asyncio
 import os
 import traceback
 
 logger = get_logger()
 
-def process_document(pdf_file, provider: str = None, selected_model: str = None):
+# Concurrent requests for the same unchanged file share one extraction and LLM call
+_document_flights = SingleFlight()
+
+# Merge rounds allowed before partial analyses are concatenated instead of merged by the LLM
+MAX_REDUCE_DEPTH = 3
+
+# A chunk that overflows the context window is split in halves at most this many times, and never
+# below MIN_CHUNK_TOKENS; past that the overflow isn't the chunk's fault (e.g. an oversized prompt)
+MAX_SPLIT_DEPTH = 4
+MIN_CHUNK_TOKENS = 256
+
+async def process_document(pdf_file, provider: str = None, selected_model: str = None, cache_mode: CacheMode = CacheMode.USE, content_hash: str = None,
+                           cleanup: Optional[Callable[[], None]] = None):
     """Process a PDF document and extract key information using an AI research agent.
     
     Args:
         pdf_file: The PDF file to process
         provider (str, optional): The AI provider to use. Defaults to environment variable or 'openai'
         selected_model (str, optional): The specific model to use. Defaults to environment variable or 'gpt-4o-mini'
+        cache_mode (CacheMode, optional): Response cache control for this request. Defaults to CacheMode.USE
+        content_hash (str, optional): SHA-256 of the file when the caller already has it (e.g. uploads). Defaults to None
+        cleanup (Callable, optional): Removes `pdf_file` (e.g. a spooled upload). The file is then owned by this call:
+            it is removed once the shared extraction reading it has finished, even if this caller is cancelled
+            before that while identical requests still wait on it. Defaults to None
         
     Returns:
         dict: Dictionary containing summary, detailed title, objective and any extracted images
@@ -20,36 +44,205 @@ def process_document(pdf_file, provider: str = None, selected_model: str = None)
     Raises:
         Exception: If there is an error during processing
     """
+    # Whether the shared flight reads this caller's file, which then has to outlive this call
+    flight_owns_file = False
+
+    def start_flight(*args) -> asyncio.Task:
+        nonlocal flight_owns_file
+        flight_owns_file = True
+        task = asyncio.ensure_future(_run_document(*args))
+        if cleanup is not None:
+            # A done callback also runs when the flight is cancelled before it ever started
+            task.add_done_callback(lambda _: cleanup())
+        return task
+
     try:
         # Set default values if not provided
         selected_model = os.getenv("SELECTED_MODEL", "gpt-4o-mini") if selected_model is None else selected_model
-        provider = os.getenv("PROVIDER", "openai")
-        
-        # Extract content from PDF
-        pdf_processor = PDFProcessor(pdf_path = pdf_file)
-
-        text_content = pdf_processor.extract_text()
-        image_content = pdf_processor.extract_images() #noqa
+        provider = os.getenv("PROVIDER", "openai") if provider is None else provider
 
-        resource_agent = understand_resource_agent(provider=provider, selected_model=selected_model)
-        
-        response_json, prompt_tokens, completion_tokens, total_tokens, response_time = resource_agent.generate_response(
-            data=text_content
-        )
-        
-        logger.info(f"Prompt Tokens: {prompt_tokens}")
-        logger.info(f"Completion Tokens: {completion_tokens}") 
-        logger.info(f"Total Tokens: {total_tokens}")
-        logger.info(f"Response Time: {response_time}")
-        
-        document_info = {
-            "summary": response_json.summary,
-            "title": response_json.title,
-            "atomic_summaries": response_json.atomic_summaries
-        }
-        
-        return document_info
+        # Key on the file's content, or its identity and version, so an edited file is never served a stale result
+        if content_hash is not None:
+            document_identity = (content_hash,)
+        else:
+            stat = os.stat(pdf_file)
+            document_identity = (os.path.realpath(pdf_file), stat.st_size, stat.st_mtime_ns)
+        flight_key = make_flight_key(*document_identity, provider, selected_model, cache_mode)
+        return await _document_flights.do(flight_key, start_flight, pdf_file, provider, selected_model, cache_mode, content_hash)
         
     except Exception as e:
         logger.error(f"Error processing PDF document: {e}.\n{traceback.format_exc()}")
-        raise e
\ No newline at end of file
+        raise e
+    finally:
+        if cleanup is not None and not flight_owns_file:
+            # Joined an identical flight reading another caller's copy, this one isn't needed
+            cleanup()
+
+
+async def _run_document(pdf_file, provider: str, selected_model: str, cache_mode: CacheMode, content_hash: str = None):
+    """Extract and summarize a document once; shared by every identical in-flight `process_document` call."""
+    # Extract content from PDF
+    pdf_processor = PDFProcessor(pdf_path = pdf_file, content_hash = content_hash)
+
+    # PyMuPDF is synchronous, keep it off the event loop
+    extracted = await asyncio.to_thread(pdf_processor.extract_text_and_images)
+    return await summarize_extraction(extracted, provider, selected_model, cache_mode)
+
+
+async def summarize_extraction(extracted: dict, provider: str, selected_model: str, cache_mode: CacheMode = CacheMode.USE) -> dict:
+    """Summarize an already extracted document, e.g. when a pipeline shares one extraction between agents.
+
+    Args:
+        extracted (dict): The output of `PDFProcessor.extract_text_and_images`.
+        provider (str): The AI provider to use.
+        selected_model (str): The specific model to use.
+        cache_mode (CacheMode, optional): Response cache control for this request. Defaults to CacheMode.USE
+
+    Returns:
+        dict: Dictionary containing summary, title, atomic summaries and image metadata
+    """
+    page_texts = [record.text for record in extracted["pages"]]
+    # Only image metadata is returned, the pixels are never decoded on this path
+    image_content = [handle.metadata() for handle in extracted["images"]]
+    text_content = extracted["text"]
+
+    token_budget = int(os.getenv("RESOURCE_CONTEXT_TOKEN_BUDGET", 96000))
+    response_json = None
+
+    if estimate_tokens(text_content) <= token_budget:
+        try:
+            resource_agent = understand_resource_agent(provider=provider, selected_model=selected_model)
+            response_json = await _summarize(resource_agent, text_content, cache_mode)
+        except ContextLengthExceededError:
+            logger.warning("Document overflowed the context window despite the estimate, falling back to chunked summarization")
+            token_budget //= 2
+
+    if response_json is None:
+        response_json = await _map_reduce(page_texts, token_budget, provider, selected_model, cache_mode)
+    
+    document_info = {
+        "summary": response_json.summary,
+        "title": response_json.title,
+        "atomic_summaries": response_json.atomic_summaries,
+        "images": image_content
+    }
+    
+    return document_info
+
+
+async def _summarize(agent, data: str, cache_mode: CacheMode) -> ResourceAgentResponse:
+    """Run a resource agent over `data` and log its token usage."""
+    response_json, prompt_tokens, completion_tokens, total_tokens, response_time = await agent.agenerate_response(
+        data=data,
+        cache_mode=cache_mode
+    )
+
+    logger.info(f"Prompt Tokens: {prompt_tokens}")
+    logger.info(f"Completion Tokens: {completion_tokens}") 
+    logger.info(f"Total Tokens: {total_tokens}")
+    logger.info(f"Response Time: {response_time}")
+
+    return response_json
+
+
+async def _map_reduce(page_texts: List[str], token_budget: int, provider: str, selected_model: str, cache_mode: CacheMode) -> ResourceAgentResponse:
+    """Summarize a document that doesn't fit the context window.
+
+    The pages are packed into chunks that fit `token_budget` (keeping page and section boundaries),
+    the chunks are summarized concurrently, and the partial analyses are merged into one.
+
+    Args:
+        page_texts (List[str]): The text of every page, in order.
+        token_budget (int): Maximum estimated tokens of document text per LLM call.
+        provider (str): The AI provider to use.
+        selected_model (str): The specific model to use.
+        cache_mode (CacheMode): Response cache control for this request.
+
+    Returns:
+        ResourceAgentResponse: The merged analysis of the whole document.
+    """
+    chunks = pack_blocks(page_texts, token_budget)
+    logger.info(f"Document exceeds the context budget of {token_budget} tokens, summarizing {len(chunks)} chunks")
+
+    semaphore = asyncio.Semaphore(int(os.getenv("RESOURCE_MAP_CONCURRENCY", 4)))
+    resource_agent = understand_resource_agent(provider=provider, selected_model=selected_model)
+
+    async def summarize_chunk(chunk: str, budget: int, depth: int = 0) -> List[ResourceAgentResponse]:
+        try:
+            async with semaphore:
+                return [await _summarize(resource_agent, chunk, cache_mode)]
+        except ContextLengthExceededError:
+            # The estimate was too optimistic for this chunk, split it further
+            budget //= 2
+            if depth >= MAX_SPLIT_DEPTH or budget < MIN_CHUNK_TOKENS:
+                logger.error(f"Chunk still overflows the context window after {depth} splits, giving up")
+                raise
+            sub_chunks = pack_blocks([chunk], budget)
+            if sub_chunks == [chunk]:
+                # Splitting can't make it any smaller
+                raise
+            results = await asyncio.gather(*(summarize_chunk(sub_chunk, budget, depth + 1) for sub_chunk in sub_chunks))
+            return [partial for result in results for partial in result]
+
+    mapped = await asyncio.gather(*(summarize_chunk(chunk, token_budget) for chunk in chunks))
+    partials = [partial for result in mapped for partial in result]
+
+    return await _reduce(partials, token_budget, provider, selected_model, cache_mode, semaphore)
+
+
+def _render_partial(index: int, partial: ResourceAgentResponse) -> str:
+    atomic = "\n".join(f"- {topic}: {synopsis}" for topic, synopsis in (partial.atomic_summaries or {}).items())
+    return f"Part {index}: {partial.title}\nSummary: {partial.summary}\nAtomic summaries:\n{atomic}"
+
+
+def _concatenate_partials(partials: List[ResourceAgentResponse]) -> ResourceAgentResponse:
+    """Deterministically combine partial analyses when they can't be merged by the LLM."""
+    atomic_summaries = {}
+    for partial in partials:
+        for topic, synopsis in (partial.atomic_summaries or {}).items():
+            atomic_summaries[topic] = f"{atomic_summaries[topic]} {synopsis}" if topic in atomic_summaries else synopsis
+    return ResourceAgentResponse(
+        title=partials[0].title,
+        summary="\n\n".join(partial.summary for partial in partials),
+        atomic_summaries=atomic_summaries
+    )
+
+
+async def _reduce(partials: List[ResourceAgentResponse], token_budget: int, provider: str, selected_model: str,
+                  cache_mode: CacheMode, semaphore: asyncio.Semaphore, depth: int = 0) -> ResourceAgentResponse:
+    """Merge partial analyses, in a tree of concurrent merge calls when they don't fit in one."""
+    if len(partials) == 1:
+        return partials[0]
+    if depth >= MAX_REDUCE_DEPTH:
+        logger.warning(f"Partial analyses still exceed the context budget after {depth} merge rounds, concatenating them")
+        return _concatenate_partials(partials)
+
+    # Pack whole partials (never split one) into groups that fit the budget
+    groups, current, current_tokens = [], [], 0
+    for i, partial in enumerate(partials):
+        rendered = _render_partial(i + 1, partial)
+        rendered_tokens = estimate_tokens(rendered)
+        if current and current_tokens + rendered_tokens > token_budget:
+            groups.append(current)
+            current, current_tokens = [], 0
+        current.append((rendered, partial))
+        current_tokens += rendered_tokens
+    groups.append(current)
+
+    if len(groups) == len(partials):
+        # No two partials fit together, another merge round can't make progress
+        return _concatenate_partials(partials)
+
+    merge_agent = merge_resource_agent(provider=provider, selected_model=selected_model)
+
+    async def merge_group(members: List[tuple[str, ResourceAgentResponse]]) -> ResourceAgentResponse:
+        if len(members) == 1:
+            return members[0][1]
+        try:
+            async with semaphore:
+                return await _summarize(merge_agent, "\n\n".join(rendered for rendered, _ in members), cache_mode)
+        except ContextLengthExceededError:
+            return _concatenate_partials([partial for _, partial in members])
+
+    merged = await asyncio.gather(*(merge_group(members) for members in groups))
+    return await _reduce(list(merged), token_budget, provider, selected_model, cache_mode, semaphore, depth + 1)
@@ -0,0 +1,145 @@
+import asyncio
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import fitz
+import httpx
+import pytest
+from helpers.link_fetcher import LinkFetcher
+
+
+def make_pdf(text: str) -> bytes:
+    doc = fitz.open()
+    doc.new_page().insert_text((72, 72), text)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+PDF = make_pdf("A referenced paper")
+
+
+def mock_handler(request: httpx.Request) -> httpx.Response:
+    path = request.url.path
+    if path == "/page":
+        return httpx.Response(200, html="<html><head><title>Title</title><script>x()</script></head><body><p>Hello   world</p></body></html>")
+    if path == "/paper.pdf":
+        return httpx.Response(200, content=PDF, headers={"content-type": "application/pdf"})
+    if path == "/corrupt.pdf":
+        return httpx.Response(200, content=b"%PDF-1.7 not really a pdf", headers={"content-type": "application/pdf"})
+    if path == "/charset":
+        return httpx.Response(200, content=b"plain text", headers={"content-type": "text/plain; charset=no-such-charset"})
+    return httpx.Response(404)
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+async def fetch_all(fetcher: LinkFetcher, urls):
+    try:
+        return await fetcher.fetch_all(urls)
+    finally:
+        await fetcher.aclose()
+
+
+def test_fetch_all_reports_failures_per_link():
+    fetcher = LinkFetcher(transport=httpx.MockTransport(mock_handler), allow_private=True)
+    base = "http://example.test"
+    urls = [f"{base}/page", f"{base}/paper.pdf", f"{base}/corrupt.pdf", f"{base}/charset", f"{base}/missing"]
+
+    pages = run(fetch_all(fetcher, urls))
+
+    assert list(pages) == urls
+    assert pages[f"{base}/page"].text == "Title\nHello world"
+    assert pages[f"{base}/paper.pdf"].text == "A referenced paper"
+    assert pages[f"{base}/charset"].text == "plain text"
+    assert not pages[f"{base}/corrupt.pdf"].ok
+    assert pages[f"{base}/missing"].error == "HTTP 404"
+
+
+def test_pdf_cut_off_at_max_bytes_is_reported_not_raised():
+    fetcher = LinkFetcher(transport=httpx.MockTransport(mock_handler), allow_private=True, max_bytes=64)
+
+    page = run(fetch_all(fetcher, ["http://example.test/paper.pdf"]))["http://example.test/paper.pdf"]
+
+    assert page.bytes == 64
+    assert not page.ok
+
+
+def test_blocks_private_addresses_and_other_schemes():
+    fetcher = LinkFetcher(transport=httpx.MockTransport(mock_handler))
+
+    pages = run(fetch_all(fetcher, ["http://127.0.0.1/page", "file:///etc/passwd"]))
+
+    assert all(page.error.startswith("Blocked") for page in pages.values())
+
+
+class StubServer:
+    """A local HTTP server that records how many requests it serves at once."""
+
+    def __init__(self, delay: float):
+        self.hits = 0
+        self.active = 0
+        self.max_active = 0
+        lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                with lock:
+                    stub.hits += 1
+                    stub.active += 1
+                    stub.max_active = max(stub.max_active, stub.active)
+                time.sleep(delay)
+                body = f"<p>{self.path}</p>".encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                with lock:
+                    stub.active -= 1
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def stub_server():
+    server = StubServer(delay=0.05)
+    yield server
+    server.close()
+
+
+def test_stub_server_per_host_limit_and_cache(stub_server, tmp_path):
+    urls = [f"{stub_server.url}/{i}" for i in range(6)]
+
+    pages = run(fetch_all(LinkFetcher(per_host=2, cache_dir=tmp_path, allow_private=True), urls))
+
+    assert all(page.ok and not page.cached for page in pages.values())
+    assert pages[urls[3]].text == "/3"
+    assert stub_server.max_active == 2
+
+    pages = run(fetch_all(LinkFetcher(cache_dir=tmp_path, allow_private=True), urls))
+
+    assert all(page.cached for page in pages.values())
+    assert stub_server.hits == 6
+
+
+def test_stub_server_timeout(tmp_path):
+    server = StubServer(delay=1.0)
+    try:
+        page = run(fetch_all(LinkFetcher(timeout=0.2, allow_private=True), [f"{server.url}/slow"]))[f"{server.url}/slow"]
+    finally:
+        server.close()
+
+    assert page.error == "Timed out after 0.2s"